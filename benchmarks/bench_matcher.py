@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compares per-pattern PathSpec matching with the combined-regex
+CompiledPathSpec on a large global excludes file.
+
+    PYTHONPATH=src python benchmarks/bench_matcher.py [n_patterns] [n_paths]
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+import timeit
+
+from iwalk.matcher import CompiledPathSpec
+from iwalk.vendor.pathspec import PathSpec
+from iwalk.vendor.pathspec.patterns.gitwildmatch import GitWildMatchPattern
+
+EXTENSIONS = ['pyc', 'o', 'so', 'log', 'tmp', 'swp', 'class', 'jar', 'dll', 'exe',
+              'obj', 'pdb', 'idb', 'ilk', 'lib', 'a', 'out', 'bak', 'orig', 'rej']
+NAMES = ['node_modules', '__pycache__', '.DS_Store', 'Thumbs.db', '.idea', '.vscode',
+         'build', 'dist', 'target', 'coverage', '.tox', '.venv', '.mypy_cache']
+DIRS = ['src', 'lib', 'docs', 'tests', 'app', 'core', 'util', 'api', 'web', 'tools']
+
+
+def make_patterns(count, rng):
+    lines = []
+    while len(lines) < count:
+        kind = rng.randint(0, 5)
+        if kind == 0:
+            lines.append('*.%s%d' % (rng.choice(EXTENSIONS), len(lines)))
+        elif kind == 1:
+            lines.append('%s%d/' % (rng.choice(NAMES), len(lines)))
+        elif kind == 2:
+            lines.append('/%s/gen%d/' % (rng.choice(DIRS), len(lines)))
+        elif kind == 3:
+            lines.append('%s/**/*.cache%d' % (rng.choice(DIRS), len(lines)))
+        elif kind == 4:
+            lines.append('!keep%d.%s' % (len(lines), rng.choice(EXTENSIONS)))
+        else:
+            lines.append('tmp%d-*' % len(lines))
+    lines.extend('*.%s' % ext for ext in EXTENSIONS)
+    lines.extend(NAMES)
+    return lines
+
+
+def make_paths(count, rng):
+    paths = []
+    for i in range(count):
+        depth = rng.randint(0, 6)
+        parts = [rng.choice(DIRS) for _ in range(depth)]
+        parts.append('file%d.%s' % (i, rng.choice(EXTENSIONS + ['py', 'c', 'h', 'js', 'md'])))
+        paths.append('/'.join(parts))
+    return paths
+
+
+def main():
+    n_patterns = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    n_paths = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = random.Random(42)
+    lines = make_patterns(n_patterns, rng)
+    paths = make_paths(n_paths, rng)
+
+    reference = PathSpec.from_lines(GitWildMatchPattern, lines)
+    compiled = CompiledPathSpec.from_lines(GitWildMatchPattern, lines)
+
+    for path in paths:
+        assert reference.match_file(path) == compiled.match_file(path), path
+
+    def run(spec):
+        match_file = spec.match_file
+        for path in paths:
+            match_file(path)
+
+    slow = min(timeit.repeat(lambda: run(reference), number=1, repeat=3))
+    fast = min(timeit.repeat(lambda: run(compiled), number=1, repeat=3))
+    print("patterns: %d  paths: %d" % (len(lines), len(paths)))
+    print("PathSpec          %8.1f us/path" % (slow / len(paths) * 1e6))
+    print("CompiledPathSpec  %8.1f us/path" % (fast / len(paths) * 1e6))
+    print("speedup           %8.1fx" % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()
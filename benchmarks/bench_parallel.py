@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Times the serial iwalk() against parallel_iwalk() with 1 to 16 workers.
+
+    PYTHONPATH=src python benchmarks/bench_parallel.py [directory]
+
+Without a directory a synthetic tree is generated in a temporary
+directory. Scaling is most visible on network filesystems, where each
+directory listing waits on the server.
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from iwalk import iwalk, parallel_iwalk
+
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+
+
+def make_tree(root, fanout=8, depth=3, files=40):
+    with open(os.path.join(root, '.gitignore'), 'w') as f:
+        f.write('*.o\nbuild/\n')
+
+    def build(path, level):
+        for i in range(files):
+            open(os.path.join(path, 'file%d.%s' % (i, 'o' if i % 5 == 0 else 'c')), 'w').close()
+        if level == depth:
+            return
+        for i in range(fanout):
+            child = os.path.join(path, 'dir%d' % i)
+            os.mkdir(child)
+            build(child, level + 1)
+
+    build(root, 0)
+
+
+def timed(walk):
+    start = time.time()
+    files = sum(len(filenames) for _, _, filenames in walk)
+    return time.time() - start, files
+
+
+def main():
+    temp_dir = None
+    if len(sys.argv) > 1:
+        root = sys.argv[1]
+    else:
+        temp_dir = root = tempfile.mkdtemp()
+        make_tree(root)
+    try:
+        serial, count = timed(iwalk(root))
+        print("files: %d" % count)
+        print("iwalk              %7.3fs" % serial)
+        for workers in WORKER_COUNTS:
+            elapsed, _ = timed(parallel_iwalk(root, workers=workers))
+            print("parallel_iwalk x%-2d %7.3fs  %5.2fx" % (workers, elapsed, serial / elapsed))
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Times iwalk against os.walk and git on the synthetic trees of trees.py
+and stores the results as JSON, to catch regressions between commits.
+
+    PYTHONPATH=src python benchmarks/bench_suite.py [options]
+
+Options:
+  --scale=<n>         Size of the generated trees, 1.0 is full size [default: 1.0]
+  --repeat=<n>        Runs per measurement; the minimum is reported [default: 3]
+  --trees=<a,b>       Only these trees [default: all of trees.TREES]
+  --tree-dir=<dir>    Keep generated trees in <dir> and reuse them
+  --output=<file>     Write the results as JSON to <file>
+  --compare=<file>    Print the change against results saved earlier
+
+Measured on each tree:
+
+    os.walk          plain os.walk(), the floor for a Python walk
+    iwalk            iwalk.core.iwalk()
+    load_ignore_specs
+                     iwalk.patterns.load_ignore_specs()
+    is_ignored       iwalk.core.is_ignored() on up to 20000 paths
+    cli              scripts/iwalk-tree.py --print0, including startup
+    git              git ls-files --others --exclude-standard, if git runs
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from trees import TREES
+
+from iwalk.core import IGNORE_FILENAMES, is_ignored, iwalk
+from iwalk.patterns import load_ignore_specs
+
+RESULTS_VERSION = 1
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(REPO_DIR, 'scripts', 'iwalk-tree.py')
+
+IS_IGNORED_PATHS = 20000
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+
+def bench_os_walk(root, ctx):
+    return sum(len(filenames) for _, _, filenames in os.walk(root))
+
+
+def bench_iwalk(root, ctx):
+    return sum(len(filenames) for _, _, filenames in iwalk(root))
+
+
+def bench_load_ignore_specs(root, ctx):
+    return len(load_ignore_specs(root, IGNORE_FILENAMES))
+
+
+def bench_is_ignored(root, ctx):
+    spec_map = ctx['spec_map']
+    return sum(1 for path, is_dir in ctx['paths'] if is_ignored(path, spec_map, is_dir))
+
+
+def bench_cli(root, ctx):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.join(REPO_DIR, 'src'), env.get('PYTHONPATH', '')])
+    with open(os.devnull, 'wb') as devnull:
+        subprocess.check_call([sys.executable, CLI, '--print0', root], stdout=devnull, env=env)
+
+
+def bench_git(root, ctx):
+    with open(os.devnull, 'wb') as devnull:
+        subprocess.check_call(['git', '-c', 'core.untrackedCache=false', '-c', 'core.fsmonitor=false',
+                               'ls-files', '--others', '--exclude-standard'],
+                              cwd=root, stdout=devnull, env=ctx['git_env'])
+
+
+BENCHMARKS = [
+    ('os.walk', bench_os_walk),
+    ('iwalk', bench_iwalk),
+    ('load_ignore_specs', bench_load_ignore_specs),
+    ('is_ignored', bench_is_ignored),
+    ('cli', bench_cli),
+    ('git', bench_git),
+]
+
+
+def prepare_tree(name, tree_dir, scale):
+    # Returns the root of the named tree, generating it unless tree_dir
+    # already holds one made at this scale.
+    root = os.path.join(tree_dir, '%s-%s' % (name, scale))
+    marker = os.path.join(tree_dir, '%s-%s.done' % (name, scale))
+    if not os.path.exists(marker):
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        os.makedirs(root)
+        TREES[name](root, scale)
+        open(marker, 'w').close()
+    return root
+
+
+def make_context(root, tree_dir):
+    ctx = {'spec_map': load_ignore_specs(root, IGNORE_FILENAMES), 'paths': []}
+    for dirpath, dirnames, filenames in os.walk(root):
+        ctx['paths'].extend((os.path.join(dirpath, name), True) for name in dirnames)
+        ctx['paths'].extend((os.path.join(dirpath, name), False) for name in filenames)
+    step = max(1, len(ctx['paths']) // IS_IGNORED_PATHS)
+    ctx['paths'] = ctx['paths'][::step][:IS_IGNORED_PATHS]
+
+    # git keeps its repository outside the tree, so the other walks do not
+    # see a .git directory.
+    git_env = dict(os.environ)
+    git_env['GIT_DIR'] = os.path.join(tree_dir, os.path.basename(root) + '.git')
+    git_env['GIT_WORK_TREE'] = root
+    ctx['git_env'] = git_env
+    try:
+        with open(os.devnull, 'wb') as devnull:
+            subprocess.check_call(['git', 'init', '-q'], cwd=root, env=git_env,
+                                  stdout=devnull, stderr=devnull)
+    except (OSError, subprocess.CalledProcessError):
+        ctx['git_env'] = None
+    return ctx
+
+
+def measure(func, root, ctx, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = _clock()
+        func(root, ctx)
+        runs.append(_clock() - start)
+    return {'min': min(runs), 'median': sorted(runs)[len(runs) // 2], 'runs': runs}
+
+
+def run(names, tree_dir, scale, repeat):
+    results = {}
+    for name in names:
+        print("%s: preparing tree" % name, file=sys.stderr)
+        root = prepare_tree(name, tree_dir, scale)
+        ctx = make_context(root, tree_dir)
+        dirs = files = 0
+        for _, _, filenames in os.walk(root):
+            dirs += 1
+            files += len(filenames)
+        timings = {}
+        for label, func in BENCHMARKS:
+            if label == 'git' and ctx['git_env'] is None:
+                continue
+            timings[label] = measure(func, root, ctx, repeat)
+            print("%s: %-18s %8.3fs" % (name, label, timings[label]['min']), file=sys.stderr)
+        results[name] = {'dirs': dirs, 'files': files, 'timings': timings}
+    return results
+
+
+def describe(scale, repeat, results):
+    return {
+        'version': RESULTS_VERSION,
+        'commit': _git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(old, new):
+    """Prints each timing of *new* as a ratio of the same timing in *old*;
+    above 1.00x is slower."""
+    print("%-16s %-18s %9s %9s %7s" % ('tree', 'benchmark', 'before', 'after', 'ratio'))
+    for name in sorted(new['results']):
+        before = old['results'].get(name, {}).get('timings', {})
+        for label, _ in BENCHMARKS:
+            timing = new['results'][name]['timings'].get(label)
+            if timing is None or label not in before:
+                continue
+            was, now = before[label]['min'], timing['min']
+            print("%-16s %-18s %8.3fs %8.3fs %6.2fx" % (name, label, was, now,
+                                                       now / was if was else float('inf')))
+
+
+def _git_commit():
+    try:
+        out = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR,
+                                      stderr=open(os.devnull, 'wb'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.decode('ascii').strip()
+
+
+def parse_args(argv):
+    options = {'scale': 1.0, 'repeat': 3, 'trees': sorted(TREES), 'tree-dir': None,
+               'output': None, 'compare': None}
+    args = iter(argv)
+    for arg in args:
+        key, _, value = arg.partition('=')
+        key = key.lstrip('-')
+        if not arg.startswith('--') or key not in options:
+            sys.exit(__doc__)
+        if not value:
+            value = next(args, None)
+            if value is None:
+                sys.exit("Missing value for --%s" % key)
+        if key == 'scale':
+            value = float(value)
+        elif key == 'repeat':
+            value = int(value)
+        elif key == 'trees':
+            value = value.split(',')
+            unknown = [name for name in value if name not in TREES]
+            if unknown:
+                sys.exit("Unknown trees: %s" % ', '.join(unknown))
+        options[key] = value
+    return options
+
+
+def main():
+    options = parse_args(sys.argv[1:])
+    tree_dir = options['tree-dir']
+    temp_dir = None
+    if tree_dir is None:
+        temp_dir = tree_dir = tempfile.mkdtemp()
+    elif not os.path.isdir(tree_dir):
+        os.makedirs(tree_dir)
+    try:
+        results = run(options['trees'], os.path.abspath(tree_dir), options['scale'],
+                      options['repeat'])
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+
+    report = describe(options['scale'], options['repeat'], results)
+    if options['output']:
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if options['compare']:
+        with open(options['compare']) as f:
+            compare(json.load(f), report)
+    elif not options['output']:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+
+if __name__ == '__main__':
+    main()
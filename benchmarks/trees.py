@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Generators of synthetic source trees for the benchmarks.
+
+Each generator fills an empty directory deterministically from a seed.
+*scale* multiplies the number of files; 1.0 approximates the real thing,
+so a quick run can use 0.05.
+
+    kernel           ~75k C sources and headers in deep driver subtrees,
+                     with ignored build products next to them
+    monorepo         a JS workspace of packages whose node_modules and
+                     dist directories, ignored, hold most of the files
+    deep             long directory chains, 60 levels deep
+    nested_ignores   a .gitignore in every directory, with negations,
+                     anchored patterns and ** patterns
+"""
+
+import os
+import random
+
+KERNEL_TOP = ['arch', 'block', 'crypto', 'Documentation', 'drivers', 'fs', 'include', 'kernel',
+              'lib', 'mm', 'net', 'scripts', 'security', 'sound', 'tools']
+# Rough share of the kernel's files in each top-level directory.
+KERNEL_WEIGHT = {'arch': 20, 'drivers': 45, 'Documentation': 8, 'fs': 4, 'include': 6,
+                 'net': 3, 'sound': 3, 'tools': 6}
+KERNEL_GITIGNORE = """\
+.*
+*.a
+*.cmd
+*.ko
+*.mod
+*.mod.c
+*.o
+*.o.*
+*.order
+*.symvers
+modules.builtin
+/vmlinux
+/System.map
+!.gitignore
+!.mailmap
+!.clang-format
+"""
+
+NPM_NAMES = ['react', 'lodash', 'babel-core', 'webpack', 'typescript', 'eslint', 'jest',
+             'rxjs', 'core-js', 'chalk', 'debug', 'semver', 'glob', 'minimatch', 'yargs']
+MONOREPO_GITIGNORE = """\
+node_modules/
+dist/
+coverage/
+.cache/
+*.log
+*.tsbuildinfo
+!packages/*/dist/keep.d.ts
+"""
+
+
+def make_kernel(root, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    _write(os.path.join(root, '.gitignore'), KERNEL_GITIGNORE)
+    _touch(os.path.join(root, 'Makefile'))
+    total = int(75000 * scale)
+    weights = sum(KERNEL_WEIGHT.get(name, 1) for name in KERNEL_TOP)
+    for top in KERNEL_TOP:
+        count = max(1, total * KERNEL_WEIGHT.get(top, 1) // weights)
+        _fill(os.path.join(root, top), count, rng, depth=4, fanout=8,
+              names=lambda i: rng.choice(['drv', 'core', 'bus', 'hw', 'io']) + '%d' % i,
+              files=_kernel_files)
+
+
+def _kernel_files(path, count, rng):
+    for i in range(count):
+        stem = 'f%d' % i
+        _touch(os.path.join(path, stem + rng.choice(['.c', '.c', '.h', '.S'])))
+        if rng.random() < 0.3:
+            # Build products that the root .gitignore hides.
+            _touch(os.path.join(path, stem + '.o'))
+            _touch(os.path.join(path, '.' + stem + '.o.cmd'))
+    if rng.random() < 0.05:
+        _write(os.path.join(path, '.gitignore'), '/generated_*.h\n!generated_keep.h\n')
+        _touch(os.path.join(path, 'generated_regs.h'))
+
+
+def make_monorepo(root, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    _write(os.path.join(root, '.gitignore'), MONOREPO_GITIGNORE)
+    _touch(os.path.join(root, 'package.json'))
+    packages = max(1, int(200 * scale))
+    for p in range(packages):
+        pkg = os.path.join(root, 'packages', 'pkg%d' % p)
+        _touch(os.path.join(pkg, 'package.json'))
+        for sub in ('src', 'src/components', 'test'):
+            for i in range(rng.randint(3, 12)):
+                _touch(os.path.join(pkg, sub, 'mod%d.ts' % i))
+        for i in range(5):
+            _touch(os.path.join(pkg, 'dist', 'mod%d.js' % i))
+        _touch(os.path.join(pkg, 'dist', 'keep.d.ts'))
+        if p % 4 == 0:
+            _node_modules(os.path.join(pkg, 'node_modules'), rng, 10, 2)
+    _node_modules(os.path.join(root, 'node_modules'), rng, int(1500 * scale) or 1, 3)
+
+
+def _node_modules(path, rng, count, depth):
+    for i in range(count):
+        module = os.path.join(path, '%s-%d' % (rng.choice(NPM_NAMES), i))
+        _touch(os.path.join(module, 'package.json'))
+        for sub in ('lib', 'lib/internal', 'esm'):
+            for j in range(rng.randint(2, 8)):
+                _touch(os.path.join(module, sub, 'index%d.js' % j))
+        if depth > 1 and rng.random() < 0.2:
+            _node_modules(os.path.join(module, 'node_modules'), rng, 3, depth - 1)
+
+
+def make_deep(root, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    _write(os.path.join(root, '.gitignore'), '*.tmp\n')
+    chains = max(1, int(400 * scale))
+    for c in range(chains):
+        path = os.path.join(root, 'chain%d' % c)
+        for level in range(60):
+            path = os.path.join(path, 'level%d' % level)
+            for i in range(rng.randint(0, 4)):
+                _touch(os.path.join(path, 'f%d%s' % (i, rng.choice(['.txt', '.tmp']))))
+        _touch(os.path.join(path, 'leaf.txt'))
+
+
+def make_nested_ignores(root, scale=1.0, seed=0):
+    rng = random.Random(seed)
+    top = max(1, int(round(40 * scale ** 0.5)))
+
+    def build(path, level):
+        _write(os.path.join(path, '.gitignore'), _nested_patterns(rng, level))
+        for i in range(rng.randint(4, 12)):
+            name = rng.choice(['keep%d.tmp', 'f%d.tmp', 'f%d.py', 'local-%d', 'data%d.bin']) % i
+            _touch(os.path.join(path, name))
+        _touch(os.path.join(path, 'cache', 'blob.bin'))
+        _touch(os.path.join(path, 'build', 'out.o'))
+        if level < 3:
+            for i in range(top if level == 0 else rng.randint(2, 6)):
+                build(os.path.join(path, 'd%d' % i), level + 1)
+
+    build(root, 0)
+
+
+def _nested_patterns(rng, level):
+    lines = ['# level %d' % level, '*.tmp', '!keep*.tmp', '/local-*', '**/cache/*.bin']
+    if rng.random() < 0.5:
+        lines.append('build/')
+    if rng.random() < 0.3:
+        lines.append('!build/')
+    if rng.random() < 0.3:
+        lines.append('/d%d/' % rng.randint(0, 5))
+    if rng.random() < 0.2:
+        lines.append('!/local-%d' % rng.randint(0, 5))
+    return '\n'.join(lines) + '\n'
+
+
+TREES = {
+    'kernel': make_kernel,
+    'monorepo': make_monorepo,
+    'deep': make_deep,
+    'nested_ignores': make_nested_ignores,
+}
+
+
+def _fill(path, count, rng, depth, fanout, names, files):
+    # Spreads count files over a random subtree below path.
+    here = count if depth == 0 else rng.randint(0, max(1, count // 6))
+    files(path, here, rng)
+    left = count - here
+    if left <= 0:
+        return
+    children = rng.randint(1, fanout)
+    for i in range(children):
+        share = left // (children - i)
+        left -= share
+        _fill(os.path.join(path, names(i)), share, rng, depth - 1, fanout, names, files)
+
+
+def _write(path, text):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def _touch(path):
+    _write(path, '')
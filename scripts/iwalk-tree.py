@@ -3,30 +3,107 @@
 
 from __future__ import print_function
 
+import io
+import json
 import os
+import signal
 import sys
 from iwalk import iwalk
+from iwalk.cache import SpecCache
+from iwalk.stats import WalkStats
 
 USAGE = """Usage:
   iwalk-tree.py [options] <directory>...
 
 Options:
-  -a --all       Include hidden files and directories [default: False]
-  -h --help      Show this message and exit
+  -a --all            Include hidden files and directories [default: False]
+  --cache-dir=<dir>   Cache parsed ignore files in <dir> between runs
+  --list              Print the path of each file, one per line
+  --print0            Like --list, but end each path with a NUL byte
+  --jsonl             Print one JSON object per file and directory
+  --unsorted          Keep directory order instead of sorting names
+  --stats             Print walk statistics to stderr when done
+  -h --help           Show this message and exit
 
 By default, hidden files (starting with ".") are excluded from the output.
 If no <directory> is given, the current working directory (.) is used.
+
+--list, --print0 and --jsonl print paths starting with <directory>, as
+find does, or relative paths for ".". They stream raw file names, so
+--print0 output can be passed to "xargs -0".
 """
 
-def print_tree(root, exclude_hidden):
+# Output is written in blocks of this size rather than line by line.
+BUFFER_SIZE = 1 << 18
+
+_fsencode = getattr(os, 'fsencode', lambda path: path)
+
+if hasattr(os, 'fsdecode'):
+    _fsdecode = os.fsdecode
+else:
+    def _fsdecode(path):
+        # Python 2 has no surrogateescape: bytes that are not UTF-8 become
+        # U+FFFD rather than fail json.dumps().
+        return path.decode('utf-8', 'replace')
+
+def print_tree(root, exclude_hidden, cache=None, stats=None):
     print("[DEBUG] Walking directory: %s (exclude_hidden=%s)" % (root, exclude_hidden), file=sys.stderr)
-    for dirpath, dirnames, filenames in iwalk(root, exclude_hidden=exclude_hidden):
+    for dirpath, dirnames, filenames in iwalk(root, exclude_hidden=exclude_hidden, cache=cache,
+                                              stats=stats):
         level = dirpath.replace(root, '').count(os.sep)
         indent = '    ' * level
-        print("%s%s/" % (indent, os.path.basename(dirpath) or root))
+        lines = ["%s%s/" % (indent, os.path.basename(dirpath) or root)]
         subindent = '    ' * (level + 1)
-        for f in sorted(filenames):
-            print("%s%s" % (subindent, f))
+        lines.extend(subindent + f for f in sorted(filenames))
+        print('\n'.join(lines))
+
+def stream_paths(out, root, display, exclude_hidden, cache=None, mode='list', sort=True,
+                 stats=None):
+    """Writes the kept paths below *root* to the binary stream *out*.
+
+    The walk runs on bytes so names are written exactly as the file system
+    stores them, without decoding. *display* is the byte prefix printed in
+    place of *root*. With *sort*, names are ordered within each directory
+    and subdirectories are visited in that order.
+    """
+    end = b'\0' if mode == 'print0' else b'\n'
+    skip = len(root.rstrip(b'/')) + 1
+    for dirpath, dirnames, filenames in iwalk(root, exclude_hidden=exclude_hidden, cache=cache,
+                                              stats=stats):
+        if sort:
+            # Sorting in place also orders the rest of the walk.
+            dirnames.sort()
+            filenames.sort()
+        prefix = display + dirpath[skip:]
+        if prefix and not prefix.endswith(b'/'):
+            prefix += b'/'
+        if mode == 'jsonl':
+            lines = [_json_line(prefix + name, 'dir') for name in dirnames]
+            lines.extend(_json_line(prefix + name, 'file') for name in filenames)
+            out.write(b''.join(lines))
+        elif filenames:
+            # One join per directory instead of one string per path.
+            separator = end + prefix
+            out.write(prefix + separator.join(filenames) + end)
+
+def _json_line(path, kind):
+    # Names that are not valid UTF-8 survive as escaped surrogates, or as
+    # replacement characters on Python 2.
+    return (json.dumps({'path': _fsdecode(path), 'type': kind}) + '\n').encode('ascii')
+
+def _display_prefix(root):
+    if os.path.normpath(root) == os.curdir:
+        return b''
+    root = _fsencode(root)
+    return root if root.endswith(b'/') else root + b'/'
+
+def _open_stdout():
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return getattr(sys.stdout, 'buffer', sys.stdout)
+    sys.stdout.flush()
+    return io.open(fd, 'wb', buffering=BUFFER_SIZE, closefd=False)
 
 def main():
     args = sys.argv[1:]
@@ -35,11 +112,28 @@ def main():
         sys.exit(0)
 
     include_hidden = False
+    cache_dir = None
+    mode = 'tree'
+    sort = True
+    stats = None
     cleaned_args = []
 
+    args = iter(args)
     for arg in args:
         if arg in ('-a', '--all'):
             include_hidden = True
+        elif arg in ('--list', '--print0', '--jsonl'):
+            mode = arg[2:]
+        elif arg == '--unsorted':
+            sort = False
+        elif arg == '--stats':
+            stats = WalkStats()
+        elif arg == '--cache-dir' or arg.startswith('--cache-dir='):
+            cache_dir = arg.partition('=')[2] or next(args, None)
+            if not cache_dir:
+                print("Missing value for --cache-dir", file=sys.stderr)
+                print(USAGE, file=sys.stderr)
+                sys.exit(1)
         elif arg.startswith('-'):
             print("Unknown option: %s" % arg, file=sys.stderr)
             print(USAGE, file=sys.stderr)
@@ -51,12 +145,31 @@ def main():
     if not cleaned_args:
         cleaned_args = ['.']
 
+    cache = SpecCache(cache_dir) if cache_dir else None
     for root in cleaned_args:
-        abs_root = os.path.abspath(root)
-        if not os.path.isdir(abs_root):
+        if not os.path.isdir(root):
             print("Error: Not a directory: %s" % root, file=sys.stderr)
             sys.exit(1)
-        print_tree(abs_root, exclude_hidden=not include_hidden)
+
+    if mode == 'tree':
+        for root in cleaned_args:
+            print_tree(os.path.abspath(root), exclude_hidden=not include_hidden, cache=cache,
+                       stats=stats)
+    else:
+        stream_all(cleaned_args, include_hidden, cache, mode, sort, stats)
+    if stats is not None:
+        print(stats.report(), file=sys.stderr)
+
+def stream_all(roots, include_hidden, cache, mode, sort, stats):
+    if hasattr(signal, 'SIGPIPE'):
+        # End quietly when the reader goes away, e.g. "| head", like find.
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    out = _open_stdout()
+    for root in roots:
+        stream_paths(out, _fsencode(os.path.abspath(root)), _display_prefix(root),
+                     exclude_hidden=not include_hidden, cache=cache, mode=mode, sort=sort,
+                     stats=stats)
+    out.flush()
 
 if __name__ == "__main__":
     main()
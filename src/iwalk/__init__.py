@@ -1,2 +1,15 @@
 from .core import *
 from .patterns import *
+from .parallel import *
+from .snapshot import *
+from .watch import *
+from .manifest import *
+from .stats import *
+from .globbing import *
+from .listing import *
+from .gitindex import *
+from .copying import *
+
+import sys
+if sys.version_info >= (3, 6):
+    from .aio import *
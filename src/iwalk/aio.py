@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Requires Python 3.6 for async generators; iwalk/__init__.py only
+# imports this module there.
+import asyncio
+import os
+
+from iwalk.core import IGNORE_FILENAMES, _Walk, _scan_dir
+
+# Directory listings one walk runs on the executor at the same time.
+DEFAULT_CONCURRENCY = 4
+
+# Directories listed ahead of the consumer; also bounds the results held
+# while the consumer is busy.
+DEFAULT_READAHEAD = 16
+
+_get_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+async def aiwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False,
+                 concurrency=DEFAULT_CONCURRENCY, readahead=DEFAULT_READAHEAD, cache=None,
+                 executor=None):
+    """Walks *root_dir* like :func:`iwalk.iwalk`, as an async generator
+    that never blocks the event loop.
+
+    Each directory is listed, its ignore files read and its entries
+    filtered in one job on *executor* (the loop's default executor when
+    None). At most *concurrency* jobs of a walk run at once, and at most
+    *readahead* directories are listed ahead of the consumer, so a slow
+    consumer holds the walk back instead of letting results pile up.
+
+    Results come in :func:`iwalk.iwalk` order and pruning *dirnames* in
+    place works as with :func:`os.walk`. Cancelling the consuming task, or
+    closing the generator, cancels the pending jobs; jobs already running
+    finish in their thread and are discarded. A *cache* is saved on the
+    executor as well once the walk ends.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency:{0!r} must be at least 1.".format(concurrency))
+    loop = _get_loop()
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    spec_map = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = {}
+
+    async def scan(dirpath):
+        async with semaphore:
+            return await loop.run_in_executor(executor, _scan_dir, dirpath, walk, spec_map)
+
+    def submit(dirpath):
+        if dirpath in tasks:
+            return True
+        if len(tasks) >= readahead:
+            return False
+        tasks[dirpath] = asyncio.ensure_future(scan(dirpath))
+        return True
+
+    async def take(dirpath):
+        task = tasks.pop(dirpath, None)
+        if task is None:
+            return await scan(dirpath)
+        return await task
+
+    stack = [walk.root_dir]
+    try:
+        while stack:
+            dirpath = stack.pop()
+            listing = await take(dirpath)
+            if listing is None:
+                continue
+            dirnames, filenames, links = listing
+
+            speculative = []
+            for name in dirnames:
+                if name in links:
+                    continue
+                child = os.path.join(dirpath, name)
+                if not submit(child):
+                    break
+                speculative.append((name, child))
+
+            yield dirpath, dirnames, filenames
+
+            kept = set(dirnames)
+            for name, child in speculative:
+                if name not in kept:
+                    tasks.pop(child).cancel()
+            for name in reversed(dirnames):
+                if name not in links:
+                    stack.append(os.path.join(dirpath, name))
+            for pending in reversed(stack[-readahead:]):
+                if not submit(pending):
+                    break
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        if walk.cache is None:
+            walk.close()
+        else:
+            await loop.run_in_executor(executor, walk.close)
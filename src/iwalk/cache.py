@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+import zlib
+
+from iwalk.patterns import _is_bytes, read_patterns_from_file
+
+CACHE_VERSION = 1
+STORE_NAME = 'ignore-specs.json'
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Files modified this recently may still change within the same mtime
+# tick without changing size, so they are not cached (git's "racily
+# clean" problem).
+RACY_SECONDS = 2
+
+# Last-use times are only refreshed this often, so a run that hits the
+# cache for every file does not have to rewrite the store.
+TOUCH_SECONDS = 3600
+
+_MAGIC = 'iwalk-spec-cache'
+
+
+class SpecCache(object):
+    """A persistent cache of parsed ignore files.
+
+    Each ignore file's pattern list is stored under its path together with
+    its size, ``mtime_ns`` and inode. An unchanged file is answered from
+    the cache with a single ``stat()`` instead of being opened and parsed
+    again. The store is one checksummed JSON file in *cache_dir*, loaded
+    on first use and written back by :meth:`save`; a corrupt store is
+    discarded and rebuilt. When the store grows past *max_bytes*, the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.path = os.path.join(cache_dir, STORE_NAME)
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def read_patterns(self, filepath):
+        """Drop-in replacement for :func:`iwalk.patterns.read_patterns_from_file`."""
+        if _is_bytes(filepath):
+            # Bytes walks read bytes patterns. They are stored as latin-1
+            # text, which JSON round-trips exactly, under keys of their own.
+            lines = self._read('b:' + filepath.decode('latin1'), filepath, 'latin1')
+            return [line.encode('latin1') for line in lines]
+        return self._read(filepath, filepath, None)
+
+    def _read(self, name, filepath, encoding):
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return []
+        if not stat.S_ISREG(st.st_mode):
+            return []
+
+        key = [st.st_size, _mtime_ns(st), st.st_ino]
+        entries = self._load()
+        now = time.time()
+        entry = entries.get(name)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            if now - entry[2] > TOUCH_SECONDS:
+                entry[2] = now
+                self._dirty = True
+            return list(entry[1])
+
+        self.misses += 1
+        patterns = read_patterns_from_file(filepath)
+        if encoding is not None:
+            patterns = [line.decode(encoding) for line in patterns]
+        if st.st_mtime < now - RACY_SECONDS:
+            entries[name] = [key, patterns, now]
+            self._dirty = True
+        return patterns
+
+    def save(self):
+        """Writes the store back if anything changed. Failures are ignored;
+        the cache is only an optimization."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._evict()
+            payload = json.dumps({'entries': self._entries}, separators=(',', ':'))
+            try:
+                _write_atomic(self.path, _encode(payload))
+            except (IOError, OSError):
+                return
+            self._dirty = False
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _load(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = _read_store(self.path)
+        return self._entries
+
+    def _evict(self):
+        sizes = dict((path, len(path) + len(json.dumps(entry)) + 8)
+                     for path, entry in self._entries.items())
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._entries, key=lambda path: self._entries[path][2])
+        for path in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= sizes[path]
+            del self._entries[path]
+
+
+def _mtime_ns(st):
+    mtime_ns = getattr(st, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(st.st_mtime * 1000000000)
+    return mtime_ns
+
+
+def _encode(payload):
+    data = payload.encode('utf-8')
+    header = '%s %d %d\n' % (_MAGIC, CACHE_VERSION, zlib.crc32(data) & 0xffffffff)
+    return header.encode('ascii') + data
+
+
+def _read_store(path):
+    # Returns the stored entries, or an empty dict if the store is
+    # missing, from another version, or fails its checksum.
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except (IOError, OSError):
+        return {}
+    header, _, data = raw.partition(b'\n')
+    try:
+        magic, version, checksum = header.decode('ascii').split()
+        if magic != _MAGIC or int(version) != CACHE_VERSION:
+            return {}
+        if zlib.crc32(data) & 0xffffffff != int(checksum):
+            return {}
+        entries = json.loads(data.decode('utf-8'))['entries']
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+    return dict((path, entry) for path, entry in entries.items()
+                if isinstance(entry, list) and len(entry) == 3)
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            # Windows cannot rename over an existing file.
+            os.remove(path)
+            os.rename(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+import shutil
+import stat
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from iwalk.cache import _mtime_ns
+from iwalk.core import IGNORE_FILENAMES, _Walk, _leave_finished, _scan_dir
+from iwalk.parallel import DEFAULT_WORKERS
+
+# Files handed to a copy worker at a time; large directories are split so
+# that the workers stay balanced.
+FILES_PER_JOB = 64
+
+# Jobs waiting for a worker before the walk blocks.
+JOBS_PER_WORKER = 16
+
+# Seconds between checks that the workers are still running while the job
+# queue is full.
+POLL_INTERVAL = 0.1
+
+# Bytes per copy_file_range()/sendfile() call, and the read/write buffer
+# when neither can be used.
+COPY_CHUNK = 8 * 1024 * 1024
+BUFFER_SIZE = 1024 * 1024
+
+# Whether os.utime() can set nanosecond times; otherwise copied times keep
+# microseconds at best.
+_NS_TIMES = sys.version_info >= (3, 3)
+
+# Errors that mean the kernel cannot copy between these two files, in which
+# case the next method is tried.
+_FALLBACK_ERRNOS = set(getattr(errno, name) for name in
+                       ('ENOSYS', 'EXDEV', 'EINVAL', 'ENOTSUP', 'EOPNOTSUPP', 'EBADF', 'EPERM')
+                       if hasattr(errno, name))
+
+
+def copytree(src, dst, ignore_files=IGNORE_FILENAMES, exclude_hidden=False, symlinks=False,
+             update=False, workers=DEFAULT_WORKERS, cache=None):
+    """Copies the files below *src* that :func:`iwalk.iwalk` keeps to *dst*
+    and returns *dst*, like :func:`shutil.copytree`.
+
+    The walk creates the directories of *dst* as it lists those of *src*,
+    and a pool of *workers* threads copies the files meanwhile. Data is
+    copied in the kernel with ``os.copy_file_range()`` or ``os.sendfile()``
+    where available. Permission bits and times are copied as by
+    :func:`shutil.copy2`, extended attributes are not.
+
+    *dst* may already exist; its files are overwritten, and files that are
+    not in *src* are left alone. With *update*, a file whose size and
+    modification time match in *dst* is not copied again. Symbolic links
+    to directories are copied as links, since the walk does not follow
+    them; with *symlinks*, so are links to files.
+
+    Errors do not stop the copy. They are collected and raised at the end
+    as :class:`shutil.Error`, as :func:`shutil.copytree` does. Any other
+    exception in a worker stops the copy and is raised again here.
+    """
+    if workers < 1:
+        raise ValueError("workers:{0!r} must be at least 1.".format(workers))
+    walk = _Walk(src, ignore_files, exclude_hidden, cache)
+    dst = os.path.abspath(_like(dst, walk.is_bytes))
+    if dst == walk.root_dir or dst.startswith(os.path.join(walk.root_dir, walk.slash[:0])):
+        raise ValueError("{0!r} is inside {1!r}".format(dst, walk.root_dir))
+
+    errors = []
+    jobs = queue.Queue(maxsize=workers * JOBS_PER_WORKER)
+    abandoned = []
+    # Unexpected exceptions of the workers, which keep taking jobs so the
+    # walk never blocks on a full queue.
+    failures = []
+
+    def work():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            if abandoned:
+                continue
+            try:
+                _copy_files(job, symlinks, update, errors)
+            except Exception as e:
+                failures.append(e)
+                abandoned.append(True)
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    # (source, destination) of each directory created, whose metadata is
+    # copied once its files are in place.
+    created = []
+    spec_map = {}
+    scope = []
+    stack = [(walk.root_dir, dst)]
+    try:
+        if not os.path.isdir(dst):
+            os.makedirs(dst)
+        created.append((walk.root_dir, dst))
+        while stack and not failures:
+            dirpath, target = stack.pop()
+            _leave_finished(dirpath, scope, spec_map, walk.sep)
+            listing = _scan_dir(dirpath, walk, spec_map)
+            if listing is None:
+                errors.append((dirpath, target, "cannot list directory"))
+                continue
+            if dirpath in spec_map:
+                scope.append(dirpath)
+            dirnames, filenames, links = listing
+
+            # The subdirectories are created together, before any of their
+            # files is queued, so no worker needs to create a parent.
+            for name in reversed(dirnames):
+                source, copy = os.path.join(dirpath, name), os.path.join(target, name)
+                if name in links:
+                    _copy_link(source, copy, errors)
+                elif _make_dir(source, copy, errors):
+                    created.append((source, copy))
+                    stack.append((source, copy))
+
+            for start in range(0, len(filenames), FILES_PER_JOB):
+                job = (dirpath, target, filenames[start:start + FILES_PER_JOB])
+                if not _put(jobs, job, threads):
+                    raise RuntimeError("the copy workers exited")
+    except BaseException:
+        abandoned.append(True)
+        raise
+    finally:
+        try:
+            for _ in threads:
+                if not _put(jobs, None, threads):
+                    break
+            for thread in threads:
+                thread.join()
+        finally:
+            walk.close()
+    if failures:
+        raise failures[0]
+
+    # Copying files into a directory changes its times, so those are set
+    # last, deepest first.
+    for source, copy in reversed(created):
+        try:
+            _copy_meta(copy, os.stat(source))
+        except OSError as e:
+            errors.append((source, copy, str(e)))
+    if errors:
+        raise shutil.Error(errors)
+    return dst
+
+
+def _put(jobs, job, threads):
+    # Queues job, waiting for room while any worker runs. Returns False if
+    # none does, since a bounded queue that no worker takes from stays
+    # full and put() alone would block forever.
+    while True:
+        try:
+            jobs.put(job, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            if not any(thread.is_alive() for thread in threads):
+                return False
+
+
+def _copy_files(job, symlinks, update, errors):
+    dirpath, target, names = job
+    for name in names:
+        source, copy = os.path.join(dirpath, name), os.path.join(target, name)
+        try:
+            st = os.lstat(source)
+            if stat.S_ISLNK(st.st_mode):
+                if symlinks:
+                    _copy_link(source, copy, errors)
+                    continue
+                st = os.stat(source)
+            if update and _unchanged(copy, st):
+                continue
+            _copy_file(source, copy, st)
+        except (IOError, OSError) as e:
+            errors.append((source, copy, str(e)))
+
+
+def _unchanged(copy, st):
+    try:
+        copied = os.stat(copy)
+    except OSError:
+        return False
+    if not stat.S_ISREG(copied.st_mode) or copied.st_size != st.st_size:
+        return False
+    if _NS_TIMES:
+        return _mtime_ns(copied) == _mtime_ns(st)
+    # Float times set through os.utime() may also be a microsecond off.
+    return abs(copied.st_mtime - st.st_mtime) < 1e-5
+
+
+def _copy_file(source, copy, st):
+    with open(source, 'rb') as fsrc:
+        with open(copy, 'wb') as fdst:
+            if not st.st_size or not _kernel_copy(fsrc.fileno(), fdst.fileno(), st.st_size):
+                # Files that report no size, like those of /proc, may still
+                # have contents, so they are read.
+                shutil.copyfileobj(fsrc, fdst, BUFFER_SIZE)
+    _copy_meta(copy, st)
+
+
+def _kernel_copy(infd, outfd, size):
+    # Copies infd, which stat() says holds size bytes, to outfd without
+    # passing the data through user space. Returns False, with nothing
+    # written, if the kernel cannot. Some filesystems answer 0 without
+    # copying anything, so a 0 before any data is not taken as the end.
+    if hasattr(os, 'copy_file_range'):
+        copied = 0
+        try:
+            while True:
+                count = os.copy_file_range(infd, outfd, COPY_CHUNK)
+                if not count:
+                    if copied or not size:
+                        return True
+                    break
+                copied += count
+        except OSError as e:
+            if copied or e.errno not in _FALLBACK_ERRNOS:
+                raise
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        # Linux can sendfile() between regular files. The offset leaves
+        # infd's position alone, so a fallback still starts at zero.
+        offset = 0
+        try:
+            while True:
+                count = os.sendfile(outfd, infd, offset, COPY_CHUNK)
+                if not count:
+                    if offset or not size:
+                        return True
+                    break
+                offset += count
+        except OSError as e:
+            if offset or e.errno not in _FALLBACK_ERRNOS:
+                raise
+    return False
+
+
+def _copy_meta(copy, st):
+    os.chmod(copy, stat.S_IMODE(st.st_mode))
+    if _NS_TIMES and hasattr(st, 'st_mtime_ns'):
+        os.utime(copy, ns=(st.st_atime_ns, st.st_mtime_ns))
+    else:
+        os.utime(copy, (st.st_atime, st.st_mtime))
+
+
+def _make_dir(source, copy, errors):
+    # Creates one directory whose parent exists. Returns False, recording
+    # the error, if it cannot be created.
+    try:
+        os.mkdir(copy)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(copy):
+            errors.append((source, copy, str(e)))
+            return False
+    return True
+
+
+def _copy_link(source, copy, errors):
+    try:
+        target = os.readlink(source)
+        if os.path.lexists(copy):
+            os.remove(copy)
+        os.symlink(target, copy)
+    except (IOError, OSError) as e:
+        errors.append((source, copy, str(e)))
+
+
+def _like(path, is_bytes):
+    # dst in the type of the walk, so joined paths never mix str and bytes.
+    if is_bytes and not isinstance(path, bytes):
+        return os.fsencode(path)
+    if not is_bytes and sys.version_info[0] >= 3 and isinstance(path, bytes):
+        return os.fsdecode(path)
+    return path
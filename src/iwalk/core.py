@@ -1,28 +1,216 @@
 import os
-from iwalk.patterns import load_ignore_specs
+from iwalk.patterns import _is_bytes, load_dir_spec, read_patterns_from_file
+
+try:
+    _scandir = os.scandir
+except AttributeError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
 
 IGNORE_FILENAMES = ['.gitignore', '.dockerignore', '.ignore']
 
-def iwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False):
-    root_dir = os.path.abspath(root_dir)
-    spec_map = load_ignore_specs(root_dir, ignore_files)
-
-    for dirpath, dirnames, filenames in os.walk(root_dir, topdown=True):
-        dirnames[:] = [
-            d for d in dirnames
-            if not is_ignored(os.path.join(dirpath, d), spec_map)
-            and (not exclude_hidden or not d.startswith('.'))
-        ]
-        filtered_files = [
-            f for f in filenames
-            if not is_ignored(os.path.join(dirpath, f), spec_map)
-            and (not exclude_hidden or not f.startswith('.'))
-        ]
-        yield dirpath, dirnames, filtered_files
-
-def is_ignored(path, spec_map):
+_BYTES_SEP = os.sep.encode('ascii')
+
+def iwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False, cache=None,
+          stats=None):
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache, stats)
+    spec_map = {}
+    scope = []
+    stack = [walk.root_dir]
+
+    try:
+        while stack:
+            dirpath = stack.pop()
+            _leave_finished(dirpath, scope, spec_map, walk.sep)
+            listing = _scan_dir(dirpath, walk, spec_map)
+            if listing is None:
+                continue
+            if dirpath in spec_map:
+                scope.append(dirpath)
+            dirnames, filenames, links = listing
+
+            yield dirpath, dirnames, filenames
+
+            for name in reversed(dirnames):
+                if name not in links:
+                    stack.append(os.path.join(dirpath, name))
+    finally:
+        walk.close()
+
+class _Walk(object):
+    # Settings shared by every directory of one walk. cache is a SpecCache
+    # or the path of a cache directory; stats is an optional WalkStats.
+    def __init__(self, root_dir, ignore_files, exclude_hidden, cache=None, stats=None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.is_bytes = _is_bytes(self.root_dir)
+        if self.is_bytes:
+            # A bytes root walks, matches and yields bytes throughout, like
+            # os.walk, so nothing is decoded per entry.
+            ignore_files = [os.fsencode(name) for name in ignore_files]
+        self.ignore_files = ignore_files
+        self.exclude_hidden = exclude_hidden
+        self.hidden_prefix = b'.' if self.is_bytes else '.'
+        self.slash = b'/' if self.is_bytes else '/'
+        self.sep = _BYTES_SEP if self.is_bytes else os.sep
+        if cache is not None and not hasattr(cache, 'read_patterns'):
+            from iwalk.cache import SpecCache
+            cache = SpecCache(cache)
+        self.cache = cache
+        self.reader = cache.read_patterns if cache is not None else None
+        self.stats = stats
+        if stats is not None:
+            self.reader = stats.counting_reader(self.reader or read_patterns_from_file)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.save()
+
+def _leave_finished(dirpath, scope, spec_map, sep):
+    # A depth-first walk never returns to a subtree once it has left it, so
+    # before visiting dirpath the specs of the directories on scope that are
+    # not its ancestors are dropped. scope lists the directories holding a
+    # spec, outermost first, which keeps spec_map bounded by the depth of
+    # the tree rather than its number of ignore files.
+    while scope:
+        parent = scope[-1]
+        if dirpath.startswith(parent if parent.endswith(sep) else parent + sep):
+            return
+        del spec_map[scope.pop()]
+
+def _scan_dir(dirpath, walk, spec_map):
+    # Returns the filtered (dirnames, filenames, symlinked dirnames) of one
+    # directory, or None if it cannot be listed. spec_map must already hold
+    # the specs of every ancestor below the walk's root.
+    if walk.stats is not None:
+        return _scan_dir_timed(dirpath, walk, spec_map)
+    try:
+        entries = _list_dir(dirpath)
+    except OSError:
+        return None
+
+    # Ignore files are only read once the walk reaches a directory, so
+    # pruned subtrees are never visited and results start immediately. The
+    # listing tells which of them exist, so absent ones cost no syscall.
+    spec = load_dir_spec(dirpath, walk.ignore_files, walk.root_dir, walk.reader,
+                         _present_ignore_files(entries, walk))
+    if spec is not None:
+        spec_map[dirpath] = spec
+    return _filter_entries(dirpath, entries, walk, spec_map)
+
+def _scan_dir_timed(dirpath, walk, spec_map):
+    # _scan_dir, recording the counts and the time of each phase.
+    stats = walk.stats
+    start = stats.clock()
+    try:
+        entries = _list_dir(dirpath)
+    except OSError:
+        stats.list_errors += 1
+        return None
+    listed = stats.clock()
+    spec = load_dir_spec(dirpath, walk.ignore_files, walk.root_dir, walk.reader,
+                         _present_ignore_files(entries, walk))
+    if spec is not None:
+        spec_map[dirpath] = spec
+    loaded = stats.clock()
+    result = _filter_entries(dirpath, entries, walk, spec_map)
+    done = stats.clock()
+
+    if _scandir is None:
+        # _list_dir_stat calls isdir() per entry and islink() per directory.
+        stats.stat_calls += len(entries) + sum(1 for entry in entries if entry[2])
+    kept = len(result[0]) + len(result[1])
+    stats.record_dir(dirpath, len(entries), kept, listed - start, loaded - listed, done - loaded)
+    return result
+
+def _filter_entries(dirpath, entries, walk, spec_map):
+    # Splits the entries of one listing into the dirnames, filenames and
+    # symlinked dirnames that survive the ignore rules.
+    if walk.exclude_hidden:
+        hidden_prefix = walk.hidden_prefix
+        entries = [entry for entry in entries if not entry[0].startswith(hidden_prefix)]
+
+    # Every entry of the directory is matched against the same chain of
+    # specs, so each spec takes all remaining names in one call.
+    for spec, prefix in _spec_chain(dirpath, walk, spec_map):
+        if not entries:
+            break
+        if walk.stats is not None:
+            walk.stats.pattern_checks += len(spec.patterns) * len(entries)
+        ignored = spec.match_names(prefix, [entry[0] for entry in entries],
+                                   [entry[2] for entry in entries], walk.slash)
+        entries = [entry for entry, drop in zip(entries, ignored) if not drop]
+
+    dirnames, filenames, links = [], [], set()
+    for name, path, is_dir, is_link in entries:
+        if is_dir:
+            dirnames.append(name)
+            if is_link:
+                links.add(name)
+        else:
+            filenames.append(name)
+    return dirnames, filenames, links
+
+def _spec_chain(dirpath, walk, spec_map):
+    # Returns (spec, prefix) for dirpath and each of its ancestors up to the
+    # walk's root that has a spec, where prefix is the normalized path of
+    # dirpath relative to that ancestor, ending with a slash. Each spec is
+    # cut down to the patterns that can still match below dirpath, and
+    # left out if none can.
+    chain = []
+    prefix = walk.slash[:0]
+    path = dirpath
+    while True:
+        spec = spec_map.get(path)
+        if spec is not None:
+            spec = spec.subspec(prefix)
+            if spec is not None:
+                chain.append((spec, prefix))
+        if path == walk.root_dir:
+            return chain
+        parent, name = os.path.split(path)
+        if not name or parent == path:
+            return chain
+        prefix = name + walk.slash + prefix
+        path = parent
+
+def _list_dir(dirpath):
+    # Returns (name, path, is_dir, is_link) for each entry of dirpath.
+    # DirEntry caches the file type from the directory listing, so no
+    # stat() is needed to tell files from directories.
+    if _scandir is None:
+        return _list_dir_stat(dirpath)
+    entries = []
+    for entry in _scandir(dirpath):
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        entries.append((entry.name, entry.path, is_dir, is_dir and entry.is_symlink()))
+    return entries
+
+def _present_ignore_files(entries, walk):
+    # The ignore files among the _list_dir entries of a directory.
+    ignore_files = walk.ignore_files
+    return [entry[0] for entry in entries if entry[0] in ignore_files and not entry[2]]
+
+def _list_dir_stat(dirpath):
+    entries = []
+    for name in os.listdir(dirpath):
+        path = os.path.join(dirpath, name)
+        is_dir = os.path.isdir(path)
+        entries.append((name, path, is_dir, is_dir and os.path.islink(path)))
+    return entries
+
+def is_ignored(path, spec_map, is_dir=None):
     abs_path = os.path.abspath(path)
-    is_dir = os.path.isdir(abs_path)
+    if is_dir is None:
+        is_dir = os.path.isdir(abs_path)
+    return _is_ignored(abs_path, is_dir, spec_map)
+
+def _is_ignored(abs_path, is_dir, spec_map):
+    sep = _BYTES_SEP if _is_bytes(abs_path) else os.sep
     for ancestor in [abs_path] + get_ancestor_paths(abs_path):
         if ancestor in spec_map:
             rel_path = os.path.relpath(abs_path, ancestor)
@@ -30,7 +218,7 @@ def is_ignored(path, spec_map):
             if spec_map[ancestor].match_file(rel_path):
                 return True
             # For directories, also try matching with a trailing slash.
-            if is_dir and spec_map[ancestor].match_file(rel_path + os.sep):
+            if is_dir and spec_map[ancestor].match_file(rel_path + sep):
                 return True
     return False
 
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import re
+import stat
+import threading
+from collections import OrderedDict
+
+# git refuses deeper include chains, which also stops include cycles.
+MAX_INCLUDE_DEPTH = 10
+
+# Configs memoized by load_config(), one per set of files; the least
+# recently used is dropped beyond this many.
+CONFIG_CACHE_SIZE = 64
+
+_SECTION = re.compile(r'\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\](.*)$')
+_KEY = re.compile(r'\s*([A-Za-z][A-Za-z0-9-]*)\s*(=?)(.*)$')
+_ESCAPES = {'n': '\n', 't': '\t', 'b': '\b', '"': '"', '\\': '\\'}
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+class GitConfig(object):
+    """The merged settings of a set of git config files.
+
+    Keys are ``section.name`` or ``section.subsection.name``; section and
+    name are case-insensitive, as in git. Later values override earlier
+    ones. :attr:`files` records the stat key of every file consulted,
+    including missing ones, so :meth:`is_current` can tell whether a
+    memoized config is still valid.
+    """
+
+    def __init__(self, entries, files):
+        self.entries = entries
+        self.files = files
+
+    def get(self, key, default=None):
+        values = self.get_all(key)
+        return values[-1] if values else default
+
+    def get_all(self, key):
+        key = _normalize_key(key)
+        return [value for name, value in self.entries if name == key]
+
+    def is_current(self):
+        for path, key in self.files.items():
+            if stat_key(path) != key:
+                return False
+        return True
+
+
+def config_paths(repo_dir=None):
+    """Returns the config files git reads, lowest priority first."""
+    paths = []
+    if not os.environ.get('GIT_CONFIG_NOSYSTEM'):
+        paths.append(os.environ.get('GIT_CONFIG_SYSTEM', '/etc/gitconfig'))
+    if 'GIT_CONFIG_GLOBAL' in os.environ:
+        paths.append(os.environ['GIT_CONFIG_GLOBAL'])
+    else:
+        paths.append(os.path.join(xdg_config_home(), 'git', 'config'))
+        paths.append(os.path.expanduser(os.path.join('~', '.gitconfig')))
+    gitdir = find_git_dir(repo_dir) if repo_dir is not None else None
+    if gitdir is not None:
+        paths.append(os.path.join(gitdir, 'config'))
+    return paths
+
+
+def load_config(repo_dir=None):
+    """Reads and merges the config files of :func:`config_paths`, following
+    ``include.path`` and ``includeIf "gitdir:..."`` sections.
+
+    The result is memoized per process, for the :data:`CONFIG_CACHE_SIZE`
+    most recently used sets of files, and read again only when one of the
+    files it was built from is created, deleted or modified.
+    """
+    paths = config_paths(repo_dir)
+    gitdir = find_git_dir(repo_dir) if repo_dir is not None else None
+    memo_key = (tuple(paths), gitdir)
+    with _memo_lock:
+        config = _memo.pop(memo_key, None)
+        if config is not None:
+            _memo[memo_key] = config
+    if config is not None and config.is_current():
+        return config
+
+    entries, files = [], {}
+    for path in paths:
+        _read_file(path, entries, files, gitdir, 0)
+    config = GitConfig(entries, files)
+    with _memo_lock:
+        _memo.pop(memo_key, None)
+        _memo[memo_key] = config
+        while len(_memo) > CONFIG_CACHE_SIZE:
+            _memo.popitem(last=False)
+    return config
+
+
+def xdg_config_home():
+    return os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser(os.path.join('~', '.config'))
+
+
+def default_excludes_path():
+    """The ignore file git uses when ``core.excludesFile`` is not set."""
+    return os.path.join(xdg_config_home(), 'git', 'ignore')
+
+
+def stat_key(path):
+    """Returns ``(size, mtime, inode)`` of *path*, or None if it does not
+    exist; a file whose key is unchanged is assumed unchanged."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, getattr(st, 'st_mtime_ns', st.st_mtime), st.st_ino)
+
+
+def find_git_dir(repo_dir):
+    """Returns the git directory of the repository rooted at *repo_dir*,
+    following the ``gitdir:`` file of worktrees and submodules, or None."""
+    dotgit = os.path.join(repo_dir, '.git')
+    try:
+        if stat.S_ISDIR(os.stat(dotgit).st_mode):
+            return os.path.abspath(dotgit)
+    except OSError:
+        return None
+    try:
+        with io.open(dotgit, 'r', encoding='utf-8') as f:
+            line = f.readline().strip()
+    except (IOError, OSError, UnicodeError):
+        return None
+    if not line.startswith('gitdir:'):
+        return None
+    return os.path.normpath(os.path.join(repo_dir, line[len('gitdir:'):].strip()))
+
+
+def parse_config(text):
+    """Yields the ``(key, value)`` pairs of config *text* in order. A key
+    without ``=`` is a boolean true and has the value None. Lines that
+    cannot be parsed are skipped."""
+    section = None
+    lines = iter(text.splitlines())
+    for line in lines:
+        match = _SECTION.match(line)
+        if match is not None:
+            name, subsection, line = match.groups()
+            if subsection is not None:
+                section = name.lower() + '.' + re.sub(r'\\(.)', r'\1', subsection)
+            elif '.' in name:
+                # Deprecated [section.subsection] syntax.
+                head, _, tail = name.partition('.')
+                section = head.lower() + '.' + tail.lower()
+            else:
+                section = name.lower()
+        stripped = line.strip()
+        if not stripped or stripped[0] in '#;' or section is None:
+            continue
+        match = _KEY.match(line)
+        if match is None:
+            continue
+        name, equals, rest = match.groups()
+        if not equals:
+            if rest.strip() and rest.strip()[0] not in '#;':
+                continue
+            yield section + '.' + name.lower(), None
+            continue
+        yield section + '.' + name.lower(), _parse_value(rest, lines)
+
+
+def _parse_value(rest, lines):
+    # Mirrors git's parse_value(): unquoted whitespace runs inside a value
+    # become spaces, trailing ones are dropped, and a backslash at the end
+    # of a line continues the value on the next.
+    value = []
+    space = 0
+    quoted = False
+    i = 0
+    while i < len(rest):
+        c = rest[i]
+        i += 1
+        if not quoted:
+            if c in ' \t':
+                if value:
+                    space += 1
+                continue
+            if c in '#;':
+                break
+        if space:
+            value.append(' ' * space)
+            space = 0
+        if c == '\\':
+            if i >= len(rest):
+                rest, i = next(lines, ''), 0
+                continue
+            c = rest[i]
+            i += 1
+            value.append(_ESCAPES.get(c, c))
+        elif c == '"':
+            quoted = not quoted
+        else:
+            value.append(c)
+    return ''.join(value)
+
+
+def _read_file(path, entries, files, gitdir, depth):
+    files[path] = stat_key(path)
+    if depth > MAX_INCLUDE_DEPTH or files[path] is None:
+        return
+    try:
+        with io.open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    except (IOError, OSError):
+        return
+
+    base = os.path.dirname(path)
+    for key, value in parse_config(text):
+        entries.append((key, value))
+        if value is None or not key.endswith('.path'):
+            continue
+        section = key[:-len('.path')]
+        if section != 'include':
+            if not section.startswith('includeif.'):
+                continue
+            if not _include_applies(section[len('includeif.'):], base, gitdir):
+                continue
+        include = os.path.expanduser(value)
+        if not os.path.isabs(include):
+            include = os.path.join(base, include)
+        _read_file(include, entries, files, gitdir, depth + 1)
+
+
+def _include_applies(condition, base, gitdir):
+    # Only the gitdir conditions are supported; onbranch and others never
+    # apply since no branch is known here.
+    kind, _, pattern = condition.partition(':')
+    if kind not in ('gitdir', 'gitdir/i') or gitdir is None:
+        return False
+    if pattern.startswith('~/'):
+        pattern = os.path.expanduser(pattern)
+    elif pattern.startswith('./'):
+        pattern = os.path.join(base, pattern[2:])
+    elif not os.path.isabs(pattern):
+        pattern = '**/' + pattern
+    if pattern.endswith('/'):
+        pattern += '**'
+    flags = re.IGNORECASE if kind == 'gitdir/i' else 0
+    path = gitdir.replace(os.sep, '/')
+    return re.match(_glob_to_regex(pattern.replace(os.sep, '/')), path, flags) is not None
+
+
+def _glob_to_regex(pattern):
+    parts = []
+    for token in re.split(r'(\*\*/|/\*\*|\*\*|\*|\?)', pattern):
+        if token == '**/':
+            parts.append('(?:.*/)?')
+        elif token == '/**':
+            parts.append('(?:/.*)?')
+        elif token == '**':
+            parts.append('.*')
+        elif token == '*':
+            parts.append('[^/]*')
+        elif token == '?':
+            parts.append('[^/]')
+        else:
+            parts.append(re.escape(token))
+    return ''.join(parts) + '$'
+
+
+def _normalize_key(key):
+    # Section and name are case-insensitive, a subsection is not.
+    section, _, name = key.rpartition('.')
+    head, dot, subsection = section.partition('.')
+    return head.lower() + dot + subsection + '.' + name.lower()
+
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+import mmap
+import os
+import stat
+import struct
+import sys
+
+from iwalk.core import (IGNORE_FILENAMES, _Walk, _filter_entries, _leave_finished, _list_dir,
+                        _present_ignore_files)
+from iwalk.gitconfig import find_git_dir, load_config
+from iwalk.patterns import load_dir_spec
+
+INDEX_VERSIONS = (2, 3, 4)
+
+# Size of an object id under each of git's object formats.
+HASH_SIZES = {'sha1': 20, 'sha256': 32}
+
+_SIGNATURE = b'DIRC'
+# signature, version, number of entries.
+_HEADER = struct.Struct('>4sII')
+# ctime, mtime, dev and ino precede the mode, and uid, gid and size the
+# object id, which the flags follow.
+_MODE = struct.Struct('>I')
+_MODE_OFFSET = 24
+_OID_OFFSET = 40
+_FLAGS = struct.Struct('>H')
+_BYTE = struct.Struct('B')
+
+_NAME_MASK = 0xfff
+_EXTENDED = 0x4000
+
+_GITLINK = 0o160000
+
+
+def read_index(path, object_format='sha1'):
+    """Returns ``(name, mode)`` for each path recorded in the git index at
+    *path*, in index order. Names are bytes relative to the top of the
+    work tree, with ``/`` separators; a path with merge conflicts appears
+    once.
+
+    Index versions 2 to 4 are read from a memory mapping, without running
+    git. *object_format* is the repository's ``extensions.objectFormat``,
+    which sizes the object ids. A split or sparse index raises
+    :class:`ValueError`, as do an unknown object format and a file that is
+    not an index.
+    """
+    hash_size = HASH_SIZES.get(object_format.lower())
+    if hash_size is None:
+        raise ValueError("object format {0!r} is not supported".format(object_format))
+    with open(path, 'rb') as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("{0!r} is not a git index".format(path))
+    try:
+        return _parse_index(mapping, path, hash_size)
+    except struct.error:
+        raise ValueError("{0!r} is truncated".format(path))
+    finally:
+        mapping.close()
+
+
+def git_iwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False, untracked=True,
+              cache=None):
+    """Walks the git work tree at *root_dir* like :func:`iwalk.iwalk`,
+    taking the tracked files from the index instead of the ignore rules.
+
+    Each directory yields the tracked files and directories first, in index
+    order, then the untracked entries that the ignore rules keep. The
+    result matches ``git ls-files --cached --others --exclude-standard``:
+    tracked files are never ignored, a tracked file that was deleted from
+    the work tree is still yielded, and ``.git`` is left out. Submodules
+    appear in dirnames but are not walked into.
+
+    Only untracked names are matched against the ignore rules, and
+    directories that are ignored are not listed, even if they hold tracked
+    files. With *untracked* False nothing is listed at all. Without an
+    index that :func:`read_index` can read, such as a split index, this is
+    the same walk as :func:`iwalk.iwalk`.
+    """
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    tree = _index_tree(walk)
+    spec_map = {}
+    scope = []
+    # (dirpath, tree key, whether to list it); the key is None below the
+    # tracked directories.
+    stack = [(walk.root_dir, walk.slash[:0], untracked)]
+
+    try:
+        while stack:
+            dirpath, key, listed = stack.pop()
+            _leave_finished(dirpath, scope, spec_map, walk.sep)
+            listing = _scan_git_dir(dirpath, tree.get(key) if key is not None else None,
+                                    listed, walk, spec_map)
+            if listing is None:
+                continue
+            if dirpath in spec_map:
+                scope.append(dirpath)
+            dirnames, filenames, skipped, unlisted = listing
+
+            yield dirpath, dirnames, filenames
+
+            for name in reversed(dirnames):
+                if name in skipped:
+                    continue
+                child_key = None
+                if key is not None and tree.get(key + name + walk.slash) is not None:
+                    child_key = key + name + walk.slash
+                stack.append((os.path.join(dirpath, name), child_key,
+                              listed and name not in unlisted))
+    finally:
+        walk.close()
+
+
+def _scan_git_dir(dirpath, node, listed, walk, spec_map):
+    # Returns (dirnames, filenames, names not to walk into, tracked
+    # dirnames not to list) for one directory, or None if it is untracked
+    # and cannot be listed.
+    if node is None:
+        files, dirs, gitlinks = [], [], []
+    else:
+        files, dirs, gitlinks = node
+        if walk.exclude_hidden:
+            hidden_prefix = walk.hidden_prefix
+            files = [name for name in files if not name.startswith(hidden_prefix)]
+            dirs = [name for name in dirs if not name.startswith(hidden_prefix)]
+            gitlinks = [name for name in gitlinks if not name.startswith(hidden_prefix)]
+    dirnames = dirs + gitlinks
+    skipped = set(gitlinks)
+    if not listed:
+        return dirnames, files, skipped, set()
+
+    try:
+        entries = _list_dir(dirpath)
+    except OSError:
+        if node is None:
+            return None
+        # Tracked files are yielded even when their directory is gone.
+        entries = []
+    spec = load_dir_spec(dirpath, walk.ignore_files, walk.root_dir, walk.reader,
+                         _present_ignore_files(entries, walk))
+    if spec is not None:
+        spec_map[dirpath] = spec
+
+    # Tracked files are never matched. Tracked directories are, in the same
+    # pass as the untracked entries, since the untracked files below an
+    # ignored one are ignored as well.
+    tracked = set(files)
+    tracked.update(dirnames)
+    tracked.add(b'.git' if walk.is_bytes else '.git')
+    candidates = [entry for entry in entries if entry[0] not in tracked]
+    candidates.extend((name, os.path.join(dirpath, name), True, False) for name in dirs)
+    kept_dirs, new_files, links = _filter_entries(dirpath, candidates, walk, spec_map)
+    tracked_dirs = set(dirs)
+    new_dirs = [name for name in kept_dirs if name not in tracked_dirs]
+    skipped.update(links)
+    unlisted = tracked_dirs.difference(kept_dirs)
+    return dirnames + new_dirs, files + new_files, skipped, unlisted
+
+
+def _index_tree(walk):
+    # Returns {directory key: (files, dirs, gitlinks)} for the tracked
+    # paths, where the key of a directory is its path relative to the root
+    # ending with a slash, and that of the root is empty. Without an index
+    # that can be read only the root is there, and the walk lists
+    # everything.
+    empty = walk.slash[:0]
+    tree = {empty: ([], [], [])}
+    root_dir = os.fsdecode(walk.root_dir) if walk.is_bytes else walk.root_dir
+    git_dir = find_git_dir(root_dir)
+    if git_dir is None:
+        return tree
+    object_format = load_config(root_dir).get('extensions.objectFormat') or 'sha1'
+    try:
+        entries = read_index(os.path.join(git_dir, 'index'), object_format)
+    except (IOError, OSError, ValueError):
+        return tree
+
+    decode = _decoder(walk.is_bytes)
+    slash = walk.slash
+    for name, mode in entries:
+        name = decode(name)
+        parent, _, base = name.rpartition(slash)
+        key = parent + slash if parent else empty
+        node = tree.get(key)
+        if node is None:
+            node = tree[key] = ([], [], [])
+            # Register the directory with each new ancestor in turn.
+            child = key
+            while True:
+                parent, _, base_dir = child[:-1].rpartition(slash)
+                parent = parent + slash if parent else empty
+                ancestor = tree.get(parent)
+                if ancestor is not None:
+                    ancestor[1].append(base_dir)
+                    break
+                tree[parent] = ([], [base_dir], [])
+                child = parent
+        if mode & 0o170000 == _GITLINK:
+            node[2].append(base)
+        else:
+            node[0].append(base)
+    return tree
+
+
+def _decoder(is_bytes):
+    if is_bytes or sys.version_info[0] < 3:
+        return lambda name: name
+    return os.fsdecode
+
+
+def _parse_index(data, path, hash_size):
+    if len(data) < _HEADER.size:
+        raise ValueError("{0!r} is not a git index".format(path))
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != _SIGNATURE:
+        raise ValueError("{0!r} is not a git index".format(path))
+    if version not in INDEX_VERSIONS:
+        raise ValueError("{0!r} is a version {1} git index; versions {2} are supported".format(
+            path, version, ', '.join(str(v) for v in INDEX_VERSIONS)))
+
+    flags_offset = _OID_OFFSET + hash_size
+    fixed = flags_offset + _FLAGS.size
+    entries = []
+    previous = b''
+    offset = _HEADER.size
+    end = len(data)
+    for _ in range(count):
+        if offset + fixed > end:
+            raise ValueError("{0!r} is truncated".format(path))
+        mode = _MODE.unpack_from(data, offset + _MODE_OFFSET)[0]
+        flags = _FLAGS.unpack_from(data, offset + flags_offset)[0]
+        start = offset + fixed
+        if flags & _EXTENDED and version >= 3:
+            start += 2
+
+        if version == 4:
+            # The name drops a varint number of bytes from the end of the
+            # previous name and appends a NUL-terminated suffix.
+            strip, start = _read_varint(data, start)
+            stop = data.find(b'\0', start)
+            if stop < 0 or strip > len(previous):
+                raise ValueError("{0!r} is truncated".format(path))
+            name = previous[:len(previous) - strip] + data[start:stop]
+            offset = stop + 1
+        else:
+            length = flags & _NAME_MASK
+            if length == _NAME_MASK:
+                stop = data.find(b'\0', start)
+                if stop < 0:
+                    raise ValueError("{0!r} is truncated".format(path))
+            else:
+                stop = start + length
+            name = data[start:stop]
+            # Entries are padded with 1 to 8 NULs to a multiple of 8 bytes.
+            offset += (stop - offset + 8) & ~7
+
+        if stat.S_ISDIR(mode):
+            raise ValueError("{0!r} is a sparse index, which is not supported".format(path))
+        # The stages of a conflicted path are adjacent; keep the first.
+        if name != previous:
+            entries.append((name, mode))
+        previous = name
+
+    if _has_extension(data, offset, b'link', hash_size):
+        raise ValueError("{0!r} is a split index, which is not supported".format(path))
+    return entries
+
+
+def _read_varint(data, offset):
+    # git's offset varint: each continuation byte adds one before shifting,
+    # so every value has a single encoding.
+    byte = _BYTE.unpack_from(data, offset)[0]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = _BYTE.unpack_from(data, offset)[0]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+
+def _has_extension(data, offset, signature, hash_size):
+    # Extensions follow the entries as a 4-byte signature and a 32-bit
+    # size; the index ends with a checksum of hash_size bytes.
+    while offset + 8 <= len(data) - hash_size:
+        ext_signature, size = struct.unpack_from('>4sI', data, offset)
+        if ext_signature == signature:
+            return True
+        offset += 8 + size
+    return False
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import stat
+
+from iwalk.core import (IGNORE_FILENAMES, _Walk, _filter_entries, _leave_finished, _list_dir,
+                        _present_ignore_files)
+from iwalk.patterns import load_dir_spec
+from iwalk.vendor.pathspec.compat import unicode
+
+# A "**" component: any number of directories, including none.
+_ANY_DIRS = None
+
+_MAGIC = re.compile(r'[*?[]')
+
+
+def iglob(root_dir, patterns, ignore_files=IGNORE_FILENAMES, exclude_hidden=False,
+          cache=None):
+    """Yields the paths of the files below *root_dir* that match any of the
+    glob *patterns* and are not ignored, in :func:`iwalk.iwalk` order.
+
+    Patterns are relative to *root_dir* and use ``/``: ``*``, ``?`` and
+    ``[...]`` match within one path component, ``**`` matches any number
+    of directories. Unlike :mod:`glob`, ``*`` also matches names starting
+    with a dot; use *exclude_hidden* to leave those out.
+
+    Only directories that a pattern can still match below are visited, and
+    a directory where every pattern continues with a literal name, like
+    ``src`` in ``src/**/*.proto``, is not listed at all: those names are
+    looked up directly. Ignore rules prune as in :func:`iwalk.iwalk`.
+    """
+    if isinstance(patterns, (bytes, unicode)):
+        patterns = [patterns]
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    globs = [_compile_glob(pattern, walk.is_bytes) for pattern in patterns]
+    spec_map = {}
+    start = _closure(globs, [(g, 0) for g in range(len(globs)) if globs[g]])
+    scope = []
+    stack = [(walk.root_dir, start)]
+    try:
+        while stack:
+            dirpath, states = stack.pop()
+            _leave_finished(dirpath, scope, spec_map, walk.sep)
+            listing = _scan_glob_dir(dirpath, states, globs, walk, spec_map)
+            if listing is None:
+                continue
+            if dirpath in spec_map:
+                scope.append(dirpath)
+            dirnames, filenames, links = listing
+
+            for name in filenames:
+                if _matches_file(globs, states, name):
+                    yield os.path.join(dirpath, name)
+
+            for name in reversed(dirnames):
+                if name in links:
+                    continue
+                child = _advance(globs, states, name)
+                if child:
+                    stack.append((os.path.join(dirpath, name), child))
+    finally:
+        walk.close()
+
+
+def glob(root_dir, patterns, ignore_files=IGNORE_FILENAMES, exclude_hidden=False,
+         cache=None):
+    """Returns the sorted list of paths :func:`iglob` yields."""
+    return sorted(iglob(root_dir, patterns, ignore_files, exclude_hidden, cache))
+
+
+def _scan_glob_dir(dirpath, states, globs, walk, spec_map):
+    # Like core._scan_dir, but when every live glob position is a literal
+    # name only those names are looked up instead of listing dirpath.
+    literals = _literal_names(globs, states)
+    present = None
+    if literals is None:
+        try:
+            entries = _list_dir(dirpath)
+        except OSError:
+            return None
+        present = _present_ignore_files(entries, walk)
+    else:
+        entries = []
+        for name in sorted(literals):
+            entry = _lookup(dirpath, name)
+            if entry is not None:
+                entries.append(entry)
+
+    spec = load_dir_spec(dirpath, walk.ignore_files, walk.root_dir, walk.reader, present)
+    if spec is not None:
+        spec_map[dirpath] = spec
+    return _filter_entries(dirpath, entries, walk, spec_map)
+
+
+def _lookup(dirpath, name):
+    # Returns the _list_dir entry of dirpath/name, or None if it does not
+    # exist.
+    path = os.path.join(dirpath, name)
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    is_link = stat.S_ISLNK(st.st_mode)
+    if is_link:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return (name, path, False, False)
+    is_dir = stat.S_ISDIR(st.st_mode)
+    return (name, path, is_dir, is_dir and is_link)
+
+
+def _compile_glob(pattern, is_bytes):
+    # Returns the components of pattern: _ANY_DIRS for "**", a plain name
+    # for a literal component and a compiled regex otherwise. In a bytes
+    # walk names and regexes are bytes.
+    if isinstance(pattern, bytes) and not isinstance(pattern, str):
+        pattern = os.fsdecode(pattern)
+    pattern = pattern.replace(os.sep, '/')
+    components = []
+    for part in pattern.split('/'):
+        if not part or part == '.':
+            continue
+        if part == '**':
+            if components and components[-1] is _ANY_DIRS:
+                continue
+            components.append(_ANY_DIRS)
+        elif _MAGIC.search(part) is None:
+            components.append(os.fsencode(part) if is_bytes else part)
+        else:
+            regex = _translate(part)
+            components.append(re.compile(os.fsencode(regex) if is_bytes else regex))
+    return components
+
+
+def _translate(component):
+    # fnmatch.translate() for one path component; its output format varies
+    # between Python versions, so the regex is built here.
+    i, n = 0, len(component)
+    parts = []
+    while i < n:
+        c = component[i]
+        i += 1
+        if c == '*':
+            parts.append('.*')
+        elif c == '?':
+            parts.append('.')
+        elif c == '[':
+            j = i
+            if j < n and component[j] in '!^':
+                j += 1
+            if j < n and component[j] == ']':
+                j += 1
+            j = component.find(']', j)
+            if j < 0:
+                parts.append('\\[')
+                continue
+            chars = component[i:j].replace('\\', '\\\\')
+            i = j + 1
+            if chars[:1] in ('!', '^'):
+                chars = '^' + chars[1:]
+            parts.append('[' + chars + ']')
+        else:
+            parts.append(re.escape(c))
+    return '(?s)' + ''.join(parts) + r'\Z'
+
+
+def _closure(globs, states):
+    # Adds the positions reachable by letting a "**" match no directories.
+    result = set()
+    for g, i in states:
+        while True:
+            result.add((g, i))
+            if i < len(globs[g]) and globs[g][i] is _ANY_DIRS:
+                i += 1
+            else:
+                break
+    return frozenset(result)
+
+
+def _advance(globs, states, name):
+    # Returns the positions after descending into the directory name.
+    moved = []
+    for g, i in states:
+        components = globs[g]
+        if i >= len(components) - 1 and not (i < len(components) and components[i] is _ANY_DIRS):
+            # Nothing below a directory matching the last component is
+            # wanted, since only files are yielded.
+            continue
+        component = components[i]
+        if component is _ANY_DIRS:
+            moved.append((g, i))
+        elif _match(component, name):
+            moved.append((g, i + 1))
+    return _closure(globs, moved) if moved else None
+
+
+def _matches_file(globs, states, name):
+    for g, i in states:
+        components = globs[g]
+        if i == len(components) - 1:
+            component = components[i]
+            if component is _ANY_DIRS or _match(component, name):
+                return True
+    return False
+
+
+def _literal_names(globs, states):
+    # Returns the names every live position needs, or None if some position
+    # is a wildcard or "**" that requires listing the directory.
+    names = set()
+    for g, i in states:
+        if i >= len(globs[g]):
+            continue
+        component = globs[g][i]
+        if component is _ANY_DIRS or hasattr(component, 'match'):
+            return None
+        names.add(component)
+    return names
+
+
+def _match(component, name):
+    if hasattr(component, 'match'):
+        return component.match(name) is not None
+    return component == name
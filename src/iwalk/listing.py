@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import os
+
+from iwalk.core import IGNORE_FILENAMES, _Walk, _filter_entries, _list_dir, _scandir
+from iwalk.gitconfig import stat_key
+from iwalk.patterns import (GlobalIgnoreLoadError, _LRUCache, _is_bytes, compile_spec,
+                            load_dir_patterns, load_global_patterns)
+
+# Directories whose own spec is kept between calls.
+DIR_SPEC_CACHE_SIZE = 4096
+
+# dirpath, ignore files, is the walk root -> (stamp, spec)
+_dir_specs = _LRUCache(DIR_SPEC_CACHE_SIZE)
+
+
+def listdir(path='.', ignore_files=IGNORE_FILENAMES, exclude_hidden=False, root_dir=None):
+    """Returns the names in directory *path* that :func:`iwalk.iwalk`
+    would keep, in the order :func:`os.listdir` gives them.
+
+    The ignore rules are those of :func:`find_scope`: only the ignore files
+    of *path* and its ancestors up to the root are read, so the cost grows
+    with the depth of *path*, not the size of the tree. Everything in a
+    directory that is itself ignored, or hidden with *exclude_hidden*, is
+    ignored too, so the result is empty.
+    """
+    return [entry[0] for entry in _kept_entries(path, ignore_files, exclude_hidden, root_dir)]
+
+
+def scandir(path='.', ignore_files=IGNORE_FILENAMES, exclude_hidden=False, root_dir=None):
+    """Like :func:`listdir`, but returns a list of :func:`os.scandir`
+    entries."""
+    return [entry[4] for entry in _kept_entries(path, ignore_files, exclude_hidden, root_dir)]
+
+
+def find_repo_root(path):
+    """Returns the closest directory at or above *path* that contains a
+    ``.git`` directory or file, or None."""
+    path = os.path.abspath(path)
+    dotgit = b'.git' if _is_bytes(path) else '.git'
+    while True:
+        try:
+            os.lstat(os.path.join(path, dotgit))
+            return path
+        except OSError:
+            pass
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def find_scope(path, root_dir=None):
+    """Returns the root whose ignore rules apply to directory *path*:
+    *root_dir* if given, otherwise the repository root found by
+    :func:`find_repo_root`, or *path* itself outside any repository."""
+    path = os.path.abspath(path)
+    if root_dir is None:
+        root_dir = find_repo_root(path) or path
+    root_dir = os.path.abspath(root_dir)
+    if path != root_dir and not path.startswith(os.path.join(root_dir, path[:0])):
+        raise ValueError("{0!r} is not below {1!r}".format(path, root_dir))
+    return root_dir
+
+
+def clear_dir_specs():
+    """Empties the cache of per-directory specs."""
+    _dir_specs.clear()
+
+
+def _kept_entries(path, ignore_files, exclude_hidden, root_dir):
+    # Returns (name, path, is_dir, is_link, entry) for each kept entry of path.
+    path = os.path.abspath(path)
+    walk = _Walk(find_scope(path, root_dir), ignore_files, exclude_hidden)
+    spec_map = {}
+
+    # Load the specs from the root down, checking at each step that the
+    # next directory on the way is not ignored itself.
+    dirpath = walk.root_dir
+    names = path[len(dirpath):].split(walk.sep) if path != dirpath else []
+    for name in [name for name in names if name] + [None]:
+        spec = _dir_spec(dirpath, walk)
+        if spec is not None:
+            spec_map[dirpath] = spec
+        if name is None:
+            break
+        child = os.path.join(dirpath, name)
+        dirnames, _, _ = _filter_entries(dirpath, [(name, child, True, False)], walk, spec_map)
+        if not dirnames:
+            return []
+        dirpath = child
+
+    entries = _list_entries(path)
+    dirnames, filenames, _ = _filter_entries(path, [entry[:4] for entry in entries], walk,
+                                             spec_map)
+    kept = set(dirnames)
+    kept.update(filenames)
+    return [entry for entry in entries if entry[0] in kept]
+
+
+def _dir_spec(dirpath, walk):
+    # Returns the spec of dirpath's own ignore rules, reusing the cached one
+    # while the stat keys of its ignore files are unchanged.
+    is_root = dirpath == walk.root_dir
+    paths = [os.path.join(dirpath, name) for name in walk.ignore_files]
+    stamp = [stat_key(p) for p in paths]
+    # The stat keys already tell which ignore files exist.
+    present = [name for name, key in zip(walk.ignore_files, stamp) if key is not None]
+    if is_root:
+        # The root also carries the repository's exclude file and the
+        # global excludes, which load_global_patterns() memoizes.
+        parts = ['.git', 'info', 'exclude']
+        if walk.is_bytes:
+            parts = [part.encode('ascii') for part in parts]
+        stamp.append(stat_key(os.path.join(dirpath, *parts)))
+        stamp.append(_global_stamp(dirpath, walk.is_bytes))
+    key = (dirpath, tuple(walk.ignore_files), is_root)
+    cached = _dir_specs.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    spec = compile_spec(load_dir_patterns(dirpath, walk.ignore_files, walk.root_dir, None, present))
+    _dir_specs.put(key, (stamp, spec))
+    return spec
+
+
+def _global_stamp(root_dir, is_bytes):
+    try:
+        return tuple(load_global_patterns(os.fsdecode(root_dir) if is_bytes else root_dir))
+    except GlobalIgnoreLoadError:
+        return ()
+
+
+def _list_entries(path):
+    # _list_dir entries with the os.scandir entry appended.
+    if _scandir is None:
+        return [entry + (_Entry(*entry),) for entry in _list_dir(path)]
+    entries = []
+    for entry in _scandir(path):
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        entries.append((entry.name, entry.path, is_dir, is_dir and entry.is_symlink(), entry))
+    return entries
+
+
+class _Entry(object):
+    """The subset of :class:`os.DirEntry` used where scandir is missing."""
+
+    def __init__(self, name, path, is_dir, is_link):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+
+    def is_dir(self, follow_symlinks=True):
+        return self._is_dir
+
+    def is_file(self, follow_symlinks=True):
+        return not self._is_dir and os.path.isfile(self.path)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+    def stat(self, follow_symlinks=True):
+        return os.stat(self.path) if follow_symlinks else os.lstat(self.path)
+
+    def __repr__(self):
+        return '<_Entry {0!r}>'.format(self.name)
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+import re
+
+from iwalk.vendor.pathspec import PathSpec, util
+from iwalk.vendor.pathspec.compat import unicode
+
+# Python 2.7 refuses to compile a regex with more than 100 groups, so the
+# combined alternation is split into blocks that stay under that limit.
+MAX_GROUPS = 99
+
+# Pieces of the regexes GitWildMatchPattern generates for plain patterns.
+_ANY_PREFIX = '^(?:.+/)?'
+_STAR = '[^/]*'
+_ANY_SUFFIX = '(?:/.*)?$'
+_DIR_SUFFIX = '/.*$'
+_END = '$'
+_DOUBLE_STAR = '(?:/.+)?'
+_REGEX_SPECIALS = frozenset('.^$*+?{}[]|()')
+# An escaped letter or digit is a class or a reference, not a literal. Any
+# other escaped character is, such as the '_' Python 2's re.escape() escapes.
+_ASCII_ALNUM = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+
+# How a literal must line up with the path components to match.
+ANY, LAST, DIR = 0, 1, 2
+
+# Marks a memoized subspec that has not been built yet.
+_UNKNOWN = object()
+
+
+class CompiledPathSpec(PathSpec):
+    """A :class:`PathSpec` that answers plain patterns from hash tables and
+    merges the remaining globs into a few alternation regexes.
+
+    Patterns such as ``*.pyc``, ``__pycache__/``, ``node_modules`` or
+    ``/dist`` are looked up per path component in name, suffix and
+    anchored-prefix tables. Only real globs are matched by regex, with
+    the alternatives ordered from the last pattern to the first so the
+    first alternative that matches is the last matching pattern. Both
+    sides report pattern indices, so git's last-match-wins semantics are
+    kept across the two.
+    """
+
+    def __init__(self, patterns):
+        super(CompiledPathSpec, self).__init__(patterns)
+        index = _PatternIndex()
+        fallback = []
+        for i, pattern in enumerate(self.patterns):
+            if pattern.include is not None and not index.add(i, pattern.regex):
+                fallback.append((i, pattern))
+        self._index = index if index.size else None
+        self._slash = index.slash
+        self._newline = b'\n' if isinstance(index.slash, bytes) else '\n'
+        self._blocks = _compile_blocks(fallback)
+        self._scope = _build_scope(self.patterns)
+
+    def subspec(self, prefix):
+        """Returns a spec with only the patterns that can match a path below
+        the directory *prefix*, given as in :meth:`match_names`.
+
+        Patterns anchored to a literal path, such as ``/docs/build/`` or
+        ``src/**/gen/*.c``, cannot match outside that path and are left
+        out. Returns this spec when every pattern can still match, and
+        None when none can. Specs are memoized per distinct pattern set.
+        """
+        if not prefix or self._scope is None:
+            return self
+        slash = prefix[-1:]
+        path = [self._scope]
+        full = True
+        for part in prefix[:-1].split(slash):
+            child = path[-1][0].get(part)
+            if child is None:
+                full = False
+                break
+            path.append(child)
+        node = path[-1]
+        slot = 2 if full else 3
+        if node[slot] is _UNKNOWN:
+            node[slot] = self._restrict(_scope_indices(path, full))
+        return node[slot]
+
+    def _restrict(self, indices):
+        if len(indices) == self._scope[4]:
+            return self
+        if not indices:
+            return None
+        return CompiledPathSpec([self.patterns[i] for i in indices])
+
+    def match_file(self, file, separators=None):
+        norm_file = util.normalize_file(file, separators=separators)
+        return self.match_normalized(norm_file)
+
+    def match_files(self, files, separators=None):
+        if isinstance(files, (bytes, unicode)):
+            raise TypeError("files:{0!r} is not an iterable.".format(files))
+
+        for path in files:
+            if self.match_normalized(util.normalize_file(path, separators=separators)):
+                yield path
+
+    def match_normalized(self, path):
+        """Matches an already normalized path, skipping
+        :func:`~pathspec.util.normalize_file`."""
+        index = self.last_match(path)
+        return index >= 0 and self.patterns[index].include
+
+    def match_names(self, prefix, names, is_dirs, slash='/'):
+        """Matches the entries of one directory in a single call.
+
+        *prefix* is the normalized path of the directory relative to this
+        spec's base, ending with *slash* unless empty, and *is_dirs* tells
+        which *names* are directories; those also match as ``name/``.
+        Returns a list of booleans, True for each ignored name.
+        """
+        last_match = self.last_match
+        patterns = self.patterns
+        result = []
+        for name, is_dir in zip(names, is_dirs):
+            path = prefix + name
+            index = last_match(path)
+            ignored = index >= 0 and patterns[index].include
+            if not ignored and is_dir:
+                index = last_match(path + slash)
+                ignored = index >= 0 and patterns[index].include
+            result.append(bool(ignored))
+        return result
+
+    def last_match(self, path):
+        """Returns the index of the last pattern that matches *path*, or
+        ``-1`` when no pattern matches."""
+        best = -1
+        if self._index is not None:
+            if path[:1] == self._slash or self._newline in path:
+                # The tables assume relative paths without newlines, which
+                # the regexes treat specially, so check those by regex.
+                best = self._index.slow_match(path)
+            else:
+                best = self._index.match(path.split(self._slash))
+        for regex, indices, newest in self._blocks:
+            if newest < best:
+                break
+            match = regex.match(path)
+            if match is not None:
+                return max(best, indices[match.lastindex])
+        return best
+
+
+class _PatternIndex(object):
+    """Hash tables for the patterns that are plain literals."""
+
+    def __init__(self):
+        self.size = 0
+        self.slash = '/'
+        self.names = ({}, {}, {})
+        self.suffixes = ({}, {}, {})
+        # Trie nodes are [children, ANY index, LAST index, DIR index].
+        self.trie = [{}, -1, -1, -1]
+        self.regexes = []
+
+    def add(self, index, regex):
+        text = regex.pattern
+        is_bytes = isinstance(text, bytes) and not isinstance(text, str)
+        if is_bytes:
+            text = text.decode('latin1')
+        form = _classify(text)
+        if form is None:
+            return False
+        table, how, literal = form
+        if is_bytes:
+            literal = literal.encode('latin1')
+            self.slash = b'/'
+
+        if table == 'name':
+            self.names[how][literal] = index
+        elif table == 'suffix':
+            self.suffixes[how].setdefault(len(literal), {})[literal] = index
+        else:
+            node = self.trie
+            for segment in literal.split(self.slash):
+                node = node[0].setdefault(segment, [{}, -1, -1, -1])
+            node[1 + how] = index
+        self.regexes.append((index, regex))
+        self.size += 1
+        return True
+
+    def match(self, parts):
+        """Returns the highest indexed pattern matching the path split into
+        *parts*, or ``-1``."""
+        best = -1
+        last = len(parts) - 1
+
+        any_names, last_names, dir_names = self.names
+        if any_names or dir_names:
+            for i, part in enumerate(parts):
+                found = any_names.get(part, -1)
+                if found > best:
+                    best = found
+                if i < last:
+                    found = dir_names.get(part, -1)
+                    if found > best:
+                        best = found
+        if last_names:
+            found = last_names.get(parts[last], -1)
+            if found > best:
+                best = found
+
+        any_suffixes, last_suffixes, dir_suffixes = self.suffixes
+        for i, part in enumerate(parts):
+            for length, table in any_suffixes.items():
+                found = table.get(part[-length:], -1)
+                if found > best:
+                    best = found
+            if i < last:
+                for length, table in dir_suffixes.items():
+                    found = table.get(part[-length:], -1)
+                    if found > best:
+                        best = found
+        for length, table in last_suffixes.items():
+            found = table.get(parts[last][-length:], -1)
+            if found > best:
+                best = found
+
+        node = self.trie
+        for i, part in enumerate(parts):
+            node = node[0].get(part)
+            if node is None:
+                break
+            found = max(node[1], node[2] if i == last else node[3])
+            if found > best:
+                best = found
+        return best
+
+    def slow_match(self, path):
+        for index, regex in reversed(self.regexes):
+            if regex.match(path) is not None:
+                return index
+        return -1
+
+
+def _classify(regex):
+    """Recognizes the regexes GitWildMatchPattern emits for plain patterns.
+
+    Returns ``(table, how, literal)`` where *table* is ``'name'`` (a whole
+    path component), ``'suffix'`` (the end of a component) or ``'anchor'``
+    (the leading components), and *how* is :data:`ANY`, :data:`LAST` or
+    :data:`DIR`. Returns :data:`None` for anything that needs a regex.
+    """
+    if regex.startswith(_ANY_PREFIX):
+        body = regex[len(_ANY_PREFIX):]
+        table = 'name'
+        if body.startswith(_STAR):
+            body = body[len(_STAR):]
+            table = 'suffix'
+    elif regex.startswith('^'):
+        body = regex[1:]
+        table = 'anchor'
+    else:
+        return None
+
+    for suffix, how in ((_ANY_SUFFIX, ANY), (_DIR_SUFFIX, DIR), (_END, LAST)):
+        if body.endswith(suffix):
+            body = body[:-len(suffix)]
+            break
+    else:
+        return None
+
+    literal = _unescape(body)
+    if not literal:
+        return None
+    if table == 'anchor':
+        if '' in literal.split('/'):
+            return None
+    elif '/' in literal:
+        return None
+    return table, how, literal
+
+
+def _unescape(text):
+    """Returns the literal string matched by *text*, or :data:`None` if
+    *text* uses any regex syntax beyond :func:`re.escape`."""
+    chars = []
+    escaped = False
+    for char in text:
+        if escaped:
+            if char in _ASCII_ALNUM:
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in _REGEX_SPECIALS:
+            return None
+        else:
+            chars.append(char)
+    if escaped:
+        return None
+    return ''.join(chars)
+
+
+def _anchored_prefix(text):
+    """Returns the literal leading path components every path matched by
+    the GitWildMatchPattern regex *text* must start with."""
+    if not text.startswith('^') or text.startswith(_ANY_PREFIX):
+        return []
+    body = text[1:]
+    for suffix in (_ANY_SUFFIX, _DIR_SUFFIX, _END):
+        if body.endswith(suffix):
+            body = body[:-len(suffix)]
+            # Whatever precedes the suffix is a complete component.
+            last_complete = True
+            break
+    else:
+        last_complete = False
+
+    segments = []
+    while body:
+        slash = body.find('/')
+        star = body.find(_DOUBLE_STAR)
+        if 0 <= star < slash:
+            # "a/**/b" continues with any number of components after "a".
+            literal = _unescape(body[:star])
+            if literal:
+                segments.append(literal)
+            break
+        if slash < 0:
+            literal = _unescape(body) if last_complete else None
+            if literal:
+                segments.append(literal)
+            break
+        literal = _unescape(body[:slash])
+        if not literal:
+            break
+        segments.append(literal)
+        body = body[slash + 1:]
+    return segments
+
+
+def _build_scope(patterns):
+    # A trie of the anchored prefixes; each node is [children, indices of
+    # the patterns whose prefix ends there, spec for paths that stay on
+    # the trie, spec for paths that leave it below this node]. The root
+    # also holds the number of active patterns. Returns None when no
+    # pattern is anchored, since nothing can be pruned then.
+    scope = [{}, [], _UNKNOWN, _UNKNOWN, 0]
+    anchored = False
+    for i, pattern in enumerate(patterns):
+        if pattern.include is None:
+            continue
+        scope[4] += 1
+        text = pattern.regex.pattern
+        is_bytes = isinstance(text, bytes) and not isinstance(text, str)
+        if is_bytes:
+            text = text.decode('latin1')
+        node = scope
+        for segment in _anchored_prefix(text):
+            if is_bytes:
+                segment = segment.encode('latin1')
+            node = node[0].setdefault(segment, [{}, [], _UNKNOWN, _UNKNOWN])
+            anchored = True
+        node[1].append(i)
+    return scope if anchored else None
+
+
+def _scope_indices(path, full):
+    # Collects the indices of the patterns relevant below the last node of
+    # path: those whose prefix ends on the way to it, plus, when the walk
+    # stays on the trie, every pattern deeper down.
+    indices = []
+    for node in path:
+        indices.extend(node[1])
+    if full:
+        stack = list(path[-1][0].values())
+        while stack:
+            node = stack.pop()
+            indices.extend(node[1])
+            stack.extend(node[0].values())
+    indices.sort()
+    return indices
+
+
+def _compile_blocks(indexed_patterns):
+    """Builds the ``(regex, {group: pattern index}, newest index)`` blocks
+    for *indexed_patterns*, newest pattern first."""
+    active = [(i, p.regex) for i, p in indexed_patterns]
+    active.reverse()
+
+    blocks = []
+    alternatives, indices, groups = [], {}, 0
+    for index, regex in active:
+        if alternatives and groups + 1 + regex.groups > MAX_GROUPS:
+            blocks.append(_join_block(alternatives, indices))
+            alternatives, indices, groups = [], {}, 0
+        groups += 1
+        indices[groups] = index
+        groups += regex.groups
+        alternatives.append(regex.pattern)
+    if alternatives:
+        blocks.append(_join_block(alternatives, indices))
+    return blocks
+
+
+def _join_block(alternatives, indices):
+    if isinstance(alternatives[0], bytes):
+        regex = b'|'.join(b'(' + a + b')' for a in alternatives)
+    else:
+        regex = '|'.join('(' + a + ')' for a in alternatives)
+    return re.compile(regex), indices, max(indices.values())
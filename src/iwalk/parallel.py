@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from collections import deque
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from iwalk.core import IGNORE_FILENAMES, _Walk, _scan_dir
+
+DEFAULT_WORKERS = 8
+
+# Results waiting for the consumer before workers block; keeps memory
+# bounded when the caller is slower than the listing.
+RESULTS_PER_WORKER = 64
+
+# Directories prefetch_iwalk() lists ahead of the consumer.
+DEFAULT_READAHEAD = 16
+
+
+def parallel_iwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False,
+                   workers=DEFAULT_WORKERS, cache=None):
+    """Walks *root_dir* like :func:`iwalk.iwalk` on a pool of threads.
+
+    Directories are listed and filtered concurrently (``scandir`` releases
+    the GIL) and each ``(dirpath, dirnames, filenames)`` tuple is yielded
+    as soon as its directory is done, in no particular order. Because the
+    subdirectories to walk are taken before the tuple is yielded, pruning
+    *dirnames* in place has no effect.
+    """
+    if workers < 1:
+        raise ValueError("workers:{0!r} must be at least 1.".format(workers))
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    spec_map = {}
+    pool = _WorkPool(workers)
+    results = queue.Queue(maxsize=workers * RESULTS_PER_WORKER)
+
+    def work(worker):
+        while True:
+            dirpath = pool.pop(worker)
+            if dirpath is None:
+                return
+            children = []
+            try:
+                listing = _scan_dir(dirpath, walk, spec_map)
+                if listing is not None:
+                    dirnames, filenames, links = listing
+                    children = [os.path.join(dirpath, d) for d in dirnames if d not in links]
+                item = (dirpath, listing, len(children), None)
+            except Exception as e:
+                item = (dirpath, None, 0, e)
+            # The result is queued ahead of any of its children's, so the
+            # consumer counts them as outstanding before they can finish.
+            if not _put(results, item, pool):
+                return
+            pool.push(worker, children)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    pool.push(0, [walk.root_dir])
+    outstanding = 1
+    try:
+        while outstanding:
+            dirpath, listing, queued, error = results.get()
+            outstanding += queued - 1
+            if error is not None:
+                raise error
+            if listing is not None:
+                yield dirpath, listing[0], listing[1]
+    finally:
+        pool.close()
+        for thread in threads:
+            thread.join()
+        walk.close()
+
+
+def _put(results, item, pool):
+    # Waits for room in the results queue unless the walk was abandoned.
+    while True:
+        try:
+            results.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if pool.closed:
+                return False
+
+
+class _WorkPool(object):
+    """Per-worker directory deques with work stealing.
+
+    A worker pushes the subdirectories it finds onto its own deque and
+    pops from the same end, so it keeps walking depth-first through the
+    part of the tree it already has cached. An idle worker steals from
+    the opposite end of another worker's deque, taking the shallowest
+    pending directories, which carry the most remaining work.
+    """
+
+    def __init__(self, workers):
+        self.deques = [deque() for _ in range(workers)]
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def push(self, worker, dirpaths):
+        if not dirpaths:
+            return
+        with self.cond:
+            self.deques[worker].extend(dirpaths)
+            self.cond.notify_all()
+
+    def pop(self, worker):
+        own = self.deques[worker]
+        while not self.closed:
+            try:
+                return own.pop()
+            except IndexError:
+                pass
+            dirpath = self._steal(worker)
+            if dirpath is not None:
+                return dirpath
+            with self.cond:
+                if self.closed:
+                    return None
+                # Pushes happen under the lock, so checking again here
+                # cannot miss a notification.
+                if not any(self.deques):
+                    self.cond.wait()
+        return None
+
+    def _steal(self, worker):
+        count = len(self.deques)
+        for offset in range(1, count + 1):
+            try:
+                return self.deques[(worker + offset) % count].popleft()
+            except IndexError:
+                pass
+        return None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+def prefetch_iwalk(root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False,
+                   workers=DEFAULT_WORKERS, readahead=DEFAULT_READAHEAD, cache=None):
+    """Walks *root_dir* in exactly the order of :func:`iwalk.iwalk` while
+    background threads list and filter up to *readahead* of the
+    directories that will be visited next.
+
+    Pruning *dirnames* in place works as with :func:`os.walk`. The
+    subdirectories of each yielded directory are prefetched before the
+    caller decides which of them to keep; any the caller removes are
+    cancelled, or their results discarded if already running.
+    """
+    if workers < 1:
+        raise ValueError("workers:{0!r} must be at least 1.".format(workers))
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    spec_map = {}
+    jobs = queue.Queue()
+    futures = {}
+
+    def work():
+        while True:
+            future = jobs.get()
+            if future is None:
+                return
+            if not future.start():
+                continue
+            try:
+                listing = _scan_dir(future.dirpath, walk, spec_map)
+                future.finish(listing, None)
+            except Exception as e:
+                future.finish(None, e)
+
+    def submit(dirpath):
+        if dirpath in futures:
+            return True
+        if len(futures) >= readahead:
+            return False
+        future = _Prefetch(dirpath)
+        futures[dirpath] = future
+        jobs.put(future)
+        return True
+
+    def take(dirpath):
+        future = futures.pop(dirpath, None)
+        if future is None or future.cancel():
+            # Not started yet, so listing it here is no slower than waiting.
+            return _scan_dir(dirpath, walk, spec_map)
+        future.done.wait()
+        if future.error is not None:
+            raise future.error
+        return future.listing
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    stack = [walk.root_dir]
+    try:
+        while stack:
+            dirpath = stack.pop()
+            listing = take(dirpath)
+            if listing is None:
+                continue
+            dirnames, filenames, links = listing
+
+            speculative = []
+            for name in dirnames:
+                if name in links:
+                    continue
+                child = os.path.join(dirpath, name)
+                if not submit(child):
+                    break
+                speculative.append((name, child))
+
+            yield dirpath, dirnames, filenames
+
+            kept = set(dirnames)
+            for name, child in speculative:
+                if name not in kept:
+                    futures.pop(child).cancel()
+            for name in reversed(dirnames):
+                if name not in links:
+                    stack.append(os.path.join(dirpath, name))
+            for pending in reversed(stack[-readahead:]):
+                if not submit(pending):
+                    break
+    finally:
+        for future in futures.values():
+            future.cancel()
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+        walk.close()
+
+
+class _Prefetch(object):
+    """The pending listing of one directory."""
+
+    PENDING, RUNNING, DONE, CANCELLED = range(4)
+
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self.state = self.PENDING
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.listing = None
+        self.error = None
+
+    def start(self):
+        with self.lock:
+            if self.state != self.PENDING:
+                return False
+            self.state = self.RUNNING
+            return True
+
+    def cancel(self):
+        with self.lock:
+            if self.state != self.PENDING:
+                return False
+            self.state = self.CANCELLED
+            return True
+
+    def finish(self, listing, error):
+        self.listing, self.error = listing, error
+        self.state = self.DONE
+        self.done.set()
@@ -1,14 +1,24 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-import subprocess
-import errno
+import threading
+from collections import OrderedDict
 
+from iwalk import gitconfig
+from iwalk.matcher import CompiledPathSpec
 from iwalk.vendor.pathspec import PathSpec
 from iwalk.vendor.pathspec.patterns.gitwildmatch import GitWildMatchPattern
 
 IGNORE_FILENAMES = ['.gitignore', '.dockerignore', '.ignore']
 
+# Global excludes file path -> (stat key, patterns).
+_global_patterns = {}
+
+# Bounds of the process-wide caches behind compile_spec(): compiled
+# patterns by line, and specs by their whole list of lines.
+PATTERN_CACHE_SIZE = 8192
+SPEC_CACHE_SIZE = 2048
+
 
 class GlobalIgnoreLoadError(Exception):
     """Generic failure to load global ignore patterns."""
@@ -20,12 +30,16 @@ class GitCommandNotFound(GlobalIgnoreLoadError):
 
     This usually means Git is not installed or not accessible from the current shell.
     Callers should catch this to fall back or alert the user appropriately.
+
+    No longer raised now that the git config is read in-process; kept so
+    existing handlers keep working.
     """
     pass
 
 
 class GitConfigMissingError(GlobalIgnoreLoadError):
-    """Raised when Git is installed but the 'core.excludesFile' config is missing or unreadable.
+    """Raised when the 'core.excludesFile' config is missing and git's default
+    ignore file does not exist either.
 
     This could mean the user has not set a global ignore file, or there is a config access issue.
     """
@@ -33,61 +47,163 @@ class GitConfigMissingError(GlobalIgnoreLoadError):
 
 
 def read_patterns_from_file(filepath):
-    if not os.path.isfile(filepath):
-        return []
-    with open(filepath, 'r') as f:
-        lines = []
-        for line in f.read().splitlines():
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if sys.version_info[0] < 3:
-                line = line.decode('utf-8')
-            lines.append(line)
-        return lines
-
-
-def load_global_patterns():
+    # One open() and one read(): a missing file or a directory simply fails
+    # to open, so no stat() is needed first.
     try:
-        path = subprocess.check_output(
-            ['git', 'config', '--get', 'core.excludesFile'],
-            stderr=open(os.devnull, 'wb')
-        ).strip()
-    except OSError as e:
-        if getattr(e, 'errno', None) == errno.ENOENT:
-            raise GitCommandNotFound("Git is not installed or not in PATH")
-        raise GlobalIgnoreLoadError("Unable to invoke git config")
-    except subprocess.CalledProcessError:
-        raise GitConfigMissingError("Git config does not contain core.excludesFile")
-
-    if isinstance(path, bytes):
-        path = path.decode('utf-8')
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    except (IOError, OSError):
+        return []
+    if not _is_bytes(filepath):
+        # A bytes walk matches bytes paths, so its patterns stay bytes and
+        # undecodable names can still be matched; others are decoded the
+        # way os.fsdecode() decodes the names they are matched against.
+        data = os.fsdecode(data) if sys.version_info[0] >= 3 else data.decode('utf-8')
+    comment = b'#' if _is_bytes(data) else '#'
+    lines = [line.strip() for line in data.splitlines()]
+    return [line for line in lines if line and not line.startswith(comment)]
+
+
+def load_global_patterns(repo_dir=None):
+    """Returns the patterns of the global excludes file.
+
+    The file is ``core.excludesFile`` from the git config (including the
+    repository's ``.git/config`` when *repo_dir* is given), or git's
+    default ``$XDG_CONFIG_HOME/git/ignore``. The config is read in-process
+    and both it and the patterns are memoized until one of the files they
+    came from changes.
+    """
+    config = gitconfig.load_config(repo_dir)
+    path = config.get('core.excludesfile')
+    if path is None:
+        path = gitconfig.default_excludes_path()
+        if not os.path.isfile(path):
+            raise GitConfigMissingError("Git config does not contain core.excludesFile")
     path = os.path.expanduser(path)
-    return read_patterns_from_file(path)
 
+    key = gitconfig.stat_key(path)
+    cached = _global_patterns.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, read_patterns_from_file(path))
+        _global_patterns[path] = cached
+    return list(cached[1])
+
+
+def load_repo_exclude_patterns(root_dir, reader=None):
+    reader = reader or read_patterns_from_file
+    parts = ['.git', 'info', 'exclude']
+    if _is_bytes(root_dir):
+        parts = [part.encode('ascii') for part in parts]
+    exclude_path = os.path.join(root_dir, *parts)
+    return reader(exclude_path)
+
+
+def load_dir_patterns(dirpath, ignore_files, root_dir=None, reader=None, present=None):
+    # reader replaces read_patterns_from_file, e.g. with SpecCache.read_patterns.
+    # present lists the ignore files a listing of dirpath found, so that the
+    # absent ones are not looked up; None looks up all of them.
+    reader = reader or read_patterns_from_file
+    patterns = []
+    for ignore_file in ignore_files:
+        if present is not None and ignore_file not in present:
+            continue
+        ignore_path = os.path.join(dirpath, ignore_file)
+        patterns.extend(reader(ignore_path))
+
+    # if this is the root dir, include repo-level patterns
+    if root_dir is not None and os.path.abspath(dirpath) == os.path.abspath(root_dir):
+        patterns.extend(load_repo_exclude_patterns(root_dir, reader))
+        try:
+            if _is_bytes(root_dir):
+                patterns.extend(os.fsencode(line)
+                                for line in load_global_patterns(os.fsdecode(root_dir)))
+            else:
+                patterns.extend(load_global_patterns(root_dir))
+        except GlobalIgnoreLoadError:
+            pass
+    return patterns
+
+
+def load_dir_spec(dirpath, ignore_files, root_dir=None, reader=None, present=None):
+    return compile_spec(load_dir_patterns(dirpath, ignore_files, root_dir, reader, present))
+
+
+def compile_spec(patterns):
+    """Returns the spec of a list of pattern lines, or None if it is empty.
+
+    Monorepos repeat the same lines, and often whole ignore files, in
+    thousands of directories. Identical lists therefore share one spec,
+    and each distinct line is compiled to a pattern once. Both caches are
+    bounded LRUs kept for the life of the process.
+    """
+    if not patterns:
+        return None
+    key = tuple(patterns)
+    spec = _spec_cache.get(key)
+    if spec is None:
+        spec = CompiledPathSpec([_compile_pattern(line) for line in patterns if line])
+        _spec_cache.put(key, spec)
+    return spec
+
+
+def _compile_pattern(line):
+    pattern = _pattern_cache.get(line)
+    if pattern is None:
+        pattern = GitWildMatchPattern(line)
+        _pattern_cache.put(line, pattern)
+    return pattern
+
+
+def clear_spec_caches():
+    """Empties the caches of :func:`compile_spec`."""
+    _pattern_cache.clear()
+    _spec_cache.clear()
 
-def load_repo_exclude_patterns(root_dir):
-    exclude_path = os.path.join(root_dir, '.git', 'info', 'exclude')
-    return read_patterns_from_file(exclude_path)
+
+class _LRUCache(object):
+    # A thread-safe mapping that drops the least recently used entry once
+    # it holds more than maxsize entries.
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                self._data[key] = value
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_pattern_cache = _LRUCache(PATTERN_CACHE_SIZE)
+_spec_cache = _LRUCache(SPEC_CACHE_SIZE)
 
 
 def load_ignore_specs(root_dir, ignore_files):
     spec_map = {}
     for dirpath, dirnames, filenames in os.walk(root_dir):
-        patterns = []
-        for ignore_file in ignore_files:
-            ignore_path = os.path.join(dirpath, ignore_file)
-            patterns.extend(read_patterns_from_file(ignore_path))
-
-        # if this is the root dir, include repo-level patterns
-        if os.path.abspath(dirpath) == os.path.abspath(root_dir):
-            patterns.extend(load_repo_exclude_patterns(root_dir))
-            try:
-                patterns.extend(load_global_patterns())
-            except GlobalIgnoreLoadError:
-                pass
-
-        if patterns:
-            spec = PathSpec.from_lines(GitWildMatchPattern, patterns)
+        spec = load_dir_spec(dirpath, ignore_files, root_dir)
+        if spec is not None:
             spec_map[dirpath] = spec
     return spec_map
+
+
+def _is_bytes(path):
+    # True for bytes paths on Python 3; Python 2 keeps its str behavior.
+    return isinstance(path, bytes) and not isinstance(path, str)
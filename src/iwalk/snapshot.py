@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import marshal
+import os
+import sys
+import time
+import zlib
+from collections import namedtuple
+
+from iwalk.cache import RACY_SECONDS, _mtime_ns, _write_atomic
+from iwalk.core import (IGNORE_FILENAMES, _Walk, _filter_entries, _list_dir, _present_ignore_files,
+                        get_ancestor_paths)
+from iwalk.patterns import compile_spec, load_dir_patterns
+
+SNAPSHOT_VERSION = 1
+
+_MAGIC = 'iwalk-snapshot'
+
+# Fields of one directory record.
+MTIME, DIRNAMES, FILENAMES, LINKS, IGNORE_KEYS, PATTERNS = range(6)
+
+WalkDiff = namedtuple('WalkDiff', ['walk', 'added', 'removed'])
+
+
+def incremental_iwalk(root_dir, snapshot_path, ignore_files=IGNORE_FILENAMES,
+                      exclude_hidden=False, cache=None):
+    """Walks *root_dir* like :func:`iwalk.iwalk`, reusing the snapshot
+    saved by the previous call wherever the tree has not changed.
+
+    The snapshot at *snapshot_path* holds each directory's mtime, the stat
+    keys of its ignore files and its already filtered entries. A directory
+    is listed again only when its mtime changed, one of its ignore files
+    changed, or the ignore rules of an ancestor changed; everything else
+    costs one ``stat()``. As with git's untracked cache, directories
+    modified within :data:`~iwalk.cache.RACY_SECONDS` of the previous
+    snapshot are always listed again.
+
+    Returns a :class:`WalkDiff` of the complete walk, in :func:`iwalk.iwalk`
+    order, and the sorted paths of files added and removed since the
+    previous snapshot, which is then replaced.
+    """
+    walk = _Walk(root_dir, ignore_files, exclude_hidden, cache)
+    settings = [walk.root_dir, list(ignore_files), bool(exclude_hidden)]
+    taken_ns, old = load_snapshot(snapshot_path, settings)
+    racy_ns = taken_ns - RACY_SECONDS * 1000000000
+    now_ns = int(time.time() * 1000000000)
+
+    records = {}
+    patterns_map = {}
+    spec_map = {}
+    result, added, removed = [], [], []
+    # Each entry is (dirpath, whether an ancestor's ignore rules changed).
+    stack = [(walk.root_dir, False)]
+    try:
+        while stack:
+            dirpath, stale = stack.pop()
+            record = old.pop(dirpath, None)
+            new = _visit(dirpath, record, stale, racy_ns, walk, patterns_map, spec_map)
+            if new is None:
+                if record is not None:
+                    removed.extend(os.path.join(dirpath, name) for name in record[FILENAMES])
+                continue
+            records[dirpath] = new
+            if new[PATTERNS]:
+                patterns_map[dirpath] = new[PATTERNS]
+            if record is None:
+                added.extend(os.path.join(dirpath, name) for name in new[FILENAMES])
+            elif new is not record:
+                before, after = set(record[FILENAMES]), set(new[FILENAMES])
+                added.extend(os.path.join(dirpath, name) for name in after - before)
+                removed.extend(os.path.join(dirpath, name) for name in before - after)
+
+            result.append((dirpath, new[DIRNAMES], new[FILENAMES]))
+
+            # A child must be filtered again if these rules differ from the
+            # ones its cached entries were filtered with.
+            changed = stale or record is None or new[PATTERNS] != record[PATTERNS]
+            links = new[LINKS]
+            for name in reversed(new[DIRNAMES]):
+                if name not in links:
+                    stack.append((os.path.join(dirpath, name), changed))
+    finally:
+        walk.close()
+
+    # Directories that were not reached again were deleted or are ignored now.
+    for dirpath, record in old.items():
+        removed.extend(os.path.join(dirpath, name) for name in record[FILENAMES])
+
+    save_snapshot(snapshot_path, settings, now_ns, records)
+    added.sort()
+    removed.sort()
+    return WalkDiff(result, added, removed)
+
+
+def _visit(dirpath, record, stale, racy_ns, walk, patterns_map, spec_map):
+    # Returns the directory record for dirpath, which is record itself when
+    # the cached entries are still valid, or None if it cannot be listed.
+    try:
+        mtime = _mtime_ns(os.stat(dirpath))
+    except OSError:
+        return None
+
+    is_root = dirpath == walk.root_dir
+    if record is not None and not stale and record[MTIME] == mtime and mtime < racy_ns:
+        if is_root:
+            # The root also carries the repo exclude file and the global
+            # excludes, so its patterns are simply read again.
+            patterns = load_dir_patterns(dirpath, walk.ignore_files, walk.root_dir, walk.reader)
+            if patterns == record[PATTERNS]:
+                return record
+        else:
+            keys = _ignore_keys(dirpath, [name for name, _ in record[IGNORE_KEYS]])
+            if keys == record[IGNORE_KEYS] and all(key[1] < racy_ns for _, key in keys if key):
+                return record
+
+    try:
+        entries = _list_dir(dirpath)
+    except OSError:
+        return None
+
+    present = _present_ignore_files(entries, walk)
+    keys = _ignore_keys(dirpath, present)
+    patterns = load_dir_patterns(dirpath, walk.ignore_files, walk.root_dir, walk.reader, present)
+    patterns_map[dirpath] = patterns
+    _load_specs(dirpath, walk.root_dir, patterns_map, spec_map)
+    dirnames, filenames, links = _filter_entries(dirpath, entries, walk, spec_map)
+    return (mtime, dirnames, filenames, sorted(links), keys, patterns)
+
+
+def _ignore_keys(dirpath, names):
+    keys = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(dirpath, name))
+            key = [st.st_size, _mtime_ns(st), st.st_ino]
+        except OSError:
+            key = None
+        keys.append((name, key))
+    return keys
+
+
+def _load_specs(dirpath, root_dir, patterns_map, spec_map):
+    # Compiles the specs of dirpath and its ancestors only once a directory
+    # below them actually has to be filtered.
+    for path in [dirpath] + get_ancestor_paths(dirpath):
+        if path not in spec_map and patterns_map.get(path):
+            spec_map[path] = compile_spec(patterns_map[path])
+        if path == root_dir:
+            break
+
+
+def load_snapshot(path, settings):
+    """Returns the time the snapshot at *path* was taken, in nanoseconds,
+    and its directory records. A missing or corrupt snapshot, or one taken
+    with different *settings*, gives ``(0, {})``."""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except (IOError, OSError):
+        return 0, {}
+    header, _, data = raw.partition(b'\n')
+    try:
+        magic, version, python, checksum = header.decode('ascii').split()
+        if magic != _MAGIC or int(version) != SNAPSHOT_VERSION or python != _python_tag():
+            return 0, {}
+        if zlib.crc32(data) & 0xffffffff != int(checksum):
+            return 0, {}
+        stored, taken_ns, records = marshal.loads(data)
+    except (ValueError, EOFError, TypeError, UnicodeError):
+        return 0, {}
+    if list(stored) != settings:
+        return 0, {}
+    return taken_ns, records
+
+
+def save_snapshot(path, settings, taken_ns, records):
+    """Writes the directory records to *path* with marshal, the fastest
+    format the standard library loads. Failures are ignored; the next walk
+    then simply lists everything again."""
+    data = marshal.dumps((settings, taken_ns, records))
+    header = '%s %d %s %d\n' % (_MAGIC, SNAPSHOT_VERSION, _python_tag(),
+                                zlib.crc32(data) & 0xffffffff)
+    try:
+        _write_atomic(os.path.abspath(path), header.encode('ascii') + data)
+    except (IOError, OSError):
+        pass
+
+
+def _python_tag():
+    # The marshal format is only guaranteed between identical versions.
+    return '%d.%d' % sys.version_info[:2]
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import heapq
+import time
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+PHASES = ('list', 'ignore', 'match')
+
+
+class WalkStats(object):
+    """Counters and timers filled in by ``iwalk(..., stats=WalkStats())``.
+
+    Counters:
+
+    - ``dirs_listed``, ``list_errors``: directories listed, and those that
+      could not be listed
+    - ``entries_seen``, ``entries_pruned``: directory entries found, and
+      those dropped as hidden or ignored
+    - ``stat_calls``: stat calls made to tell directories from files; zero
+      when ``scandir`` gets the types from the listing itself
+    - ``ignore_lookups``, ``ignore_files_read``: ignore files opened, which
+      are only those the listing found plus the root's exclude file, and
+      those that held patterns
+    - ``patterns_loaded``: patterns read from those files
+    - ``pattern_checks``: patterns evaluated per entry, summed over the
+      specs each directory is matched against
+
+    The global excludes file is left out of the ignore file counters:
+    :func:`iwalk.patterns.load_global_patterns` reads it outside the walk's
+    reader and memoizes it across walks, so neither the file nor its
+    patterns are counted.
+
+    :attr:`times` holds the seconds spent listing directories (``list``),
+    loading ignore files (``ignore``, which for the root includes the git
+    config and global excludes) and matching (``match``).
+    :meth:`slowest_dirs` returns the directories that took longest.
+
+    One instance can collect several walks. Without one, the walk skips
+    all of this.
+    """
+
+    clock = staticmethod(_clock)
+
+    def __init__(self, slowest=10):
+        self.dirs_listed = 0
+        self.list_errors = 0
+        self.entries_seen = 0
+        self.entries_pruned = 0
+        self.stat_calls = 0
+        self.ignore_lookups = 0
+        self.ignore_files_read = 0
+        self.patterns_loaded = 0
+        self.pattern_checks = 0
+        self.times = dict((phase, 0.0) for phase in PHASES)
+        self._keep = slowest
+        self._slowest = []
+
+    def record_dir(self, dirpath, seen, kept, list_time, ignore_time, match_time):
+        self.dirs_listed += 1
+        self.entries_seen += seen
+        self.entries_pruned += seen - kept
+        self.times['list'] += list_time
+        self.times['ignore'] += ignore_time
+        self.times['match'] += match_time
+        total = list_time + ignore_time + match_time
+        if len(self._slowest) < self._keep:
+            heapq.heappush(self._slowest, (total, dirpath))
+        elif self._keep and total > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (total, dirpath))
+
+    def counting_reader(self, reader):
+        # Wraps a read_patterns_from_file-like reader to count its calls.
+        def read(path):
+            patterns = reader(path)
+            self.ignore_lookups += 1
+            if patterns:
+                self.ignore_files_read += 1
+                self.patterns_loaded += len(patterns)
+            return patterns
+        return read
+
+    def slowest_dirs(self):
+        """Returns ``(dirpath, seconds)`` for the slowest directories,
+        slowest first."""
+        return [(path, seconds) for seconds, path in sorted(self._slowest, reverse=True)]
+
+    def as_dict(self):
+        return {
+            'dirs_listed': self.dirs_listed,
+            'list_errors': self.list_errors,
+            'entries_seen': self.entries_seen,
+            'entries_pruned': self.entries_pruned,
+            'stat_calls': self.stat_calls,
+            'ignore_lookups': self.ignore_lookups,
+            'ignore_files_read': self.ignore_files_read,
+            'patterns_loaded': self.patterns_loaded,
+            'pattern_checks': self.pattern_checks,
+            'times': dict(self.times),
+            'slowest_dirs': self.slowest_dirs(),
+        }
+
+    def report(self):
+        """Formats the statistics as lines of text."""
+        seen = self.entries_seen or 1
+        lines = [
+            "directories listed:   %d (%d errors)" % (self.dirs_listed, self.list_errors),
+            "entries seen:         %d (%d pruned)" % (self.entries_seen, self.entries_pruned),
+            "stat calls:           %d" % self.stat_calls,
+            "ignore files read:    %d of %d looked up, %d patterns" % (
+                self.ignore_files_read, self.ignore_lookups, self.patterns_loaded),
+            "patterns per entry:   %.1f" % (float(self.pattern_checks) / seen),
+        ]
+        for phase in PHASES:
+            lines.append("%-21s %.3fs" % ("time %s:" % phase, self.times[phase]))
+        slowest = self.slowest_dirs()
+        if slowest:
+            lines.append("slowest directories:")
+            for path, seconds in slowest:
+                lines.append("  %8.3fms  %s" % (seconds * 1000, _text(path)))
+        return '\n'.join(lines)
+
+
+def _text(path):
+    if isinstance(path, bytes) and not isinstance(path, str):
+        return path.decode('utf-8', 'replace')
+    return path
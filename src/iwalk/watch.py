@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+import select
+import struct
+import sys
+from collections import namedtuple
+
+from iwalk.core import IGNORE_FILENAMES, _BYTES_SEP, _Walk, _is_ignored, _scan_dir
+
+CREATED, MODIFIED, DELETED, OVERFLOW = 'created', 'modified', 'deleted', 'overflow'
+
+WatchEvent = namedtuple('WatchEvent', ['kind', 'path', 'is_dir'])
+
+# From <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONTFOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+WATCH_MASK = (IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONTFOLLOW | IN_EXCL_UNLINK)
+
+_EVENT = struct.Struct('iIII')
+_BUFFER_SIZE = 64 * 1024
+_ENCODE_ERRORS = 'surrogateescape' if sys.version_info[0] >= 3 else 'strict'
+
+_libc = None
+
+
+class Watcher(object):
+    """Watches the non-ignored part of a tree with Linux inotify.
+
+    :meth:`walk` performs the initial filtered walk and places a watch on
+    every directory it yields, so ignored directories such as
+    ``node_modules`` never cost a watch. :meth:`events` then yields a
+    :class:`WatchEvent` for each path created, modified or deleted that the
+    ignore rules do not exclude. When an ignore file changes, the spec of
+    its directory is rebuilt, the watches below it are added or removed to
+    match, and the entries it no longer ignores are reported as created.
+    An ``overflow`` event means the kernel dropped events and the
+    caller should walk again.
+
+    A directory that cannot be watched raises :class:`OSError`, such as
+    ``ENOSPC`` once ``fs.inotify.max_user_watches`` is reached, unless it
+    was removed while being walked.
+    """
+
+    def __init__(self, root_dir, ignore_files=IGNORE_FILENAMES, exclude_hidden=False):
+        self._walk = _Walk(root_dir, ignore_files, exclude_hidden)
+        self.root_dir = self._walk.root_dir
+        self._sep = _BYTES_SEP if self._walk.is_bytes else os.sep
+        self.spec_map = {}
+        self.wds = {}
+        self.dirs = {}
+        self.fd = _inotify_init()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.wds.clear()
+            self.dirs.clear()
+
+    def walk(self):
+        """Yields ``(dirpath, dirnames, filenames)`` like :func:`iwalk.iwalk`,
+        watching each directory before it is listed so that no change made
+        during the walk is missed."""
+        for item in self._walk_from(self.root_dir):
+            yield item
+
+    def events(self, timeout=None):
+        """Yields events as they arrive. With a *timeout* in seconds, returns
+        once no event has arrived for that long."""
+        while self.fd is not None:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                return
+            try:
+                data = os.read(self.fd, _BUFFER_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EINTR):
+                    continue
+                raise
+            last = None
+            for event in self._handle(data):
+                # A burst of writes to one file arrives as one event.
+                if event != last or event.kind != MODIFIED:
+                    yield event
+                last = event
+
+    def _walk_from(self, top):
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            if not self._add_watch(dirpath):
+                continue
+            listing = _scan_dir(dirpath, self._walk, self.spec_map)
+            if listing is None:
+                self._forget(dirpath)
+                continue
+            dirnames, filenames, links = listing
+
+            yield dirpath, dirnames, filenames
+
+            for name in reversed(dirnames):
+                if name not in links:
+                    stack.append(os.path.join(dirpath, name))
+
+    def _add_watch(self, dirpath):
+        # Returns False if dirpath vanished or is no longer a directory.
+        # Any other failure, such as running out of watches (ENOSPC), raises
+        # rather than leave a subtree unwatched and unreported.
+        wd = _libc.inotify_add_watch(self.fd, _encode_path(dirpath), WATCH_MASK)
+        if wd < 0:
+            import ctypes
+            code = ctypes.get_errno()
+            if code in (errno.ENOENT, errno.ENOTDIR):
+                return False
+            raise OSError(code, os.strerror(code), dirpath)
+        self.wds[wd] = dirpath
+        self.dirs[dirpath] = wd
+        return True
+
+    def _forget(self, dirpath, remove=True):
+        # Drops the watches of dirpath and everything below it. The kernel
+        # removes them by itself when the directories are deleted.
+        prefix = dirpath + self._sep
+        for path in [p for p in self.dirs if p == dirpath or p.startswith(prefix)]:
+            wd = self.dirs.pop(path)
+            self.wds.pop(wd, None)
+            self.spec_map.pop(path, None)
+            if remove:
+                _libc.inotify_rm_watch(self.fd, wd)
+
+    def _handle(self, data):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                yield WatchEvent(OVERFLOW, self.root_dir, True)
+                continue
+            dirpath = self.wds.get(wd)
+            if dirpath is None:
+                continue
+            if mask & IN_IGNORED:
+                if self.dirs.get(dirpath) == wd:
+                    self._forget(dirpath, remove=False)
+                continue
+            if not name:
+                continue
+
+            name = _decode_name(name, dirpath)
+            path = os.path.join(dirpath, name)
+            is_dir = bool(mask & IN_ISDIR)
+            if name in self._walk.ignore_files and not is_dir:
+                for event in self._reload(dirpath):
+                    yield event
+            if self._walk.exclude_hidden and name.startswith(self._walk.hidden_prefix):
+                continue
+            if _is_ignored(path, is_dir, self.spec_map):
+                continue
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                yield WatchEvent(CREATED, path, is_dir)
+                if is_dir and not os.path.islink(path):
+                    # Entries created before the watch was in place would
+                    # otherwise go unreported.
+                    for sub, dirnames, filenames in self._walk_from(path):
+                        for child in dirnames:
+                            yield WatchEvent(CREATED, os.path.join(sub, child), True)
+                        for child in filenames:
+                            yield WatchEvent(CREATED, os.path.join(sub, child), False)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                if is_dir:
+                    self._forget(path, remove=bool(mask & IN_MOVED_FROM))
+                yield WatchEvent(DELETED, path, is_dir)
+            elif mask & IN_MODIFY:
+                yield WatchEvent(MODIFIED, path, is_dir)
+
+    def _reload(self, dirpath):
+        # Rebuilds the spec of dirpath, by listing it again, and brings the
+        # watches below it in line with the new rules. Returns CREATED
+        # events for the entries the new rules no longer ignore.
+        old_specs = dict(self.spec_map)
+        self.spec_map.pop(dirpath, None)
+        prefix = dirpath + self._sep
+        watched = set(p for p in self.dirs if p.startswith(prefix))
+        wanted = set()
+        events = []
+        stack = [dirpath]
+        while stack:
+            path = stack.pop()
+            listing = _scan_dir(path, self._walk, self.spec_map)
+            if listing is None:
+                continue
+            dirnames, filenames, links = listing
+            # Everything below a directory that was not watched is new;
+            # in one that was, only what the old rules ignored.
+            was_listed = path == dirpath or path in watched
+            for names, is_dir in ((dirnames, True), (filenames, False)):
+                for name in names:
+                    child = os.path.join(path, name)
+                    if not was_listed or _is_ignored(child, is_dir, old_specs):
+                        events.append(WatchEvent(CREATED, child, is_dir))
+            for name in dirnames:
+                if name not in links:
+                    child = os.path.join(path, name)
+                    wanted.add(child)
+                    stack.append(child)
+        for path in watched - wanted:
+            if path in self.dirs:
+                self._forget(path)
+        for path in sorted(wanted - watched):
+            self._add_watch(path)
+        return events
+
+
+def _inotify_init():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    fd = _libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+    if fd < 0:
+        import ctypes
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+    return fd
+
+
+def _encode_path(path):
+    if isinstance(path, bytes):
+        return path
+    return path.encode(sys.getfilesystemencoding(), _ENCODE_ERRORS)
+
+
+def _decode_name(name, dirpath):
+    # Names come back in the type of the watched paths.
+    if isinstance(dirpath, bytes):
+        return name
+    return name.decode(sys.getfilesystemencoding(), _ENCODE_ERRORS)
+
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import shutil
+import threading
+import time
+import pytest
+
+from iwalk import aio
+from iwalk import iwalk
+from iwalk.aio import aiwalk
+from iwalk.cache import SpecCache
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def create_tree(root):
+    create_file(os.path.join(root, ".gitignore"), "*.log\nbuild/\n")
+    for a in range(4):
+        for b in range(3):
+            create_file(os.path.join(root, "d%d" % a, "s%d" % b, "f.py"))
+            create_file(os.path.join(root, "d%d" % a, "s%d" % b, "f.log"))
+        create_file(os.path.join(root, "d%d" % a, "build", "out.o"))
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def collect(walk):
+    return [item async for item in walk]
+
+
+# ✅ Test: aiwalk() yields exactly what iwalk() yields, in the same order
+def test_matches_iwalk():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        expected = list(iwalk(temp_dir))
+        assert run(collect(aiwalk(temp_dir))) == expected
+        assert run(collect(aiwalk(temp_dir, concurrency=1, readahead=1))) == expected
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Pruning dirnames in place skips those subtrees
+def test_pruning():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+
+        async def pruned():
+            seen = []
+            async for dirpath, dirnames, filenames in aiwalk(temp_dir):
+                seen.append(dirpath)
+                dirnames[:] = [name for name in dirnames if name != "d1"]
+            return seen
+
+        seen = run(pruned())
+        assert os.path.join(temp_dir, "d0", "s2") in seen
+        assert not any(os.sep + "d1" in path for path in seen)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Slow listings run off the loop, within the concurrency bound
+def test_does_not_block_loop(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    running = [0, 0]
+    lock = threading.Lock()
+    original = aio._scan_dir
+
+    def slow_scan(dirpath, walk, spec_map):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return original(dirpath, walk, spec_map)
+
+    monkeypatch.setattr(aio, "_scan_dir", slow_scan)
+    try:
+        create_tree(temp_dir)
+
+        async def main():
+            ticks = []
+            done = asyncio.Event()
+
+            async def ticker():
+                while not done.is_set():
+                    ticks.append(1)
+                    await asyncio.sleep(0.005)
+
+            tick_task = asyncio.ensure_future(ticker())
+            result = await collect(aiwalk(temp_dir, concurrency=2))
+            done.set()
+            await tick_task
+            return result, len(ticks)
+
+        result, ticks = run(main())
+        assert result == list(iwalk(temp_dir))
+        assert ticks > len(result)
+        assert 1 <= running[1] <= 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Cancelling the consumer cancels the pending listings
+def test_cancellation():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+
+        async def main():
+            first = asyncio.Event()
+
+            async def consume():
+                async for _ in aiwalk(temp_dir):
+                    first.set()
+                    await asyncio.sleep(10)
+
+            task = asyncio.ensure_future(consume())
+            await first.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.05)
+            current = asyncio.Task.current_task() if hasattr(asyncio.Task, "current_task") \
+                else asyncio.current_task()
+            all_tasks = asyncio.Task.all_tasks() if hasattr(asyncio.Task, "all_tasks") \
+                else asyncio.all_tasks()
+            return [t for t in all_tasks if t is not current and not t.done()]
+
+        assert run(main()) == []
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Several walks share one loop
+def test_concurrent_walks():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+
+        async def main():
+            return await asyncio.gather(*[collect(aiwalk(temp_dir)) for _ in range(5)])
+
+        expected = list(iwalk(temp_dir))
+        assert run(main()) == [expected] * 5
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: The cache is saved off the loop thread when the walk ends
+def test_cache_saved_off_loop():
+    temp_dir = tempfile.mkdtemp()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        # Files modified in the last seconds are not cached.
+        old = time.time() - 3600
+        os.utime(os.path.join(temp_dir, ".gitignore"), (old, old))
+        cache = SpecCache(cache_dir)
+        save = cache.save
+        saved_on = []
+
+        def recording_save():
+            saved_on.append(threading.current_thread())
+            save()
+
+        cache.save = recording_save
+
+        async def main():
+            return await collect(aiwalk(temp_dir, cache=cache))
+
+        assert run(main()) == list(iwalk(temp_dir))
+        assert saved_on and saved_on[0] is not threading.current_thread()
+        assert os.path.exists(cache.path)
+    finally:
+        shutil.rmtree(temp_dir)
+        shutil.rmtree(cache_dir)
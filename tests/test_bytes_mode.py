@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import time
+import pytest
+
+from iwalk import iwalk, parallel_iwalk, is_ignored
+from iwalk.cache import SpecCache
+from iwalk.patterns import load_ignore_specs
+
+pytestmark = pytest.mark.skipif(sys.version_info[0] < 3,
+                                reason="Python 2 str paths are already bytes")
+
+
+def create_file(path, content=b""):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def create_tree(root, patterns=b"*.log\nbuild/\n\xffraw*\n"):
+    os.makedirs(os.path.join(root, b"src", b"build"))
+    create_file(os.path.join(root, b".gitignore"), patterns)
+    create_file(os.path.join(root, b"src", b"main.py"))
+    create_file(os.path.join(root, b"src", b"debug.log"))
+    create_file(os.path.join(root, b"src", b"build", b"out.o"))
+    create_file(os.path.join(root, b".hidden"))
+    try:
+        create_file(os.path.join(root, b"src", b"bad\xff.txt"))
+        create_file(os.path.join(root, b"src", b"bad\xff.log"))
+        create_file(os.path.join(root, b"src", b"\xffraw.txt"))
+    except (OSError, UnicodeError):
+        pytest.skip("filesystem rejects undecodable names")
+
+
+def make_root():
+    return os.fsencode(tempfile.mkdtemp())
+
+
+# ✅ Test: A bytes root yields bytes and matches iwalk() on the decoded root
+def test_bytes_walk_matches_str_walk():
+    root = make_root()
+    try:
+        # The str walk needs a decodable ignore file.
+        create_tree(root, b"*.log\nbuild/\n")
+        result = list(iwalk(root))
+        for dirpath, dirnames, filenames in result:
+            assert isinstance(dirpath, bytes)
+            assert all(isinstance(n, bytes) for n in dirnames + filenames)
+        decoded = [(os.fsencode(d), [os.fsencode(n) for n in dn], [os.fsencode(n) for n in fn])
+                   for d, dn, fn in iwalk(os.fsdecode(root))]
+        assert result == decoded
+    finally:
+        shutil.rmtree(root)
+
+
+# ✅ Test: Undecodable names are matched against raw bytes patterns
+def test_undecodable_names():
+    root = make_root()
+    try:
+        create_tree(root)
+        files = dict((d, fn) for d, _, fn in iwalk(root))
+        src = sorted(files[os.path.join(root, b"src")])
+        assert src == [b"bad\xff.txt", b"main.py"]
+        assert os.path.join(root, b"src", b"build") not in files
+    finally:
+        shutil.rmtree(root)
+
+
+# ✅ Test: Hidden files, is_ignored() and parallel walks accept bytes
+def test_bytes_helpers():
+    root = make_root()
+    try:
+        create_tree(root)
+        top = [fn for d, _, fn in iwalk(root, exclude_hidden=True) if d == root][0]
+        assert b".hidden" not in top and b".gitignore" not in top
+
+        specs = load_ignore_specs(root, [b".gitignore"])
+        assert is_ignored(os.path.join(root, b"src", b"x.log"), specs, is_dir=False)
+        assert not is_ignored(os.path.join(root, b"src", b"x.py"), specs, is_dir=False)
+
+        serial = sorted((d, sorted(dn), sorted(fn)) for d, dn, fn in iwalk(root))
+        assert sorted((d, sorted(dn), sorted(fn)) for d, dn, fn in parallel_iwalk(root, workers=2)) == serial
+    finally:
+        shutil.rmtree(root)
+
+
+# ✅ Test: The spec cache stores and returns bytes patterns unchanged
+def test_bytes_patterns_cached():
+    root = make_root()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        create_tree(root)
+        stamp = time.time() - 60
+        os.utime(os.path.join(root, b".gitignore"), (stamp, stamp))
+        expected = list(iwalk(root))
+        assert list(iwalk(root, cache=cache_dir)) == expected
+        cache = SpecCache(cache_dir)
+        assert list(iwalk(root, cache=cache)) == expected
+        assert cache.hits == 1
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(cache_dir)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import errno
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import pytest
+
+from iwalk import copying
+from iwalk import iwalk
+from iwalk.copying import copytree
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def create_tree(root):
+    create_file(os.path.join(root, ".gitignore"), "*.o\nbuild/\n")
+    create_file(os.path.join(root, "README.md"), "readme")
+    for a in range(3):
+        for b in range(40):
+            create_file(os.path.join(root, "src%d" % a, "f%d.c" % b), "c%d%d" % (a, b))
+            create_file(os.path.join(root, "src%d" % a, "f%d.o" % b), "o")
+    create_file(os.path.join(root, "build", "out.bin"), "bin")
+    create_file(os.path.join(root, "big.dat"), "x" * (3 * 1024 * 1024 + 17))
+    os.chmod(os.path.join(root, "README.md"), 0o600)
+
+
+def same_mtime(a, b):
+    if hasattr(a, "st_mtime_ns"):
+        return a.st_mtime_ns == b.st_mtime_ns
+    # Python 2 sets times to the microsecond at best.
+    return abs(a.st_mtime - b.st_mtime) < 1e-5
+
+
+def relative_files(root, **kwargs):
+    return sorted(os.path.relpath(os.path.join(dirpath, name), root)
+                  for dirpath, _, filenames in iwalk(root, **kwargs) for name in filenames)
+
+
+@pytest.fixture
+def trees():
+    temp_dir = tempfile.mkdtemp()
+    src, dst = os.path.join(temp_dir, "src"), os.path.join(temp_dir, "out", "dst")
+    create_tree(src)
+    yield src, dst
+    shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Exactly the files iwalk() keeps are copied, with contents,
+# modes and times
+@pytest.mark.parametrize("workers", [1, 4])
+def test_copies_kept_files(trees, workers):
+    src, dst = trees
+    assert copytree(src, dst, workers=workers) == dst
+    assert relative_files(dst, ignore_files=[]) == relative_files(src)
+    for name in relative_files(src):
+        source, copy = os.path.join(src, name), os.path.join(dst, name)
+        assert read_file(copy) == read_file(source)
+        assert same_mtime(os.stat(copy), os.stat(source))
+    assert stat.S_IMODE(os.stat(os.path.join(dst, "README.md")).st_mode) == 0o600
+    assert not os.path.exists(os.path.join(dst, "build"))
+
+
+# ✅ Test: With update, files whose size and mtime match are not copied again
+def test_update_skips_unchanged(trees):
+    src, dst = trees
+    copytree(src, dst)
+    copy = os.path.join(dst, "src0", "f1.c")
+    st = os.stat(copy)
+    create_file(copy, "XXX")
+    if hasattr(st, "st_mtime_ns"):
+        os.utime(copy, ns=(st.st_atime_ns, st.st_mtime_ns))
+    else:
+        os.utime(copy, (st.st_atime, st.st_mtime))
+    create_file(os.path.join(src, "src0", "f2.c"), "changed")
+
+    copytree(src, dst, update=True)
+    assert read_file(copy) == "XXX"
+    assert read_file(os.path.join(dst, "src0", "f2.c")) == "changed"
+
+    copytree(src, dst)
+    assert read_file(copy) == "c01"
+
+
+# ✅ Test: Symlinks to directories stay links; links to files follow symlinks
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlinks(trees):
+    src, dst = trees
+    os.symlink("src0", os.path.join(src, "linked_dir"))
+    os.symlink("README.md", os.path.join(src, "linked_file"))
+
+    copytree(src, dst)
+    assert os.readlink(os.path.join(dst, "linked_dir")) == "src0"
+    assert not os.path.islink(os.path.join(dst, "linked_file"))
+    assert read_file(os.path.join(dst, "linked_file")) == "readme"
+
+    shutil.rmtree(dst)
+    copytree(src, dst, symlinks=True)
+    assert os.readlink(os.path.join(dst, "linked_file")) == "README.md"
+
+
+# ✅ Test: Data is copied with read/write when the kernel cannot copy it
+def test_kernel_copy_fallback(trees, monkeypatch):
+    src, dst = trees
+
+    def unsupported(*args):
+        raise OSError(errno.ENOSYS, os.strerror(errno.ENOSYS))
+
+    for name in ("copy_file_range", "sendfile"):
+        if hasattr(os, name):
+            monkeypatch.setattr(os, name, unsupported)
+    copytree(src, dst)
+    assert read_file(os.path.join(dst, "big.dat")) == read_file(os.path.join(src, "big.dat"))
+
+
+# ✅ Test: A kernel copy that answers 0 before any data falls back instead
+# of leaving the file empty
+@pytest.mark.parametrize("names", [("copy_file_range",), ("copy_file_range", "sendfile")])
+def test_kernel_copy_returning_zero(trees, monkeypatch, names):
+    src, dst = trees
+
+    def nothing(*args):
+        return 0
+
+    for name in names:
+        monkeypatch.setattr(os, name, nothing, raising=False)
+    copytree(src, dst)
+    for name in ("big.dat", "README.md", os.path.join("src1", "f7.c")):
+        assert read_file(os.path.join(dst, name)) == read_file(os.path.join(src, name))
+
+
+# ✅ Test: Errors are collected and raised together as shutil.Error
+def test_errors_collected(trees, monkeypatch):
+    src, dst = trees
+    original = copying._copy_file
+
+    def failing(source, copy, st):
+        if source.endswith("f3.c"):
+            raise IOError(errno.EIO, "simulated")
+        return original(source, copy, st)
+
+    monkeypatch.setattr(copying, "_copy_file", failing)
+    with pytest.raises(shutil.Error) as info:
+        copytree(src, dst, workers=2)
+    failed = sorted(os.path.relpath(source, src) for source, _, _ in info.value.args[0])
+    assert failed == [os.path.join("src%d" % a, "f3.c") for a in range(3)]
+    assert os.path.exists(os.path.join(dst, "src2", "f39.c"))
+
+    with pytest.raises(ValueError):
+        copytree(src, os.path.join(src, "copy"))
+
+
+# ✅ Test: An unexpected worker exception stops the copy and is raised
+def test_worker_exception_raised(trees, monkeypatch):
+    src, dst = trees
+
+    def broken(source, copy, st):
+        raise KeyError(source)
+
+    monkeypatch.setattr(copying, "_copy_file", broken)
+    monkeypatch.setattr(copying, "FILES_PER_JOB", 1)
+    monkeypatch.setattr(copying, "JOBS_PER_WORKER", 1)
+    with pytest.raises(KeyError):
+        copytree(src, dst, workers=2)
+
+
+# ✅ Test: The walk does not block on a full queue once every worker is gone
+@pytest.mark.filterwarnings("ignore:Exception in thread")
+def test_dead_workers_do_not_block(trees, monkeypatch):
+    src, dst = trees
+
+    def exiting(source, copy, st):
+        raise SystemExit()
+
+    monkeypatch.setattr(copying, "_copy_file", exiting)
+    monkeypatch.setattr(copying, "FILES_PER_JOB", 1)
+    monkeypatch.setattr(copying, "JOBS_PER_WORKER", 1)
+    with pytest.raises(RuntimeError):
+        copytree(src, dst, workers=1)
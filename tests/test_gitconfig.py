@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import pytest
+
+from iwalk import gitconfig
+from iwalk.gitconfig import GitConfig, load_config, parse_config
+
+
+def parse(text):
+    return GitConfig(list(parse_config(text)), {})
+
+
+# ✅ Test: Values are unquoted and unescaped like git does
+def test_value_syntax():
+    config = parse(
+        '[core]\n'
+        '\texcludesFile = "~/my ignore"  ; trailing comment\n'
+        '\tpager = less   -R # comment\n'
+        '\teditor = "vim \\"x\\"" \\\n'
+        '\t\t--nofork\n'
+        '\tbare\n'
+    )
+    assert config.get("core.excludesfile") == "~/my ignore"
+    assert config.get("core.pager") == "less   -R"
+    assert config.get("core.editor") == 'vim "x"   --nofork'
+    assert config.get("core.bare", "unset") is None
+
+
+# ✅ Test: Section and key names are case-insensitive, subsections are not
+def test_key_case():
+    config = parse('[Core]\nExcludesFile = a\n[remote "Origin"]\nurl = b\n[alias.CO]\nx = c\n')
+    assert config.get("core.excludesFile") == "a"
+    assert config.get("remote.Origin.url") == "b"
+    assert config.get("remote.origin.url") is None
+    assert config.get("alias.co.x") == "c"
+
+
+# ✅ Test: Later definitions win and all are kept
+def test_last_value_wins():
+    config = parse("[core]\nexcludesfile = a\n[core]\nexcludesfile = b\n")
+    assert config.get("core.excludesfile") == "b"
+    assert config.get_all("core.excludesfile") == ["a", "b"]
+
+
+# ✅ Test: Only the most recently used configs stay memoized
+def test_memo_is_bounded(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+        monkeypatch.setenv("HOME", temp_dir)
+        monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(temp_dir, "xdg"))
+        monkeypatch.setattr(gitconfig, "CONFIG_CACHE_SIZE", 2)
+        monkeypatch.setattr(gitconfig, "_memo", gitconfig.OrderedDict())
+        repos = [os.path.join(temp_dir, name) for name in ("a", "b", "c")]
+        for repo in repos:
+            os.makedirs(os.path.join(repo, ".git"))
+        first = load_config(repos[0])
+        load_config(repos[1])
+        assert load_config(repos[0]) is first
+        load_config(repos[2])
+        # b, the least recently used, was dropped.
+        assert [gitdir for _, gitdir in gitconfig._memo] == \
+            [os.path.join(repos[0], ".git"), os.path.join(repos[2], ".git")]
+        assert load_config(repos[0]) is first
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk.gitindex import git_iwalk, read_index
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def encode_varint(value):
+    # git's offset varint, as read by gitindex._read_varint.
+    out = [value & 0x7f]
+    value >>= 7
+    while value:
+        value -= 1
+        out.insert(0, 0x80 | (value & 0x7f))
+        value >>= 7
+    return struct.pack("%dB" % len(out), *out)
+
+
+def write_index(path, entries, version=2, hash_size=20):
+    # Writes (name, mode, stage, extended) entries as a git index would.
+    data = [struct.pack(">4sII", b"DIRC", version, len(entries))]
+    previous = b""
+    for name, mode, stage, extended in entries:
+        flags = min(len(name), 0xfff) | (stage << 12) | (0x4000 if extended else 0)
+        entry = (b"\0" * 24 + struct.pack(">I", mode) + b"\0" * (12 + hash_size) +
+                 struct.pack(">H", flags))
+        if extended:
+            entry += b"\0\0"
+        if version == 4:
+            common = 0
+            while common < min(len(name), len(previous)) and name[common] == previous[common]:
+                common += 1
+            entry += encode_varint(len(previous) - common) + name[common:] + b"\0"
+        else:
+            entry += name
+            entry += b"\0" * (8 - len(entry) % 8)
+        data.append(entry)
+        previous = name
+    data.append(b"TREE" + struct.pack(">I", 0))
+    data.append(b"\0" * hash_size)
+    with open(path, "wb") as f:
+        f.write(b"".join(data))
+
+
+def git(root, *args):
+    return subprocess.check_output(("git", "-c", "core.quotepath=off") + args, cwd=root)
+
+
+def git_repo(root, *init_args):
+    git(root, "init", "-q", *init_args)
+    create_file(os.path.join(root, ".gitignore"), "*.log\n")
+    for name in ("a.py", "b.log", "src/c.py"):
+        create_file(os.path.join(root, *name.split("/")))
+    git(root, "add", ".")
+
+
+def walked_files(root):
+    return sorted(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+                  for dirpath, _, filenames in git_iwalk(root) for name in filenames)
+
+
+def has_git():
+    try:
+        subprocess.check_output(["git", "--version"])
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+# Longer than the 0xfff that fits in the flags, so its end is found by NUL.
+LONG = b"/".join([b"d" * 200] * 25) + b"/f.txt"
+
+ENTRIES = [
+    (b".gitignore", 0o100644, 0, False),
+    (b"build/keep.o", 0o100644, 0, False),
+    (LONG, 0o100644, 0, False),
+    (b"lib", 0o160000, 0, False),
+    (b"src/main.py", 0o100644, 0, False),
+    (b"src/merge.py", 0o100644, 1, False),
+    (b"src/merge.py", 0o100644, 2, False),
+    (b"src/merge.py", 0o100644, 3, False),
+    (b"src/new.py", 0o100644, 0, True),
+    (b"src/pkg/mod.py", 0o100644, 0, False),
+]
+
+
+# ✅ Test: Index versions 2 to 4 are parsed, with conflicts listed once
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_read_index_versions(version):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, "index")
+        write_index(path, [e for e in ENTRIES if version >= 3 or not e[3]], version)
+        names = [name for name, mode in read_index(path)]
+        expected = [e[0] for e in ENTRIES if version >= 3 or not e[3]]
+        assert names == sorted(set(expected))
+        assert dict(read_index(path))[b"lib"] == 0o160000
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: SHA-256 object ids are sized by the object format
+@pytest.mark.parametrize("version", [2, 4])
+def test_read_index_sha256(version):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, "index")
+        entries = [e for e in ENTRIES if not e[3]]
+        write_index(path, entries, version, hash_size=32)
+        names = [name for name, mode in read_index(path, "sha256")]
+        assert names == sorted(set(e[0] for e in entries))
+        with pytest.raises(ValueError):
+            read_index(path, "md5")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Files that are not supported indexes are rejected
+def test_read_index_errors():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, "index")
+        for content in (b"", b"DIRC", b"NOPE" + b"\0" * 40, struct.pack(">4sII", b"DIRC", 5, 0),
+                        struct.pack(">4sII", b"DIRC", 4, 1) + b"\0" * 62 + b"\x80"):
+            with open(path, "wb") as f:
+                f.write(content)
+            with pytest.raises(ValueError):
+                read_index(path)
+        write_index(path, [(b"sparse/", 0o040000, 0, False)], 4)
+        with pytest.raises(ValueError):
+            read_index(path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Tracked files are yielded from the index, untracked ones through
+# the ignore rules
+def test_git_iwalk_tracked_and_untracked():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, ".git"))
+        write_index(os.path.join(temp_dir, ".git", "index"),
+                    [e for e in ENTRIES if e[0] != LONG], 3)
+        create_file(os.path.join(temp_dir, ".gitignore"), "*.o\n*.log\nbuild/\n")
+        for name in ("src/main.py", "src/merge.py", "src/pkg/mod.py", "build/keep.o",
+                     "src/extra.py", "src/extra.log", "build/other.o", "tools/run.py",
+                     "tools/run.log", "lib/.git", "lib/inner.py"):
+            create_file(os.path.join(temp_dir, *name.split("/")))
+
+        found = dict((os.path.relpath(dirpath, temp_dir).replace(os.sep, "/"),
+                      (dirnames, filenames)) for dirpath, dirnames, filenames in git_iwalk(temp_dir))
+        assert sorted(found) == [".", "build", "src", "src/pkg", "tools"]
+        # Tracked entries come first and are not matched: build/ is ignored,
+        # but its tracked file is kept, and it is not listed.
+        assert found["."] == (["build", "src", "lib", "tools"], [".gitignore"])
+        assert found["build"] == ([], ["keep.o"])
+        # src/new.py was deleted from the work tree but is still tracked.
+        assert found["src"] == (["pkg"], ["main.py", "merge.py", "new.py", "extra.py"])
+        assert found["tools"] == ([], ["run.py"])
+
+        tracked = [os.path.join(dirpath, name)
+                   for dirpath, _, filenames in git_iwalk(temp_dir, untracked=False)
+                   for name in filenames]
+        assert sorted(os.path.relpath(path, temp_dir).replace(os.sep, "/") for path in tracked) == \
+            [".gitignore", "build/keep.o", "src/main.py", "src/merge.py", "src/new.py",
+             "src/pkg/mod.py"]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: git_iwalk() agrees with git ls-files on a real repository
+@pytest.mark.skipif(not has_git(), reason="git is not installed")
+@pytest.mark.parametrize("version", ["2", "4"])
+def test_matches_git_ls_files(version, monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("HOME", tempfile.gettempdir())
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tempfile.gettempdir(), "no-such-dir"))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        git(temp_dir, "init", "-q")
+        create_file(os.path.join(temp_dir, ".gitignore"), "*.log\nout/\n")
+        create_file(os.path.join(temp_dir, "docs", ".gitignore"), "*.html\n")
+        for name in ("a.py", "b.log", "docs/index.md", "docs/index.html", "out/x.bin",
+                     "src/pkg/m.py", "src/sp ace.py"):
+            create_file(os.path.join(temp_dir, *name.split("/")))
+        git(temp_dir, "add", ".")
+        git(temp_dir, "add", "-f", "out/x.bin")
+        git(temp_dir, "update-index", "--index-version", version)
+        for name in ("new.py", "new.log", "out/y.bin", "docs/new.html", "extra/e.py"):
+            create_file(os.path.join(temp_dir, *name.split("/")))
+        os.remove(os.path.join(temp_dir, "src", "pkg", "m.py"))
+
+        expected = git(temp_dir, "ls-files", "--cached", "--others", "--exclude-standard")
+        found = [os.path.relpath(os.path.join(dirpath, name), temp_dir).replace(os.sep, "/")
+                 for dirpath, _, filenames in git_iwalk(temp_dir) for name in filenames]
+        assert sorted(found) == sorted(expected.decode("utf-8").splitlines())
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Indexes that cannot be read fall back to the ignore rules
+@pytest.mark.skipif(not has_git(), reason="git is not installed")
+@pytest.mark.parametrize("damage", ["split", "corrupt", "empty"])
+def test_unreadable_index_falls_back(damage, monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("HOME", tempfile.gettempdir())
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tempfile.gettempdir(), "no-such-dir"))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        git_repo(temp_dir)
+        index = os.path.join(temp_dir, ".git", "index")
+        if damage == "split":
+            git(temp_dir, "update-index", "--split-index")
+            with pytest.raises(ValueError):
+                read_index(index)
+        else:
+            with open(index, "r+b") as f:
+                f.truncate(0 if damage == "empty" else 40)
+        assert walked_files(temp_dir) == [".gitignore", "a.py", "src/c.py"]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def has_sha256():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        git(temp_dir, "init", "-q", "--object-format=sha256")
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: The index of a SHA-256 repository is read
+@pytest.mark.skipif(not has_git() or not has_sha256(), reason="git cannot create SHA-256 repositories")
+def test_sha256_repository(monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("HOME", tempfile.gettempdir())
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tempfile.gettempdir(), "no-such-dir"))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        git_repo(temp_dir, "--object-format=sha256")
+        os.remove(os.path.join(temp_dir, "a.py"))
+        names = [name for name, mode in read_index(os.path.join(temp_dir, ".git", "index"),
+                                                   "sha256")]
+        assert names == [b".gitignore", b"a.py", b"src/c.py"]
+        # a.py is deleted but tracked, so only the index can yield it.
+        assert walked_files(temp_dir) == [".gitignore", "a.py", "src/c.py"]
+    finally:
+        shutil.rmtree(temp_dir)
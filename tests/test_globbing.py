@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import iwalk
+from iwalk import globbing
+from iwalk.globbing import glob, iglob
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+FILES = [
+    "setup.py",
+    "README.md",
+    "src/main.py",
+    "src/api/v1.proto",
+    "src/api/v2.proto",
+    "src/api/gen/v1_pb2.py",
+    "src/util/helpers.py",
+    "src/util/.secret.py",
+    "src/build/out.py",
+    "docs/conf.py",
+    "docs/api/v1.proto",
+    "node_modules/dep/index.py",
+    "data/a1.csv",
+    "data/b2.csv",
+    "data/c3.txt",
+]
+
+
+def create_tree(root):
+    create_file(os.path.join(root, ".gitignore"), "node_modules/\nbuild/\ngen/\n")
+    for path in FILES:
+        create_file(os.path.join(root, *path.split("/")))
+
+
+def expected(root, regex, **kwargs):
+    # Brute force: every kept file whose relative path matches regex.
+    result = []
+    for dirpath, _, filenames in iwalk(root, **kwargs):
+        for name in filenames:
+            rel = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            if re.match(regex + r"\Z", rel):
+                result.append(os.path.join(dirpath, name))
+    return sorted(result)
+
+
+# ✅ Test: iglob() agrees with filtering a full iwalk() by the same pattern
+@pytest.mark.parametrize("pattern,regex", [
+    ("**/*.py", r"(.*/)?[^/]*\.py"),
+    ("*.py", r"[^/]*\.py"),
+    ("src/**/*.proto", r"src/(.*/)?[^/]*\.proto"),
+    ("src/*/*.py", r"src/[^/]*/[^/]*\.py"),
+    ("**/api/*", r"(.*/)?api/[^/]*"),
+    ("data/[ab]?.csv", r"data/[ab].\.csv"),
+    ("data/[!a]*", r"data/[^a/][^/]*"),
+    ("src/**", r"src/.*"),
+    ("src/main.py", r"src/main\.py"),
+    ("missing/**/*.py", r"missing/.*"),
+])
+def test_matches_brute_force(pattern, regex):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        assert glob(temp_dir, pattern) == expected(temp_dir, regex)
+        assert glob(temp_dir, pattern, exclude_hidden=True) == \
+            expected(temp_dir, regex, exclude_hidden=True)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Several patterns are combined and results follow iwalk() order
+def test_multiple_patterns():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        found = list(iglob(temp_dir, ["*.md", "docs/**/*.proto", "setup.py"]))
+        assert sorted(found) == sorted([os.path.join(temp_dir, "README.md"),
+                                        os.path.join(temp_dir, "setup.py"),
+                                        os.path.join(temp_dir, "docs", "api", "v1.proto")])
+        order = [os.path.join(dirpath, name)
+                 for dirpath, _, filenames in iwalk(temp_dir) for name in filenames]
+        assert found == [path for path in order if path in found]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Only directories that can hold matches are visited, and literal
+# components are looked up instead of listed
+def test_prunes_by_literal_prefix(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    listed = []
+    original = globbing._list_dir
+    monkeypatch.setattr(globbing, "_list_dir",
+                        lambda dirpath: listed.append(dirpath) or original(dirpath))
+    try:
+        create_tree(temp_dir)
+        found = glob(temp_dir, "src/**/*.proto")
+        assert found == [os.path.join(temp_dir, "src", "api", "v1.proto"),
+                         os.path.join(temp_dir, "src", "api", "v2.proto")]
+        # The root is not listed, and neither are ignored directories.
+        assert sorted(listed) == sorted([os.path.join(temp_dir, "src"),
+                                         os.path.join(temp_dir, "src", "api"),
+                                         os.path.join(temp_dir, "src", "util")])
+
+        del listed[:]
+        assert glob(temp_dir, "node_modules/dep/*.py") == []
+        assert glob(temp_dir, "src/util/helpers.py") == [
+            os.path.join(temp_dir, "src", "util", "helpers.py")]
+        assert listed == []
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: A bytes root yields bytes paths
+@pytest.mark.skipif(sys.version_info[0] < 3, reason="bytes walks are Python 3 only")
+def test_bytes_root():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        found = glob(os.fsencode(temp_dir), [b"src/**/*.py", "data/*.csv"])
+        assert found == sorted(os.fsencode(path) for path in
+                               glob(temp_dir, ["src/**/*.py", "data/*.csv"]))
+        assert all(isinstance(path, bytes) for path in found)
+    finally:
+        shutil.rmtree(temp_dir)
@@ -4,7 +4,6 @@ import sys
 import tempfile
 import shutil
 import pytest
-import subprocess
 
 from iwalk.patterns import load_ignore_specs
 
@@ -49,10 +48,10 @@ def test_combined_global_repo_dir_patterns(monkeypatch):
         create_file(os.path.join(temp_dir, ".gitignore"), "local.txt\n")
         create_file(os.path.join(temp_dir, ".git", "info", "exclude"), "excluded.txt\n")
 
-        def fake_check_output(*args, **kwargs):
-            raise subprocess.CalledProcessError(1, args[0])  # prevent global pattern injection
-
-        monkeypatch.setattr(subprocess, "check_output", fake_check_output)
+        # prevent global pattern injection
+        monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+        monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.path.join(temp_dir, "no-config"))
+        monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(temp_dir, "no-xdg"))
 
         specs = load_ignore_specs(temp_dir, [".gitignore"])
         root_spec = specs[temp_dir]
@@ -150,3 +150,128 @@ def test_iwalk_tree_excludes_hidden():
 
     finally:
         shutil.rmtree(temp_dir)
+
+
+# --cache-dir stores parsed ignore files and leaves the output unchanged
+def test_iwalk_tree_cache_dir():
+    temp_dir = tempfile.mkdtemp()
+    cache_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        # Back-date the ignore file so the cache does not treat it as racy.
+        gitignore = os.path.join(temp_dir, ".gitignore")
+        os.utime(gitignore, (0, 0))
+        script = os.path.abspath("scripts/iwalk-tree.py")
+        if not os.path.exists(script):
+            pytest.skip("iwalk-tree script not found")
+
+        outputs = []
+        for args in ([], ['--cache-dir', cache_dir], ['--cache-dir=' + cache_dir]):
+            proc = subprocess.Popen(
+                [sys.executable, script, '--all'] + args + [temp_dir],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            out, err = proc.communicate()
+            assert proc.returncode == 0
+            outputs.append(out)
+
+        assert outputs[0] == outputs[1] == outputs[2]
+        assert os.listdir(cache_dir)
+    finally:
+        shutil.rmtree(temp_dir)
+        shutil.rmtree(cache_dir)
+
+
+def run_script(args, cwd=None):
+    script = os.path.abspath("scripts/iwalk-tree.py")
+    if not os.path.exists(script):
+        pytest.skip("iwalk-tree script not found")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.abspath("src"), env.get("PYTHONPATH", "")])
+    proc = subprocess.Popen(
+        [sys.executable, script] + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=env
+    )
+    out, err = proc.communicate()
+    assert proc.returncode == 0, err
+    return out, err
+
+
+# --list prints sorted relative file paths and no debug line
+def test_iwalk_tree_list():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        out, err = run_script(['--all', '--list', '.'], cwd=temp_dir)
+        lines = out.decode("utf-8").splitlines()
+        assert lines == [
+            ".gitignore",
+            ".keepme.txt",
+            ".hidden/dotfile.txt",
+            ".hidden/sub/ignored.txt",
+            "a/file.txt",
+            "a/b/nested.txt",
+            "a/b/c/verydeep.txt",
+            "d/sibling.txt",
+        ]
+        assert b"DEBUG" not in err
+
+        out, err = run_script(['--list', temp_dir])
+        lines = out.decode("utf-8").splitlines()
+        assert os.path.join(temp_dir, "a", "b", "nested.txt") in lines
+        assert all(line.startswith(temp_dir + "/") for line in lines)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# --print0 ends every path with a NUL byte; --unsorted keeps the same paths
+def test_iwalk_tree_print0():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        out, _ = run_script(['--list'], cwd=temp_dir)
+        out0, _ = run_script(['--print0'], cwd=temp_dir)
+        assert out0.endswith(b"\0") and b"\n" not in out0
+        assert out0.split(b"\0")[:-1] == out.splitlines()
+
+        unsorted, _ = run_script(['--print0', '--unsorted'], cwd=temp_dir)
+        assert sorted(unsorted.split(b"\0")) == sorted(out0.split(b"\0"))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# --jsonl prints one object per kept directory and file
+def test_iwalk_tree_jsonl():
+    import json
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        out, _ = run_script(['--jsonl'], cwd=temp_dir)
+        records = [json.loads(line) for line in out.decode("ascii").splitlines()]
+        assert {"path": "a/b", "type": "dir"} in records
+        assert {"path": "a/b/c/verydeep.txt", "type": "file"} in records
+        assert not any(r["path"].startswith("__pycache__") for r in records)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# --jsonl writes names that are not UTF-8 instead of failing
+def test_iwalk_tree_jsonl_undecodable_name():
+    import json
+    temp_dir = tempfile.mkdtemp()
+    try:
+        root = temp_dir.encode("utf-8") if not isinstance(temp_dir, bytes) else temp_dir
+        for name in (b"bad\xff", u"caf\u00e9.txt".encode("utf-8")):
+            with open(os.path.join(root, name), "wb") as f:
+                f.write(b"x")
+        out, _ = run_script(['--jsonl'], cwd=temp_dir)
+        records = [json.loads(line) for line in out.decode("ascii").splitlines()]
+        bad = u"bad\udcff" if sys.version_info[0] >= 3 else u"bad\ufffd"
+        assert {"path": bad, "type": "file"} in records
+        assert {"path": u"caf\u00e9.txt", "type": "file"} in records
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import patterns
+from iwalk import iwalk
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def record_reads(monkeypatch):
+    seen = []
+    original = patterns.read_patterns_from_file
+
+    def recording_read(filepath):
+        seen.append(filepath)
+        return original(filepath)
+
+    monkeypatch.setattr(patterns, "read_patterns_from_file", recording_read)
+    return seen
+
+
+# ✅ Test: Ignore files inside pruned subtrees are never read
+def test_pruned_subtree_not_loaded(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, "node_modules", "pkg"))
+        os.makedirs(os.path.join(temp_dir, "src"))
+        create_file(os.path.join(temp_dir, ".gitignore"), "node_modules/\n")
+        create_file(os.path.join(temp_dir, "node_modules", "pkg", ".gitignore"), "*.js\n")
+        create_file(os.path.join(temp_dir, "src", ".gitignore"), "*.o\n")
+        create_file(os.path.join(temp_dir, "src", "main.c"))
+        create_file(os.path.join(temp_dir, "src", "main.o"))
+
+        seen = record_reads(monkeypatch)
+        result = list(iwalk(temp_dir))
+
+        assert not any("node_modules" in p for p in seen)
+        assert os.path.join(temp_dir, "src", ".gitignore") in seen
+        files = dict((d, f) for d, _, f in result)
+        assert sorted(files[os.path.join(temp_dir, "src")]) == [".gitignore", "main.c"]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: The first directory is yielded before any subdirectory is read
+def test_yields_before_reading_subdirectories(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, "a", "b"))
+        create_file(os.path.join(temp_dir, "a", "b", ".gitignore"), "x\n")
+
+        seen = record_reads(monkeypatch)
+        walker = iwalk(temp_dir)
+        dirpath, dirnames, filenames = next(walker)
+
+        assert dirpath == temp_dir
+        assert not any(p.startswith(os.path.join(temp_dir, "a")) for p in seen)
+        list(walker)
+        assert os.path.join(temp_dir, "a", "b", ".gitignore") in seen
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Nested specs still apply to their own subtree once reached
+def test_nested_spec_applies_after_lazy_load():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, "a", "b"))
+        create_file(os.path.join(temp_dir, "a", ".gitignore"), "*.log\n")
+        create_file(os.path.join(temp_dir, "a", "b", "debug.log"))
+        create_file(os.path.join(temp_dir, "a", "b", "keep.txt"))
+        create_file(os.path.join(temp_dir, "top.log"))
+
+        result = dict((d, f) for d, _, f in iwalk(temp_dir))
+        assert "top.log" in result[temp_dir]
+        assert result[os.path.join(temp_dir, "a", "b")] == ["keep.txt"]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Only the ignore files a directory's listing shows are opened
+def test_only_listed_ignore_files_read(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, "a", "b"))
+        os.makedirs(os.path.join(temp_dir, "c", ".ignore"))
+        create_file(os.path.join(temp_dir, "a", ".dockerignore"), "*.tmp\n")
+        create_file(os.path.join(temp_dir, "a", "b", "x.tmp"))
+
+        seen = record_reads(monkeypatch)
+        result = list(iwalk(temp_dir))
+
+        # A directory named .ignore is not an ignore file.
+        assert sorted(seen) == sorted([os.path.join(temp_dir, ".git", "info", "exclude"),
+                                       os.path.join(temp_dir, "a", ".dockerignore")])
+        files = dict((d, f) for d, _, f in result)
+        assert files[os.path.join(temp_dir, "a", "b")] == []
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import time
+import pytest
+
+from iwalk import iwalk
+from iwalk import listing
+from iwalk.listing import clear_dir_specs, find_repo_root, listdir, scandir
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_repo(root):
+    os.makedirs(os.path.join(root, ".git", "info"))
+    create_file(os.path.join(root, ".git", "info", "exclude"), "*.bak\n")
+    create_file(os.path.join(root, ".gitignore"), "*.log\nbuild/\n")
+    create_file(os.path.join(root, "src", ".gitignore"), "*.tmp\n!keep.log\n")
+    for name in ("main.py", "debug.log", "x.tmp", "keep.log", "old.bak"):
+        create_file(os.path.join(root, "src", "pkg", name))
+        create_file(os.path.join(root, "src", name))
+    create_file(os.path.join(root, "src", "build", "out.o"))
+    create_file(os.path.join(root, "docs", "index.md"))
+    create_file(os.path.join(root, "docs", ".hidden", "notes.md"))
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("HOME", tempfile.gettempdir())
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tempfile.gettempdir(), "no-such-dir"))
+    clear_dir_specs()
+    temp_dir = tempfile.mkdtemp()
+    create_repo(temp_dir)
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+# ✅ Test: listdir() keeps exactly what iwalk() keeps in every directory
+@pytest.mark.parametrize("exclude_hidden", [False, True])
+def test_agrees_with_iwalk(repo, exclude_hidden):
+    for dirpath, dirnames, filenames in iwalk(repo, exclude_hidden=exclude_hidden):
+        found = listdir(dirpath, exclude_hidden=exclude_hidden)
+        assert sorted(found) == sorted(dirnames + filenames), dirpath
+        assert [entry.name for entry in scandir(dirpath, exclude_hidden=exclude_hidden)] == found
+
+
+# ✅ Test: The repository root is found upward and applies its rules
+def test_finds_repo_root(repo):
+    pkg = os.path.join(repo, "src", "pkg")
+    assert find_repo_root(pkg) == repo
+    # As in iwalk(), src's !keep.log cannot re-include what the root ignores.
+    assert sorted(listdir(pkg)) == ["main.py"]
+    # Rooted at src itself, the root's *.log, build/ and exclude file do not apply.
+    assert sorted(listdir(pkg, root_dir=os.path.join(repo, "src"))) == \
+        ["debug.log", "keep.log", "main.py", "old.bak"]
+    with pytest.raises(ValueError):
+        listdir(repo, root_dir=pkg)
+
+
+# ✅ Test: Directories below an ignored or hidden directory list as empty
+def test_ignored_ancestor(repo):
+    assert listdir(os.path.join(repo, "src", "build")) == []
+    hidden = os.path.join(repo, "docs", ".hidden")
+    assert listdir(hidden) == ["notes.md"]
+    assert listdir(hidden, exclude_hidden=True) == []
+
+
+# ✅ Test: Only the ancestors' ignore rules are loaded, and reused until changed
+def test_loads_only_ancestors(repo, monkeypatch):
+    loaded = []
+    original = listing.load_dir_patterns
+    monkeypatch.setattr(listing, "load_dir_patterns",
+                        lambda dirpath, *args: loaded.append(dirpath) or original(dirpath, *args))
+    pkg = os.path.join(repo, "src", "pkg")
+    listdir(pkg)
+    assert loaded == [repo, os.path.join(repo, "src"), pkg]
+
+    del loaded[:]
+    listdir(pkg)
+    listdir(os.path.join(repo, "src"))
+    assert loaded == []
+
+    gitignore = os.path.join(repo, "src", ".gitignore")
+    create_file(gitignore, "*.tmp\n*.py\n")
+    stamp = time.time() + 5
+    os.utime(gitignore, (stamp, stamp))
+    assert sorted(listdir(pkg)) == []
+    assert loaded == [os.path.join(repo, "src")]
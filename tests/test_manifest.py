@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import iwalk
+from iwalk.manifest import Manifest, manifest, FILE, DIR, LINK
+from iwalk.manifest import _ALIGN, _HEADER, _encoder, _to_bytes
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    os.makedirs(os.path.join(root, "build"))
+    os.makedirs(os.path.join(root, "empty"))
+    create_file(os.path.join(root, ".gitignore"), "build/\n*.log\n")
+    create_file(os.path.join(root, "src", "main.py"), "print(1)\n")
+    create_file(os.path.join(root, "src", "debug.log"))
+    create_file(os.path.join(root, "src", "pkg", "mod.py"), "x = 1\n")
+    create_file(os.path.join(root, "build", "out.o"))
+
+
+def normalize(result):
+    return [(d, sorted(dn), sorted(fn)) for d, dn, fn in result]
+
+
+# ✅ Test: Iterating a manifest reproduces the iwalk() result
+def test_iteration_matches_iwalk():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        m = manifest(temp_dir)
+        assert normalize(m) == normalize(iwalk(temp_dir))
+        assert sorted(m.files()) == sorted(
+            os.path.join(d, f) for d, _, fns in iwalk(temp_dir) for f in fns)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Paths, kinds, sizes and lookups are answered from the arrays
+def test_lookup_and_attributes():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        m = manifest(temp_dir, sizes=True)
+        index = m.lookup(os.path.join("src", "pkg", "mod.py"))
+        assert m.name(index) == "mod.py"
+        assert m.kind(index) == FILE and not m.is_dir(index)
+        assert m.size(index) == 6
+        assert m.path(index) == os.path.join(temp_dir, "src", "pkg", "mod.py")
+        assert m.relpath(m.parent(index)) == os.path.join("src", "pkg")
+        assert m.kind(m.lookup("empty")) == DIR
+        assert m.lookup(os.path.join(temp_dir, "src")) == m.parent(m.parent(index))
+        assert m.lookup(".") == 0
+        with pytest.raises(KeyError):
+            m.lookup(os.path.join("build", "out.o"))
+        with pytest.raises(ValueError):
+            manifest(temp_dir).size(index)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: A saved manifest loads back through a memory mapping
+def test_save_and_load():
+    temp_dir = tempfile.mkdtemp()
+    state = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        m = manifest(temp_dir, sizes=True)
+        path = os.path.join(state, "tree.manifest")
+        m.save(path)
+        loaded = Manifest.load(path)
+        try:
+            assert loaded.root_dir == m.root_dir
+            assert len(loaded) == len(m)
+            assert list(loaded) == list(m)
+            assert [loaded.name(i) for i in range(1, len(m))] == \
+                [m.name(i) for i in range(1, len(m))]
+            assert [loaded.kind(i) for i in range(len(m))] == [m.kind(i) for i in range(len(m))]
+            index = loaded.lookup(os.path.join("src", "main.py"))
+            assert loaded.name(index) == "main.py"
+            assert loaded.path(index) == os.path.join(temp_dir, "src", "main.py")
+            assert loaded.size(index) == 9
+            assert loaded.lookup(os.path.join("src", "pkg")) == m.lookup(os.path.join("src", "pkg"))
+        finally:
+            loaded.close()
+    finally:
+        shutil.rmtree(temp_dir)
+        shutil.rmtree(state)
+
+
+# ✅ Test: Every section of a saved manifest starts on an aligned offset
+def test_saved_sections_aligned():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        m = manifest(temp_dir, sizes=True)
+        offset = _HEADER.size
+        assert offset % _ALIGN == 0
+        for section in m._sections(_encoder(m.is_bytes)(m.root_dir)):
+            size = len(_to_bytes(section))
+            offset += size + (-size % _ALIGN)
+            assert offset % _ALIGN == 0
+        path = os.path.join(temp_dir, "tree.manifest")
+        m.save(path)
+        assert os.path.getsize(path) == offset
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Files that are not manifests are rejected
+def test_load_rejects_garbage():
+    state = tempfile.mkdtemp()
+    try:
+        path = os.path.join(state, "bad")
+        with open(path, "wb") as f:
+            f.write(b"x" * 128)
+        with pytest.raises(ValueError):
+            Manifest.load(path)
+    finally:
+        shutil.rmtree(state)
+
+
+# ✅ Test: Symlinked directories are recorded but not descended
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks unsupported")
+def test_symlinked_dirs():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        os.symlink(os.path.join(temp_dir, "src"), os.path.join(temp_dir, "alias"))
+        m = manifest(temp_dir)
+        assert m.kind(m.lookup("alias")) == LINK
+        assert normalize(m) == normalize(iwalk(temp_dir))
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from iwalk.matcher import CompiledPathSpec, MAX_GROUPS
+from iwalk.vendor.pathspec import PathSpec
+from iwalk.vendor.pathspec.patterns.gitwildmatch import GitWildMatchPattern
+
+
+LINES = [
+    "*.log",
+    "!important.log",
+    "build/",
+    "/dist",
+    "docs/*.html",
+    "**/gen/*.c",
+    "# comment",
+    "node_modules",
+    "!node_modules/keep/",
+    "a/**/b",
+    "*.py[cod]",
+    "!keep.pyc",
+]
+
+PATHS = [
+    "error.log",
+    "important.log",
+    "sub/important.log",
+    "build/",
+    "build/out.o",
+    "src/build/x",
+    "dist",
+    "dist/app.js",
+    "src/dist",
+    "docs/index.html",
+    "docs/api/index.html",
+    "src/gen/x.c",
+    "gen/y.c",
+    "node_modules/",
+    "node_modules/keep/",
+    "node_modules/keep/a.js",
+    "a/b",
+    "a/x/y/b",
+    "mod.pyc",
+    "keep.pyc",
+    "README.md",
+]
+
+
+def reference(lines):
+    return PathSpec.from_lines(GitWildMatchPattern, lines)
+
+
+def compiled(lines):
+    return CompiledPathSpec.from_lines(GitWildMatchPattern, lines)
+
+
+# ✅ Test: Combined matcher agrees with per-pattern matching
+def test_matches_reference_pathspec():
+    ref, fast = reference(LINES), compiled(LINES)
+    for path in PATHS:
+        assert fast.match_file(path) == ref.match_file(path), path
+
+
+# ✅ Test: The last matching pattern decides, including negations
+def test_last_match_wins():
+    spec = compiled(["*.log", "!important.log", "important.log"])
+    assert spec.match_file("important.log")
+    assert spec.last_match("important.log") == 2
+    assert spec.last_match("error.log") == 0
+    assert spec.last_match("README") == -1
+
+
+# ✅ Test: More patterns than fit in one regex are split into blocks
+def test_many_patterns_span_blocks():
+    lines = ["file%d.t?t" % i for i in range(MAX_GROUPS * 2 + 5)]
+    lines.append("!file3.t?t")
+    ref, fast = reference(lines), compiled(lines)
+    assert len(fast._blocks) == 3
+    for path in ["file0.txt", "file3.txt", "file150.txt", "x/file204.txt", "other.txt"]:
+        assert fast.match_file(path) == ref.match_file(path), path
+
+
+# ✅ Test: match_files yields the matching paths only
+def test_match_files():
+    spec = compiled(["*.tmp"])
+    assert list(spec.match_files(["a.tmp", "b.txt", "c/d.tmp"])) == ["a.tmp", "c/d.tmp"]
+    with pytest.raises(TypeError):
+        list(spec.match_files("a.tmp"))
+
+
+# ✅ Test: Specs compiled from bytes lines match bytes paths
+def test_bytes_patterns():
+    spec = compiled([b"*.o", b"!keep.o"])
+    assert spec.match_normalized(b"src/main.o")
+    assert not spec.match_normalized(b"keep.o")
+
+
+# ✅ Test: An empty spec never matches
+def test_empty_spec():
+    spec = compiled([])
+    assert not spec.match_file("anything")
+
+
+# ✅ Test: Plain patterns are answered by the hash tables, globs by regex
+def test_plain_patterns_are_indexed():
+    spec = compiled(["*.pyc", "__pycache__/", "node_modules", "/dist", "a/b/c", "src/*.c"])
+    assert spec._index.size == 5
+    assert len(spec._blocks) == 1
+    assert spec.match_file("pkg/mod.pyc")
+    assert spec.match_file("pkg/__pycache__/")
+    assert not spec.match_file("pkg/__pycache__")
+    assert spec.match_file("x/node_modules/y.js")
+    assert spec.match_file("dist/app.js")
+    assert not spec.match_file("src/dist")
+    assert spec.match_file("a/b/c/d")
+    assert not spec.match_file("x/a/b/c")
+
+
+# ✅ Test: Ordering between indexed patterns, negations and globs is kept
+def test_index_and_regex_ordering():
+    spec = compiled(["*.log", "!debug*.log", "debug-keep.log", "!/debug-keep.log"])
+    assert spec.match_file("error.log")
+    assert not spec.match_file("debug1.log")
+    assert spec.match_file("sub/debug-keep.log")
+    assert not spec.match_file("debug-keep.log")
+
+
+# ✅ Test: Randomized agreement with PathSpec, including odd paths
+def test_randomized_agreement():
+    import random
+    rng = random.Random(1234)
+    names = ["a", "b", "c.txt", "d.log", ".env", "node_modules", "x-y", "t$"]
+    lines = []
+    for _ in range(300):
+        name = rng.choice(names)
+        form = rng.randint(0, 7)
+        if form == 0:
+            line = name
+        elif form == 1:
+            line = name + "/"
+        elif form == 2:
+            line = "/" + name
+        elif form == 3:
+            line = "*" + name[-2:]
+        elif form == 4:
+            line = "%s/%s" % (name, rng.choice(names))
+        elif form == 5:
+            line = "/%s/%s/" % (name, rng.choice(names))
+        elif form == 6:
+            line = "%s/**/%s" % (name, rng.choice(names))
+        else:
+            line = name[:1] + "?" + name[2:]
+        if rng.random() < 0.3:
+            line = "!" + line
+        lines.append(line)
+    paths = []
+    for _ in range(500):
+        parts = [rng.choice(names) for _ in range(rng.randint(1, 4))]
+        path = "/".join(parts)
+        if rng.random() < 0.3:
+            path += "/"
+        paths.append(path)
+    paths.extend(["/a", "/node_modules/b", "a\nb/d.log", "d.log\n", ""])
+
+    for count in (1, 5, 40, 300):
+        ref, fast = reference(lines[:count]), compiled(lines[:count])
+        for path in paths:
+            assert fast.match_file(path) == ref.match_file(path), (count, path)
+
+
+# ✅ Test: match_names() agrees with match_file() on every name of a directory
+def test_match_names_batch():
+    spec = compiled(LINES)
+    names = ["x.log", "important.log", "build", "gen", "keep", "b", "main.c", "y.pyc"]
+    for prefix in ("", "docs/", "src/gen/", "node_modules/", "a/x/"):
+        for is_dir in (False, True):
+            expected = []
+            for name in names:
+                path = prefix + name
+                expected.append(bool(spec.match_file(path) or
+                                     (is_dir and spec.match_file(path + "/"))))
+            assert spec.match_names(prefix, names, [is_dir] * len(names)) == expected
+
+
+# ✅ Test: Anchored prefixes are read from the generated regexes
+def test_anchored_prefixes():
+    from iwalk.matcher import _anchored_prefix
+
+    def prefix(line):
+        return _anchored_prefix(GitWildMatchPattern(line).regex.pattern)
+
+    assert prefix("/docs/build/") == ["docs", "build"]
+    assert prefix("src/**/gen/*.c") == ["src"]
+    assert prefix("/dist") == ["dist"]
+    assert prefix("docs/*.html") == ["docs"]
+    assert prefix("a.b/c+d") == ["a.b", "c+d"]
+    assert prefix("*.log") == []
+    assert prefix("/*/tmp") == []
+    assert prefix("build/") == []
+
+
+# ✅ Test: Subspecs keep only patterns that can match below a directory
+def test_subspec_pruning():
+    spec = compiled(["*.log", "/docs/build/", "src/**/gen/*.c", "!/docs/keep"])
+    assert spec.subspec("") is spec
+    assert len(spec.subspec("lib/").patterns) == 1
+    assert len(spec.subspec("docs/").patterns) == 3
+    assert len(spec.subspec("docs/build/x/").patterns) == 2
+    assert spec.subspec("lib/") is spec.subspec("tests/")
+
+    anchored = compiled(["/docs/build/", "/dist"])
+    assert anchored.subspec("lib/") is None
+    assert anchored.subspec("docs/") is not None
+
+
+# ✅ Test: Pruned subspecs give the same answers as the full spec
+def test_subspec_agreement():
+    import random
+    rng = random.Random(7)
+    names = ["a", "b", "docs", "src", "gen", "x.c", "y.log", "build"]
+    lines = []
+    for _ in range(60):
+        depth = rng.randint(1, 3)
+        line = "/".join(rng.choice(names + ["*", "**"]) for _ in range(depth))
+        if rng.random() < 0.5:
+            line = "/" + line
+        if rng.random() < 0.3:
+            line += "/"
+        if rng.random() < 0.2:
+            line = "!" + line
+        lines.append(line)
+    spec = compiled(lines)
+    for _ in range(300):
+        prefix = "".join(rng.choice(names) + "/" for _ in range(rng.randint(0, 4)))
+        is_dirs = [rng.random() < 0.5 for _ in names]
+        sub = spec.subspec(prefix)
+        expected = spec.match_names(prefix, names, is_dirs)
+        if sub is None:
+            assert not any(expected), prefix
+        else:
+            assert sub.match_names(prefix, names, is_dirs) == expected, prefix
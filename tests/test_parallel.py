@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import threading
+import time
+import pytest
+
+from iwalk import iwalk, parallel_iwalk, prefetch_iwalk
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_tree(root):
+    create_file(os.path.join(root, ".gitignore"), "*.log\nnode_modules/\n")
+    for i in range(6):
+        for j in range(4):
+            path = os.path.join(root, "pkg%d" % i, "sub%d" % j)
+            os.makedirs(path)
+            create_file(os.path.join(path, "a.py"))
+            create_file(os.path.join(path, "b.log"))
+        create_file(os.path.join(root, "pkg%d" % i, ".gitignore"), "sub0/\n")
+    os.makedirs(os.path.join(root, "node_modules", "dep"))
+    create_file(os.path.join(root, "node_modules", "dep", "index.js"))
+
+
+def normalize(result):
+    return sorted((d, sorted(dn), sorted(fn)) for d, dn, fn in result)
+
+
+# ✅ Test: Every worker count yields exactly the serial walk's results
+def test_matches_serial_walk():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        expected = normalize(iwalk(temp_dir))
+        for workers in (1, 3, 8):
+            assert normalize(parallel_iwalk(temp_dir, workers=workers)) == expected
+        assert normalize(parallel_iwalk(temp_dir, exclude_hidden=True)) == \
+            normalize(iwalk(temp_dir, exclude_hidden=True))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Nested ignore specs are inherited by the subtrees other workers list
+def test_spec_inheritance():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        dirs = set(d for d, _, _ in parallel_iwalk(temp_dir, workers=4))
+        assert os.path.join(temp_dir, "pkg1", "sub1") in dirs
+        assert os.path.join(temp_dir, "pkg1", "sub0") not in dirs
+        assert os.path.join(temp_dir, "node_modules") not in dirs
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: A directory's result that is slow to queue does not end the walk
+# before its subdirectories are counted
+def test_slow_parent_result(monkeypatch):
+    from iwalk import parallel
+    put = parallel._put
+
+    def slow_put(results, item, pool):
+        if item[2]:
+            time.sleep(0.05)
+        return put(results, item, pool)
+
+    monkeypatch.setattr(parallel, "_put", slow_put)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        assert normalize(parallel_iwalk(temp_dir, workers=4)) == normalize(iwalk(temp_dir))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Abandoning the generator stops the worker threads
+def test_early_close_stops_workers():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        before = threading.active_count()
+        walker = parallel_iwalk(temp_dir, workers=4)
+        next(walker)
+        walker.close()
+        assert threading.active_count() == before
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Errors raised while filtering surface in the caller
+def test_worker_errors_propagate(monkeypatch):
+    from iwalk import parallel
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(parallel, "_scan_dir", broken)
+    with pytest.raises(RuntimeError):
+        list(parallel_iwalk(tempfile.gettempdir(), workers=2))
+
+
+def test_rejects_zero_workers():
+    with pytest.raises(ValueError):
+        list(parallel_iwalk(".", workers=0))
+
+
+# ✅ Test: The read-ahead walker keeps the exact serial order
+def test_prefetch_preserves_order():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        for readahead in (1, 4, 32):
+            assert list(prefetch_iwalk(temp_dir, workers=3, readahead=readahead)) == \
+                list(iwalk(temp_dir))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: In-place pruning of dirnames is honored by the read-ahead walker
+def test_prefetch_honors_pruning():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+
+        def pruned(walker):
+            seen = []
+            for dirpath, dirnames, filenames in walker:
+                dirnames[:] = [d for d in dirnames if d not in ("pkg2", "sub3")]
+                seen.append((dirpath, list(dirnames), filenames))
+            return seen
+
+        assert pruned(prefetch_iwalk(temp_dir, readahead=8)) == pruned(iwalk(temp_dir))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Prefetches for pruned directories that have not started are cancelled
+def test_prefetch_cancels_pruned(monkeypatch):
+    from iwalk import parallel
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for name in ("a", "b", "c", "d"):
+            os.makedirs(os.path.join(temp_dir, name))
+        gate = threading.Event()
+        scanned = []
+        original = parallel._scan_dir
+
+        def gated(dirpath, *args):
+            if dirpath != temp_dir:
+                gate.wait(5)
+            scanned.append(dirpath)
+            return original(dirpath, *args)
+
+        monkeypatch.setattr(parallel, "_scan_dir", gated)
+        walker = prefetch_iwalk(temp_dir, workers=1, readahead=8)
+        dirpath, dirnames, filenames = next(walker)
+        dirnames[:] = []
+        threading.Timer(0.2, gate.set).start()
+        assert list(walker) == []
+        assert len(scanned) == 2
+    finally:
+        shutil.rmtree(temp_dir)
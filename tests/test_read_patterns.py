@@ -80,3 +80,12 @@ def test_windows_line_endings():
         assert patterns == ["line1", "line2"]
     finally:
         remove_temp_dir(temp_dir)
+
+
+def test_directory_returns_empty():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, ".gitignore"))
+        assert read_patterns_from_file(os.path.join(temp_dir, ".gitignore")) == []
+    finally:
+        remove_temp_dir(temp_dir)
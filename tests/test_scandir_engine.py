@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import core
+from iwalk import iwalk
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    os.makedirs(os.path.join(root, "build", "out"))
+    os.makedirs(os.path.join(root, ".cache"))
+    create_file(os.path.join(root, ".gitignore"), "build/\n*.pyc\n")
+    create_file(os.path.join(root, "src", ".gitignore"), "gen/\n!keep.pyc\n")
+    create_file(os.path.join(root, "src", "main.py"))
+    create_file(os.path.join(root, "src", "main.pyc"))
+    create_file(os.path.join(root, "src", "keep.pyc"))
+    create_file(os.path.join(root, "src", "pkg", "mod.py"))
+    create_file(os.path.join(root, "build", "out", "a.o"))
+    create_file(os.path.join(root, ".cache", "x"))
+
+
+def normalize(result):
+    return sorted((d, sorted(dn), sorted(fn)) for d, dn, fn in result)
+
+
+# ✅ Test: The scandir engine yields the same tuples as the listdir fallback
+def test_engines_agree(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        for exclude_hidden in (False, True):
+            fast = list(iwalk(temp_dir, exclude_hidden=exclude_hidden))
+            monkeypatch.setattr(core, "_scandir", None)
+            slow = list(iwalk(temp_dir, exclude_hidden=exclude_hidden))
+            monkeypatch.undo()
+            assert normalize(fast) == normalize(slow)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: No per-entry stat() is made to classify entries
+def test_no_isdir_calls(monkeypatch):
+    if core._scandir is None:
+        pytest.skip("scandir not available")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected stat call")
+
+        monkeypatch.setattr(os.path, "isdir", fail)
+        result = list(iwalk(temp_dir))
+        monkeypatch.undo()
+        files = dict((d, sorted(f)) for d, _, f in result)
+        assert files[os.path.join(temp_dir, "src")] == [".gitignore", "main.py"]
+        assert os.path.join(temp_dir, "build") not in files
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Top-down order and in-place pruning of dirnames are honored
+def test_topdown_order_and_pruning():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for name in ("a", "b", "c"):
+            os.makedirs(os.path.join(temp_dir, name, "inner"))
+        walker = iwalk(temp_dir)
+        dirpath, dirnames, filenames = next(walker)
+        dirnames[:] = [d for d in dirnames if d != "b"]
+        visited = [d for d, _, _ in walker]
+        assert os.path.join(temp_dir, "b") not in visited
+        assert os.path.join(temp_dir, "b", "inner") not in visited
+        for name in dirnames:
+            top = visited.index(os.path.join(temp_dir, name))
+            assert visited[top + 1] == os.path.join(temp_dir, name, "inner")
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Symlinked directories are listed but not followed, like os.walk
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+def test_symlinked_directory_not_followed():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(temp_dir, "real"))
+        create_file(os.path.join(temp_dir, "real", "f.txt"))
+        os.symlink(os.path.join(temp_dir, "real"), os.path.join(temp_dir, "link"))
+        result = list(iwalk(temp_dir))
+        top = result[0]
+        assert sorted(top[1]) == ["link", "real"]
+        assert os.path.join(temp_dir, "link") not in [d for d, _, _ in result]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: A missing root yields nothing, like os.walk
+def test_missing_root():
+    assert list(iwalk("/nonexistent/iwalk/root")) == []
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import time
+import pytest
+
+from iwalk import iwalk, incremental_iwalk
+from iwalk import snapshot
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def age_tree(root, seconds=60):
+    # Back-date everything so no directory is considered racily clean.
+    stamp = time.time() - seconds
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (stamp, stamp))
+        os.utime(dirpath, (stamp, stamp))
+
+
+def create_tree(root):
+    for sub in ("a", "b", os.path.join("b", "c"), "build"):
+        os.makedirs(os.path.join(root, sub))
+    create_file(os.path.join(root, ".gitignore"), "build/\n*.log\n")
+    create_file(os.path.join(root, "b", ".gitignore"), "*.tmp\n")
+    create_file(os.path.join(root, "a", "one.txt"))
+    create_file(os.path.join(root, "a", "two.log"))
+    create_file(os.path.join(root, "b", "three.txt"))
+    create_file(os.path.join(root, "b", "c", "four.txt"))
+    create_file(os.path.join(root, "b", "c", "five.tmp"))
+    create_file(os.path.join(root, "build", "out.o"))
+    age_tree(root)
+
+
+def count_listings(monkeypatch):
+    listed = []
+    original = snapshot._list_dir
+
+    def recording(dirpath):
+        listed.append(dirpath)
+        return original(dirpath)
+
+    monkeypatch.setattr(snapshot, "_list_dir", recording)
+    return listed
+
+
+def make_dirs():
+    return tempfile.mkdtemp(), tempfile.mkdtemp()
+
+
+# ✅ Test: The first walk reports every file as added
+def test_first_walk_adds_everything():
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        diff = incremental_iwalk(tree, os.path.join(state, "snap"))
+        assert diff.walk == list(iwalk(tree))
+        assert diff.removed == []
+        assert os.path.join(tree, "b", "c", "four.txt") in diff.added
+        assert os.path.join(tree, "b", "c", "five.tmp") not in diff.added
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
+
+
+# ✅ Test: An unchanged tree is answered from the snapshot without listing
+def test_unchanged_tree_is_not_listed(monkeypatch):
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        path = os.path.join(state, "snap")
+        incremental_iwalk(tree, path)
+
+        listed = count_listings(monkeypatch)
+        diff = incremental_iwalk(tree, path)
+        assert listed == []
+        assert diff.walk == list(iwalk(tree))
+        assert diff.added == [] and diff.removed == []
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
+
+
+# ✅ Test: Only directories whose mtime changed are listed again
+def test_changed_directory_is_listed(monkeypatch):
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        path = os.path.join(state, "snap")
+        incremental_iwalk(tree, path)
+
+        create_file(os.path.join(tree, "a", "new.txt"))
+        os.remove(os.path.join(tree, "b", "c", "four.txt"))
+        age_tree(os.path.join(tree, "a"), 30)
+        age_tree(os.path.join(tree, "b", "c"), 30)
+
+        listed = count_listings(monkeypatch)
+        diff = incremental_iwalk(tree, path)
+        assert sorted(listed) == [os.path.join(tree, "a"), os.path.join(tree, "b", "c")]
+        assert diff.walk == list(iwalk(tree))
+        assert diff.added == [os.path.join(tree, "a", "new.txt")]
+        assert diff.removed == [os.path.join(tree, "b", "c", "four.txt")]
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
+
+
+# ✅ Test: Editing an ignore file refilters its subtree even if no mtime changed
+def test_changed_ignore_file_refilters_subtree(monkeypatch):
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        path = os.path.join(state, "snap")
+        incremental_iwalk(tree, path)
+
+        gitignore = os.path.join(tree, "b", ".gitignore")
+        create_file(gitignore, "*.txt\n")
+        stamp = time.time() - 30
+        os.utime(gitignore, (stamp, stamp))
+
+        listed = count_listings(monkeypatch)
+        diff = incremental_iwalk(tree, path)
+        assert sorted(listed) == [os.path.join(tree, "b"), os.path.join(tree, "b", "c")]
+        assert diff.walk == list(iwalk(tree))
+        assert diff.added == [os.path.join(tree, "b", "c", "five.tmp")]
+        assert diff.removed == [os.path.join(tree, "b", "c", "four.txt"),
+                                os.path.join(tree, "b", "three.txt")]
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
+
+
+# ✅ Test: Directories that disappear report their files as removed
+def test_removed_directory():
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        path = os.path.join(state, "snap")
+        incremental_iwalk(tree, path)
+
+        shutil.rmtree(os.path.join(tree, "b"))
+        age_tree(tree, 30)
+
+        diff = incremental_iwalk(tree, path)
+        assert diff.walk == list(iwalk(tree))
+        assert diff.removed == [os.path.join(tree, "b", ".gitignore"),
+                                os.path.join(tree, "b", "c", "four.txt"),
+                                os.path.join(tree, "b", "three.txt")]
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
+
+
+# ✅ Test: A corrupt snapshot or different settings fall back to a full walk
+def test_unusable_snapshot_is_discarded(monkeypatch):
+    tree, state = make_dirs()
+    try:
+        create_tree(tree)
+        path = os.path.join(state, "snap")
+        incremental_iwalk(tree, path)
+
+        with open(path, "ab") as f:
+            f.write(b"garbage")
+        listed = count_listings(monkeypatch)
+        diff = incremental_iwalk(tree, path)
+        assert len(listed) == len(diff.walk)
+        assert diff.removed == []
+
+        del listed[:]
+        diff = incremental_iwalk(tree, path, exclude_hidden=True)
+        assert len(listed) == len(diff.walk)
+        assert diff.walk == list(iwalk(tree, exclude_hidden=True))
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(state)
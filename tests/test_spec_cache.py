@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import time
+import pytest
+
+from iwalk import iwalk
+from iwalk import cache as cache_module
+from iwalk.cache import SpecCache
+
+
+def create_file(path, content="", age=60):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+    # Back-date the file so it is not considered racily clean.
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def make_dirs():
+    return tempfile.mkdtemp(), tempfile.mkdtemp()
+
+
+# ✅ Test: An unchanged ignore file is served from the cache without parsing
+def test_unchanged_file_is_reused(monkeypatch):
+    tree, cache_dir = make_dirs()
+    try:
+        gitignore = os.path.join(tree, ".gitignore")
+        create_file(gitignore, "*.log\n")
+        first = SpecCache(cache_dir)
+        assert first.read_patterns(gitignore) == ["*.log"]
+        first.save()
+
+        def fail(path):
+            raise AssertionError("parsed again")
+
+        monkeypatch.setattr(cache_module, "read_patterns_from_file", fail)
+        second = SpecCache(cache_dir)
+        assert second.read_patterns(gitignore) == ["*.log"]
+        assert second.hits == 1
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
+
+
+# ✅ Test: A changed ignore file is detected and parsed again
+def test_changed_file_is_reparsed():
+    tree, cache_dir = make_dirs()
+    try:
+        gitignore = os.path.join(tree, ".gitignore")
+        create_file(gitignore, "*.log\n")
+        cache = SpecCache(cache_dir)
+        cache.read_patterns(gitignore)
+        cache.save()
+
+        create_file(gitignore, "*.tmp\n*.bak\n", age=30)
+        cache = SpecCache(cache_dir)
+        assert cache.read_patterns(gitignore) == ["*.tmp", "*.bak"]
+        assert cache.misses == 1
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
+
+
+# ✅ Test: Recently modified files are not cached
+def test_racy_file_not_cached():
+    tree, cache_dir = make_dirs()
+    try:
+        gitignore = os.path.join(tree, ".gitignore")
+        create_file(gitignore, "*.log\n", age=0)
+        cache = SpecCache(cache_dir)
+        cache.read_patterns(gitignore)
+        cache.read_patterns(gitignore)
+        assert cache.hits == 0
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
+
+
+# ✅ Test: A corrupt store is discarded instead of trusted
+def test_corrupt_store_is_discarded():
+    tree, cache_dir = make_dirs()
+    try:
+        gitignore = os.path.join(tree, ".gitignore")
+        create_file(gitignore, "*.log\n")
+        cache = SpecCache(cache_dir)
+        cache.read_patterns(gitignore)
+        cache.save()
+
+        with open(cache.path, "rb") as f:
+            data = f.read()
+        with open(cache.path, "wb") as f:
+            f.write(data.replace(b"*.log", b"*.xyz"))
+
+        cache = SpecCache(cache_dir)
+        assert cache.read_patterns(gitignore) == ["*.log"]
+        assert cache.hits == 0
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
+
+
+# ✅ Test: The store is evicted down to its size bound
+def test_eviction_bounds_size():
+    tree, cache_dir = make_dirs()
+    try:
+        cache = SpecCache(cache_dir, max_bytes=2000)
+        for i in range(50):
+            path = os.path.join(tree, "ignore%d" % i)
+            create_file(path, "pattern-%d\n" % i)
+            cache.read_patterns(path)
+        cache.save()
+        assert os.path.getsize(cache.path) <= 2100
+        assert 0 < len(SpecCache(cache_dir)._load()) < 50
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
+
+
+# ✅ Test: iwalk() accepts a cache directory and saves the store when done
+def test_iwalk_with_cache_dir():
+    tree, cache_dir = make_dirs()
+    try:
+        os.mkdir(os.path.join(tree, "sub"))
+        create_file(os.path.join(tree, ".gitignore"), "*.log\n")
+        create_file(os.path.join(tree, "sub", ".gitignore"), "*.tmp\n")
+        create_file(os.path.join(tree, "sub", "a.tmp"))
+        create_file(os.path.join(tree, "sub", "b.txt"))
+
+        expected = list(iwalk(tree))
+        assert list(iwalk(tree, cache=cache_dir)) == expected
+        assert os.path.exists(os.path.join(cache_dir, cache_module.STORE_NAME))
+
+        cache = SpecCache(cache_dir)
+        assert list(iwalk(tree, cache=cache)) == expected
+        assert cache.hits == 2
+    finally:
+        shutil.rmtree(tree)
+        shutil.rmtree(cache_dir)
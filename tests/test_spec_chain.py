@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import core
+from iwalk import iwalk, is_ignored
+from iwalk.patterns import load_ignore_specs
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_deep_tree(root, depth=12):
+    path = root
+    create_file(os.path.join(root, ".gitignore"), "*.log\nd3/skip/\n")
+    for level in range(depth):
+        path = os.path.join(path, "d%d" % level)
+        os.makedirs(os.path.join(path, "skip"))
+        create_file(os.path.join(path, "keep.txt"))
+        create_file(os.path.join(path, "drop.log"))
+        create_file(os.path.join(path, "drop.tmp"))
+        if level % 4 == 2:
+            create_file(os.path.join(path, ".gitignore"), "*.tmp\n")
+
+
+# ✅ Test: The walker never rebuilds ancestor lists or relative paths per entry
+def test_no_per_entry_ancestor_work(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_deep_tree(temp_dir)
+        expected = list(iwalk(temp_dir))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("per-entry ancestor work")
+
+        monkeypatch.setattr(core, "get_ancestor_paths", fail)
+        monkeypatch.setattr(os.path, "relpath", fail)
+        assert list(iwalk(temp_dir)) == expected
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: The spec chain gives the same answers as is_ignored() at every depth
+def test_chain_matches_is_ignored():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_deep_tree(temp_dir)
+        specs = load_ignore_specs(temp_dir, [".gitignore"])
+        kept = set()
+        for dirpath, dirnames, filenames in iwalk(temp_dir, ignore_files=[".gitignore"]):
+            kept.update(os.path.join(dirpath, name) for name in dirnames + filenames)
+        for dirpath, dirnames, filenames in os.walk(temp_dir):
+            for name in dirnames + filenames:
+                path = os.path.join(dirpath, name)
+                # Only entries of directories the walk reached are decided.
+                if dirpath != temp_dir and dirpath not in kept:
+                    continue
+                assert (path in kept) == (not is_ignored(path, specs)), path
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import iwalk, patterns
+from iwalk.patterns import compile_spec, clear_spec_caches, load_ignore_specs
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+# ✅ Test: Identical pattern lists share one spec, and lines one pattern
+def test_identical_lists_share_a_spec():
+    clear_spec_caches()
+    first = compile_spec(["*.log", "build/"])
+    assert compile_spec(["*.log", "build/"]) is first
+    other = compile_spec(["build/", "*.tmp"])
+    assert other is not first
+    assert other.patterns[0] is first.patterns[1]
+    assert compile_spec([]) is None
+
+
+# ✅ Test: Byte-identical ignore files across subprojects compile once
+def test_subprojects_share_specs():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for name in ("a", "b", "c"):
+            create_file(os.path.join(temp_dir, name, ".gitignore"), "dist/\n*.log\n")
+            create_file(os.path.join(temp_dir, name, "main.py"))
+            create_file(os.path.join(temp_dir, name, "out.log"))
+        create_file(os.path.join(temp_dir, "c", "sub", ".gitignore"), "*.py\n")
+        spec_map = load_ignore_specs(temp_dir, [".gitignore"])
+        specs = [spec_map[os.path.join(temp_dir, name)] for name in ("a", "b", "c")]
+        assert specs[0] is specs[1] is specs[2]
+        assert spec_map[os.path.join(temp_dir, "c", "sub")] is not specs[0]
+
+        files = sorted(name for _, _, filenames in iwalk(temp_dir) for name in filenames)
+        assert files == [".gitignore"] * 4 + ["main.py"] * 3
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: The caches stay within their bounds, dropping the oldest entries
+def test_caches_are_bounded(monkeypatch):
+    monkeypatch.setattr(patterns, "_spec_cache", patterns._LRUCache(2))
+    monkeypatch.setattr(patterns, "_pattern_cache", patterns._LRUCache(3))
+    a = compile_spec(["a"])
+    compile_spec(["b"])
+    assert compile_spec(["a"]) is a
+    compile_spec(["c", "d"])
+    assert len(patterns._spec_cache) == 2
+    assert len(patterns._pattern_cache) == 3
+    # ["b"] was the least recently used spec and is compiled again.
+    assert patterns._spec_cache.get(("b",)) is None
+    assert compile_spec(["a"]) is a
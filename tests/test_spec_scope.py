@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import core, globbing
+from iwalk import iwalk
+from iwalk.globbing import glob
+from iwalk.manifest import manifest
+
+
+def create_file(path, content=""):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_vendored_tree(root, packages=30):
+    create_file(os.path.join(root, ".gitignore"), "*.log\n")
+    for i in range(packages):
+        pkg = os.path.join(root, "vendor", "pkg%d" % i)
+        create_file(os.path.join(pkg, ".gitignore"), "*.tmp%d\n" % i)
+        create_file(os.path.join(pkg, "lib", ".gitignore"), "*.o%d\n" % i)
+        create_file(os.path.join(pkg, "lib", "a.py"))
+        create_file(os.path.join(pkg, "lib", "a.o%d" % i))
+        create_file(os.path.join(pkg, "lib", "a.o%d" % (i + 1)))
+        create_file(os.path.join(pkg, "b.tmp%d" % i))
+
+
+def track_spec_map(monkeypatch, module):
+    sizes = []
+    original = module._filter_entries
+
+    def filter_entries(dirpath, entries, walk, spec_map):
+        sizes.append(len(spec_map))
+        return original(dirpath, entries, walk, spec_map)
+
+    monkeypatch.setattr(module, "_filter_entries", filter_entries)
+    return sizes
+
+
+# ✅ Test: Specs are released once their subtree is done
+# manifest() filters through core._scan_dir, iglob() through its own.
+@pytest.mark.parametrize("module,walk", [
+    (core, lambda root: list(iwalk(root))),
+    (core, lambda root: list(manifest(root))),
+    (globbing, lambda root: glob(root, "**/*.py")),
+])
+def test_spec_map_bounded_by_depth(monkeypatch, module, walk):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_vendored_tree(temp_dir)
+        expected = list(iwalk(temp_dir))
+        sizes = track_spec_map(monkeypatch, module)
+        walk(temp_dir)
+        # The root, one package and its lib at most, never all 61 specs.
+        assert sizes and max(sizes) <= 3
+        assert list(iwalk(temp_dir)) == expected
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Released sibling rules never leak into later subtrees
+def test_siblings_filtered_by_their_own_rules():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_vendored_tree(temp_dir, packages=3)
+        files = dict((os.path.relpath(dirpath, temp_dir), sorted(filenames))
+                     for dirpath, _, filenames in iwalk(temp_dir))
+        for i in range(3):
+            assert files[os.path.join("vendor", "pkg%d" % i)] == [".gitignore"]
+            assert files[os.path.join("vendor", "pkg%d" % i, "lib")] == \
+                [".gitignore", "a.o%d" % (i + 1), "a.py"]
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import subprocess
+import pytest
+
+from iwalk import core
+from iwalk import iwalk
+from iwalk.stats import WalkStats
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    os.makedirs(os.path.join(root, "build"))
+    create_file(os.path.join(root, ".gitignore"), "build/\n*.log\n")
+    create_file(os.path.join(root, "src", ".gitignore"), "*.tmp\n")
+    create_file(os.path.join(root, "src", "main.py"))
+    create_file(os.path.join(root, "src", "debug.log"))
+    create_file(os.path.join(root, "src", "x.tmp"))
+    create_file(os.path.join(root, "src", "pkg", "mod.py"))
+    create_file(os.path.join(root, "build", "out.o"))
+
+
+# ✅ Test: Counters describe the walk without changing its results
+def test_counters(monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.setenv("HOME", tempfile.gettempdir())
+    monkeypatch.setenv("XDG_CONFIG_HOME", os.path.join(tempfile.gettempdir(), "no-such-dir"))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        stats = WalkStats()
+        assert list(iwalk(temp_dir, stats=stats)) == list(iwalk(temp_dir))
+
+        # root, src, src/pkg; build/ is pruned and never listed.
+        assert stats.dirs_listed == 3
+        # .gitignore, src, build | .gitignore, main.py, debug.log, x.tmp, pkg | mod.py
+        assert stats.entries_seen == 9
+        assert stats.entries_pruned == 3
+        # The two .gitignore files the listings found plus .git/info/exclude.
+        assert stats.ignore_lookups == 3
+        assert stats.ignore_files_read == 2
+        assert stats.patterns_loaded == 3
+        # Root: 2 patterns x 3 entries. src: *.tmp x 5 entries, then the
+        # root's 2 patterns x the 4 left. src/pkg: all 3 patterns x mod.py.
+        assert stats.pattern_checks == 6 + (5 + 8) + 3
+        assert set(stats.times) == set(["list", "ignore", "match"])
+        assert sorted(path for path, _ in stats.slowest_dirs()) == sorted([
+            temp_dir, os.path.join(temp_dir, "src"), os.path.join(temp_dir, "src", "pkg")])
+        assert stats.as_dict()["dirs_listed"] == 3
+        assert "directories listed:   3" in stats.report()
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Only the slowest directories are kept, slowest first
+def test_slowest_dirs_are_bounded():
+    stats = WalkStats(slowest=2)
+    for i, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+        stats.record_dir("d%d" % i, 1, 1, seconds, 0.0, 0.0)
+    assert stats.slowest_dirs() == [("d2", 0.5), ("d0", 0.3)]
+    assert stats.dirs_listed == 4
+
+
+# ✅ Test: Stat calls are counted when entries must be classified by stat()
+def test_stat_calls_without_scandir(monkeypatch):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        monkeypatch.setattr(core, "_scandir", None)
+        stats = WalkStats()
+        list(iwalk(temp_dir, stats=stats))
+        # isdir() for each of the 9 entries and islink() for the 3 directories.
+        assert stats.stat_calls == 12
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: iwalk-tree.py --stats prints the report to stderr only
+def test_cli_stats():
+    script = os.path.abspath("scripts/iwalk-tree.py")
+    if not os.path.exists(script):
+        pytest.skip("iwalk-tree script not found")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([os.path.abspath("src"), env.get("PYTHONPATH", "")])
+        proc = subprocess.Popen([sys.executable, script, "--list", "--stats", temp_dir],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        out, err = proc.communicate()
+        assert proc.returncode == 0
+        assert b"directories listed" in err
+        assert b"directories listed" not in out
+        assert out.decode("utf-8").splitlines() == [os.path.join(temp_dir, "src", "main.py"),
+                                                    os.path.join(temp_dir, "src", "pkg", "mod.py")]
+    finally:
+        shutil.rmtree(temp_dir)
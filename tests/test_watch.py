@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+import shutil
+import pytest
+
+from iwalk import iwalk
+from iwalk.watch import Watcher, CREATED, MODIFIED, DELETED
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"),
+                                reason="inotify is Linux only")
+
+
+def create_file(path, content=""):
+    with open(path, "w") as f:
+        if sys.version_info[0] < 3:
+            f.write(content.encode("utf-8"))
+        else:
+            f.write(content)
+
+
+def create_tree(root):
+    os.makedirs(os.path.join(root, "src", "pkg"))
+    os.makedirs(os.path.join(root, "node_modules", "dep"))
+    create_file(os.path.join(root, ".gitignore"), "node_modules/\n*.log\n")
+    create_file(os.path.join(root, "src", "main.py"))
+
+
+def collect(watcher):
+    return [(e.kind, e.path) for e in watcher.events(timeout=0.2)]
+
+
+# ✅ Test: The initial walk matches iwalk() and only watches kept directories
+def test_initial_walk_watches_kept_dirs():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            assert list(watcher.walk()) == list(iwalk(temp_dir))
+            assert sorted(watcher.dirs) == [temp_dir,
+                                            os.path.join(temp_dir, "src"),
+                                            os.path.join(temp_dir, "src", "pkg")]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Events are reported for kept paths and dropped for ignored ones
+def test_events_are_filtered():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            list(watcher.walk())
+            new = os.path.join(temp_dir, "src", "new.py")
+            create_file(new, "x")
+            create_file(os.path.join(temp_dir, "src", "debug.log"), "x")
+            create_file(os.path.join(temp_dir, "node_modules", "dep", "index.js"), "x")
+            create_file(os.path.join(temp_dir, "src", "main.py"), "changed")
+            os.remove(os.path.join(temp_dir, "src", "main.py"))
+
+            events = collect(watcher)
+            assert (CREATED, new) in events
+            assert (MODIFIED, os.path.join(temp_dir, "src", "main.py")) in events
+            assert (DELETED, os.path.join(temp_dir, "src", "main.py")) in events
+            assert all(not path.endswith((".log", ".js")) for _, path in events)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: New directories are watched and their early contents reported
+def test_new_directory_is_watched():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            list(watcher.walk())
+            os.makedirs(os.path.join(temp_dir, "lib", "sub"))
+            create_file(os.path.join(temp_dir, "lib", "sub", "a.py"))
+            events = collect(watcher)
+            assert (CREATED, os.path.join(temp_dir, "lib")) in events
+            assert (CREATED, os.path.join(temp_dir, "lib", "sub", "a.py")) in events
+            assert os.path.join(temp_dir, "lib", "sub") in watcher.dirs
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Changing an ignore file adds and removes watches to match
+def test_ignore_change_updates_watches():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            list(watcher.walk())
+            create_file(os.path.join(temp_dir, ".gitignore"), "src/\n")
+            collect(watcher)
+            assert os.path.join(temp_dir, "src") not in watcher.dirs
+            assert os.path.join(temp_dir, "node_modules", "dep") in watcher.dirs
+
+            create_file(os.path.join(temp_dir, "src", "other.py"))
+            assert collect(watcher) == []
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Entries an ignore file stops ignoring are reported as created
+def test_unignored_entries_are_created():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        create_file(os.path.join(temp_dir, "node_modules", "dep", "index.js"))
+        create_file(os.path.join(temp_dir, "src", "debug.log"))
+        with Watcher(temp_dir) as watcher:
+            list(watcher.walk())
+            create_file(os.path.join(temp_dir, ".gitignore"), "*.log\n")
+            events = collect(watcher)
+            created = sorted(path for kind, path in events if kind == CREATED)
+            assert created == [os.path.join(temp_dir, "node_modules"),
+                               os.path.join(temp_dir, "node_modules", "dep"),
+                               os.path.join(temp_dir, "node_modules", "dep", "index.js")]
+            assert (MODIFIED, os.path.join(temp_dir, ".gitignore")) in events
+            assert os.path.join(temp_dir, "node_modules", "dep") in watcher.dirs
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: Running out of watches raises instead of truncating the walk
+def test_watch_limit_raises(monkeypatch):
+    import ctypes
+    import errno
+    from iwalk import watch
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            add_watch = watch._libc.inotify_add_watch
+
+            def exhausted(fd, path, mask):
+                if path.endswith(b"pkg"):
+                    ctypes.set_errno(errno.ENOSPC)
+                    return -1
+                return add_watch(fd, path, mask)
+
+            monkeypatch.setattr(watch._libc, "inotify_add_watch", exhausted)
+            with pytest.raises(OSError) as info:
+                list(watcher.walk())
+            assert info.value.errno == errno.ENOSPC
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+# ✅ Test: A directory removed during the walk is skipped
+def test_vanished_directory_skipped(monkeypatch):
+    import ctypes
+    import errno
+    from iwalk import watch
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        create_tree(temp_dir)
+        with Watcher(temp_dir) as watcher:
+            add_watch = watch._libc.inotify_add_watch
+
+            def vanished(fd, path, mask):
+                if path.endswith(b"pkg"):
+                    ctypes.set_errno(errno.ENOENT)
+                    return -1
+                return add_watch(fd, path, mask)
+
+            monkeypatch.setattr(watch._libc, "inotify_add_watch", vanished)
+            dirs = [dirpath for dirpath, _, _ in watcher.walk()]
+            assert dirs == [temp_dir, os.path.join(temp_dir, "src")]
+    finally:
+        shutil.rmtree(temp_dir)